@@ -0,0 +1,153 @@
+"""
+Benchmark lokalnego przesiewu danych rynkowych (MarketDataTool).
+
+Generuje syntetyczne dane (błądzenie losowe cen i dane fundamentalne)
+dla kolejnych rozmiarów uniwersum (domyślnie 10 -> 10 000 tickerów)
+i dla każdego rozmiaru mierzy:
+- zimne wczytanie: CSV -> macierz cen -> cache .npy
+- ciepłe wczytanie: otwarcie cache przez mapowanie pamięci
+- przesiew wektorowy: wszystkie wskaźniki jednym wywołaniem
+- punkt odniesienia: te same wskaźniki liczone w pętli po tickerach
+
+Wynik jest zapisywany jako JSON.
+
+Użycie:
+    python benchmarks/bench_market_data.py --tickers 10,1000,10000 --output market.json
+    python benchmarks/bench_market_data.py --days 504 --repeats 20
+"""
+
+import argparse
+import csv
+import json
+import math
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from ai_agents_crew_stock_picker.tools.market_data_tool import (
+    DRAWDOWN_WINDOW,
+    MOMENTUM_WINDOWS,
+    TRADING_DAYS,
+    VOLATILITY_WINDOW,
+    MarketDataStore,
+)
+
+DEFAULT_TICKER_COUNTS = "10,1000,10000"
+
+
+def generate(data_dir: Path, tickers: int, days: int, seed: int) -> None:
+    """Zapisuje prices.csv (format długi) i fundamentals.csv dla syntetycznych spółek."""
+    rng = np.random.default_rng(seed)
+    names = [f"T{index:05d}" for index in range(tickers)]
+    dates = np.datetime_as_string(np.datetime64("2024-01-01") + np.arange(days), unit="D")
+    returns = rng.normal(0.0004, 0.02, size=(tickers, days))
+    prices = 50 * np.exp(np.cumsum(returns, axis=1))
+
+    with (data_dir / "prices.csv").open("w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["date", "ticker", "close"])
+        for row, name in enumerate(names):
+            writer.writerows(zip(dates, [name] * days, np.round(prices[row], 4)))
+
+    with (data_dir / "fundamentals.csv").open("w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["ticker", "eps", "book_value_per_share", "sales_per_share"])
+        for name in names:
+            writer.writerow(
+                [name, *np.round(rng.normal([2.5, 20.0, 30.0], [2.0, 8.0, 10.0]), 4)]
+            )
+
+
+def screen_loop(store: MarketDataStore) -> List[Dict[str, float]]:
+    """Te same wskaźniki co MarketDataStore.screen, liczone ticker po tickerze w Pythonie."""
+    results = []
+    for row in range(len(store.tickers)):
+        prices = store.prices[row].tolist()
+        last = prices[-1]
+        metrics = {
+            name: last / prices[-window - 1] - 1 if len(prices) > window else math.nan
+            for name, window in MOMENTUM_WINDOWS.items()
+        }
+        window = prices[-VOLATILITY_WINDOW - 1:]
+        returns = [math.log(b / a) for a, b in zip(window, window[1:])]
+        metrics["volatility"] = statistics.stdev(returns) * math.sqrt(TRADING_DAYS)
+        peak, drawdown = -math.inf, 0.0
+        for price in prices[-DRAWDOWN_WINDOW:]:
+            peak = max(peak, price)
+            drawdown = max(drawdown, 1 - price / peak)
+        metrics["max_drawdown"] = drawdown
+        for name, value in zip(("pe", "pb", "ps"), store.fundamentals[row].tolist()):
+            metrics[name] = last / value if value > 0 else math.nan
+        results.append(metrics)
+    return results
+
+
+def _timed(function, repeats: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {"mean": statistics.mean(times), "min": min(times)}
+
+
+def run_size(tickers: int, args: argparse.Namespace) -> Dict[str, Any]:
+    data_dir = Path(tempfile.mkdtemp(prefix="stock_picker_market_"))
+    generate(data_dir, tickers, args.days, args.seed)
+
+    start = time.perf_counter()
+    MarketDataStore(str(data_dir)).load()
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store = MarketDataStore(str(data_dir)).load()
+    warm = time.perf_counter() - start
+
+    store.screen()  # Pierwszy dostęp wczytuje strony pliku mapowanego
+    vectorized = _timed(store.screen, args.repeats)
+    loop = _timed(lambda: screen_loop(store), max(1, args.repeats // 5))
+    return {
+        "tickers": tickers,
+        "days": args.days,
+        "cold_load": cold,
+        "warm_load": warm,
+        "screen": vectorized,
+        "screen_loop": loop,
+        "speedup": loop["mean"] / vectorized["mean"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark przesiewu danych rynkowych")
+    parser.add_argument("--tickers", default=DEFAULT_TICKER_COUNTS, help="Rozmiary uniwersum, np. 10,1000")
+    parser.add_argument("--days", type=int, default=TRADING_DAYS + 1, help="Liczba sesji w historii")
+    parser.add_argument("--repeats", type=int, default=10, help="Powtórzenia pomiaru przesiewu")
+    parser.add_argument("--seed", type=int, default=7, help="Ziarno generatora danych")
+    parser.add_argument("--output", help="Plik JSON z wynikami (domyślnie stdout)")
+    args = parser.parse_args()
+
+    results = []
+    for tickers in (int(value) for value in args.tickers.split(",")):
+        result = run_size(tickers, args)
+        print(
+            f"{tickers} tickerów: przesiew {result['screen']['mean'] * 1000:.2f} ms, "
+            f"pętla {result['screen_loop']['mean'] * 1000:.2f} ms, "
+            f"zimne wczytanie {result['cold_load']:.2f} s",
+            file=sys.stderr,
+        )
+        results.append(result)
+
+    report = json.dumps({"benchmark": "market_data", "results": results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark end-to-end potoku załogi w trybie offline.
+
+Uruchamia AiAgentsCrewStockPicker().crew().kickoff() przeciwko lokalnej
+atrapie LLM (FakeLLMServer) i atrapie wyszukiwarki (FakeSearchTool),
+zmieniając liczbę firm (domyślnie 2 -> 200). Dla każdej liczby firm mierzy:
+- czas całkowity (wall time)
+- szczytowe zużycie pamięci (peak RSS)
+- czas poszczególnych etapów: ładowanie YAML, budowa załogi, każde zadanie
+
+Każdy rozmiar działa w osobnym podprocesie, więc peak RSS dotyczy
+tylko tego rozmiaru. Wynik jest zapisywany jako JSON.
+
+Użycie:
+    python benchmarks/bench_pipeline.py --companies 2,10,50,200 --output bench.json
+    python benchmarks/bench_pipeline.py --llm-latency 0.05 --search-latency 0.02
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+DEFAULT_COMPANY_COUNTS = "2,10,50,200"
+
+
+def _peak_rss_mb() -> float:
+    """Szczytowe RSS bieżącego procesu w MB (Linux raportuje KB, macOS bajty)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_single(companies: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Wykonuje jeden pomiar w bieżącym procesie.
+
+    Pamięć załogi i pliki wyjściowe trafiają do katalogu tymczasowego,
+    a embeddingi są liczone lokalnie - żadne żądanie nie opuszcza maszyny.
+    """
+    workdir = tempfile.mkdtemp(prefix="stock_picker_bench_")
+    os.chdir(workdir)  # Ścieżki ./memory są względne - izolujemy je od repozytorium
+    os.environ["MEMORY_EMBEDDER"] = "hashing"
+    os.environ["OPENAI_API_KEY"] = "fake-key"
+    os.environ["CREWAI_DISABLE_TELEMETRY"] = "true"
+    os.environ["OTEL_SDK_DISABLED"] = "true"
+    os.environ["CREWAI_TESTING"] = "true"  # Bez pytania o ślady (czeka na stdin)
+
+    stages: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    # Import mierzony osobno - to stały koszt każdego uruchomienia CLI
+    # (crewai, crewai_tools, chromadb). Atrapy importujemy dopiero potem,
+    # bo same korzystają z crewai i zaniżyłyby ten pomiar.
+    from ai_agents_crew_stock_picker.crew import (
+        AiAgentsCrewStockPicker,
+        TrendingCompanyList,
+        TrendingCompanyResearchList,
+        typed_output,
+    )
+
+    stages["import"] = time.perf_counter() - start
+
+    from fakes import FakeLLMServer, FakeSearchTool
+
+    with FakeLLMServer(companies, args.llm_latency, args.payload_size) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ["OPENAI_API_BASE"] = server.base_url
+
+        # Agenci powstają już w konstruktorze (CrewBase), więc atrapę
+        # wyszukiwarki podstawiamy na klasie, przed utworzeniem instancji
+        search_tool = FakeSearchTool(
+            latency=args.search_latency, payload_size=args.payload_size
+        )
+        AiAgentsCrewStockPicker._search_tool = lambda self: search_tool
+
+        mark = time.perf_counter()
+        crew_instance = AiAgentsCrewStockPicker()  # Ładowanie YAML i agentów
+        crew_instance.execution_mode = "pipeline"  # Atrapa nie obsługuje delegowania managera
+        crew_instance.output_dir = str(Path(workdir) / "output")
+        stages["load_config"] = time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        crew = crew_instance.crew()  # Agenci, zadania, pamięć
+        stages["build_crew"] = time.perf_counter() - mark
+
+        # Czas zadania = odstęp między zakończeniem poprzedniego a bieżącego
+        task_marks: List[float] = [time.perf_counter()]
+
+        def on_task_done(output: Any) -> None:
+            now = time.perf_counter()
+            stages[f"task:{output.name or len(task_marks)}"] = now - task_marks[-1]
+            task_marks.append(now)
+
+        crew.task_callback = on_task_done
+        mark = task_marks[0]
+        result = crew.kickoff(inputs={"sector": "technology", "region": "Africa"})
+        stages["kickoff"] = time.perf_counter() - mark
+
+        # Pomiar ma sens tylko wtedy, gdy etapy zwróciły wyniki zgodne ze schematem
+        found = typed_output(crew_instance.find_trending_companies().output, TrendingCompanyList)
+        research = typed_output(
+            crew_instance.research_trending_companies().output, TrendingCompanyResearchList
+        )
+        assert found is not None, "find_trending_companies nie zwróciło TrendingCompanyList"
+        assert research is not None, "research_trending_companies nie zwróciło TrendingCompanyResearchList"
+
+        return {
+            "companies": companies,
+            "wall_time": time.perf_counter() - start,
+            "peak_rss_mb": _peak_rss_mb(),
+            "stages": stages,
+            "llm_requests": server.requests,
+            "result_chars": len(result.raw),
+            "found_companies": len(found.companies),
+            "researched_companies": len(research.research_list),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark potoku załogi offline")
+    parser.add_argument("--companies", default=DEFAULT_COMPANY_COUNTS, help="Liczby firm oddzielone przecinkami")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Opóźnienie atrapy LLM [s]")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="Opóźnienie atrapy wyszukiwarki [s]")
+    parser.add_argument("--payload-size", type=int, default=400, help="Długość pól tekstowych [znaki]")
+    parser.add_argument("--output", help="Plik JSON z wynikami (domyślnie stdout)")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)  # Tryb podprocesu
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)  # Wynik podprocesu
+    args = parser.parse_args()
+
+    if args.single is not None:
+        # Wynik trafia do pliku - CrewAI pisze na stdout także po zakończeniu
+        # kickoff (panele tracingu), więc ostatnia linia stdout nie jest pewna
+        Path(args.result_file).write_text(json.dumps(run_single(args.single, args)), encoding="utf-8")
+        return
+
+    results = []
+    for count in (int(c) for c in args.companies.split(",") if c.strip()):
+        command = [
+            sys.executable, __file__, "--single", str(count),
+            "--llm-latency", str(args.llm_latency),
+            "--search-latency", str(args.search_latency),
+            "--payload-size", str(args.payload_size),
+        ]
+        with tempfile.TemporaryDirectory(prefix="stock_picker_bench_") as result_dir:
+            result_file = Path(result_dir) / "result.json"
+            # stdout (logi CrewAI) jest pomijany; stdin zamknięty, aby żadne
+            # pytanie CrewAI nie blokowało podprocesu
+            subprocess.run(
+                [*command, "--result-file", str(result_file)],
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            results.append(json.loads(result_file.read_text(encoding="utf-8")))
+        print(f"companies={count}: {results[-1]['wall_time']:.2f} s", file=sys.stderr)
+
+    report = json.dumps({"benchmark": "pipeline", "results": results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Benchmark trybu usługi w porównaniu z uruchomieniami CLI.
+
+Oba warianty działają offline - przeciwko atrapie LLM (FakeLLMServer)
+i atrapie wyszukiwarki (FakeSearchTool) - więc mierzony jest wyłącznie
+narzut startu i obsługi uruchomienia, a nie czas odpowiedzi API:
+
+- CLI: każde uruchomienie to nowy proces (import CrewAI, YAML, agenci,
+  otwarcie baz pamięci, kickoff)
+- usługa: czas startu (do pierwszej poprawnej odpowiedzi /health),
+  a następnie czas kolejnych zleceń POST /runs - sekwencyjnie
+  i współbieżnie
+
+Wynik jest zapisywany jako JSON.
+
+Użycie:
+    python benchmarks/bench_service.py --runs 5 --concurrency 4 --output service.json
+    python benchmarks/bench_service.py --llm-latency 0.05 --companies 5
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+INPUTS = {"sector": "technology", "region": "Africa"}
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _request(url: str, payload: Optional[Dict[str, Any]] = None, timeout: float = 600) -> Dict[str, Any]:
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "mean": statistics.mean(values),
+        "median": statistics.median(values),
+        "min": min(values),
+        "max": max(values),
+    }
+
+
+def _use_fake_search(args: argparse.Namespace) -> None:
+    """Podstawia atrapę wyszukiwarki na klasie - przed utworzeniem agentów."""
+    from ai_agents_crew_stock_picker.crew import AiAgentsCrewStockPicker
+    from fakes import FakeSearchTool
+
+    search_tool = FakeSearchTool(latency=args.search_latency, payload_size=args.payload_size)
+    AiAgentsCrewStockPicker._search_tool = lambda self: search_tool
+
+
+# ============================================================================
+# PODPROCESY
+# ============================================================================
+
+
+def cli_run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Jedno uruchomienie tak jak main.main(): od importu do wyniku."""
+    start = time.perf_counter()
+    from ai_agents_crew_stock_picker.crew import AiAgentsCrewStockPicker
+
+    _use_fake_search(args)
+    crew = AiAgentsCrewStockPicker().crew()
+    ready = time.perf_counter() - start
+    crew.kickoff(inputs=INPUTS)
+    return {"ready": ready, "total": time.perf_counter() - start}
+
+
+def serve(args: argparse.Namespace) -> None:
+    from ai_agents_crew_stock_picker.service import serve as run_service
+
+    _use_fake_search(args)
+    run_service(port=args.port, concurrency=args.concurrency)
+
+
+# ============================================================================
+# POMIAR
+# ============================================================================
+
+
+def _child(args: argparse.Namespace, *extra: str) -> List[str]:
+    return [
+        sys.executable, __file__, *extra,
+        "--search-latency", str(args.search_latency),
+        "--payload-size", str(args.payload_size),
+        "--concurrency", str(args.concurrency),
+    ]
+
+
+def bench_cli(args: argparse.Namespace, workdir: str) -> Dict[str, Any]:
+    walls, readies = [], []
+    with tempfile.TemporaryDirectory(prefix="stock_picker_cli_result_") as result_dir:
+        result_file = Path(result_dir) / "result.json"
+        for _ in range(args.runs):
+            mark = time.perf_counter()
+            # Wynik trafia do pliku - CrewAI pisze na stdout także po kickoff
+            # (panele tracingu); stdin zamknięty, aby pytania CrewAI nie blokowały
+            subprocess.run(
+                _child(args, "--cli-run", "--result-file", str(result_file)),
+                cwd=workdir,
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            walls.append(time.perf_counter() - mark)
+            readies.append(json.loads(result_file.read_text(encoding="utf-8"))["ready"])
+    return {"run_wall": _summary(walls), "startup": _summary(readies)}
+
+
+def bench_service(args: argparse.Namespace, workdir: str) -> Dict[str, Any]:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    mark = time.perf_counter()
+    process = subprocess.Popen(
+        _child(args, "--serve", "--port", str(port)),
+        cwd=workdir,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                health = _request(f"{base}/health", timeout=1)
+                break
+            except OSError:
+                if process.poll() is not None:
+                    raise RuntimeError("Usługa zakończyła się przed startem")
+                time.sleep(0.05)
+        startup = time.perf_counter() - mark
+
+        # Zlecenia sekwencyjne: narzut = czas żądania - czas wykonania załogi
+        latencies, overheads = [], []
+        for _ in range(args.runs):
+            mark = time.perf_counter()
+            run = _request(f"{base}/runs", {"inputs": INPUTS, "wait": True})
+            latency = time.perf_counter() - mark
+            if run["status"] != "completed":
+                raise RuntimeError(f"Uruchomienie nieudane: {run['error']}")
+            latencies.append(latency)
+            overheads.append(latency - run["duration"])
+
+        # Zlecenia współbieżne
+        results: List[Dict[str, Any]] = []
+        mark = time.perf_counter()
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    _request(f"{base}/runs", {"inputs": INPUTS, "wait": True})
+                )
+            )
+            for _ in range(args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        concurrent_wall = time.perf_counter() - mark
+
+        return {
+            "startup": startup,
+            "warm_up": health["startup_seconds"],
+            "request": _summary(latencies),
+            "request_overhead": _summary(overheads),
+            "concurrent": {
+                "requests": args.concurrency,
+                "wall": concurrent_wall,
+                "completed": sum(1 for run in results if run["status"] == "completed"),
+            },
+        }
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark trybu usługi i CLI")
+    parser.add_argument("--runs", type=int, default=5, help="Liczba uruchomień w każdym wariancie")
+    parser.add_argument("--concurrency", type=int, default=4, help="Liczba zleceń współbieżnych")
+    parser.add_argument("--companies", type=int, default=3, help="Liczba firm z atrapy LLM")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Opóźnienie atrapy LLM [s]")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="Opóźnienie atrapy wyszukiwarki [s]")
+    parser.add_argument("--payload-size", type=int, default=400, help="Długość pól tekstowych [znaki]")
+    parser.add_argument("--output", help="Plik JSON z wynikami (domyślnie stdout)")
+    parser.add_argument("--cli-run", action="store_true", help=argparse.SUPPRESS)  # Podproces
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)  # Podproces
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)  # Wynik podprocesu CLI
+    args = parser.parse_args()
+
+    if args.cli_run:
+        Path(args.result_file).write_text(json.dumps(cli_run(args)), encoding="utf-8")
+        return
+    if args.serve:
+        serve(args)
+        return
+
+    from fakes import FakeLLMServer
+
+    # Wspólny katalog roboczy: oba warianty korzystają z tych samych baz ./memory
+    workdir = tempfile.mkdtemp(prefix="stock_picker_service_bench_")
+    with FakeLLMServer(args.companies, args.llm_latency, args.payload_size) as server:
+        os.environ.update(
+            {
+                "OPENAI_BASE_URL": server.base_url,
+                "OPENAI_API_BASE": server.base_url,
+                "OPENAI_API_KEY": "fake-key",
+                "MEMORY_EMBEDDER": "hashing",
+                "CREW_EXECUTION_MODE": "pipeline",  # Atrapa nie obsługuje delegowania managera
+                "CREWAI_DISABLE_TELEMETRY": "true",
+                "OTEL_SDK_DISABLED": "true",
+                "CREWAI_TESTING": "true",  # Bez pytania o ślady (czeka na stdin)
+            }
+        )
+        cli = bench_cli(args, workdir)
+        print(f"CLI: {cli['run_wall']['mean']:.2f} s na uruchomienie", file=sys.stderr)
+        service = bench_service(args, workdir)
+        print(
+            f"Usługa: start {service['startup']:.2f} s, "
+            f"{service['request']['mean']:.2f} s na zlecenie",
+            file=sys.stderr,
+        )
+
+    report = json.dumps(
+        {
+            "benchmark": "service",
+            "runs": args.runs,
+            "companies": args.companies,
+            "cli": cli,
+            "service": service,
+            # Ile czasu na uruchomienie oszczędza rozgrzany proces
+            "saved_per_run": cli["run_wall"]["mean"] - service["request"]["mean"],
+        },
+        indent=2,
+    )
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
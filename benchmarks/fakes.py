@@ -0,0 +1,172 @@
+"""
+Atrapy zewnętrznych usług do benchmarków offline.
+
+- FakeLLMServer: lokalny serwer HTTP zgodny z API OpenAI (chat/completions),
+  zwracający poprawne odpowiedzi dla każdego zadania załogi
+- FakeSearchTool: narzędzie wyszukiwania z konfigurowalnym opóźnieniem
+  i rozmiarem wyników, zastępujące Serper
+
+Dzięki nim benchmark mierzy wyłącznie narzut samego potoku (budowa załogi,
+YAML, pamięć, walidacja Pydantic, zapis wyników), a nie czas odpowiedzi API.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+
+def _filler(size: int, seed: str) -> str:
+    """Tekst wypełniający o zadanej długości (symuluje rozmiar odpowiedzi)."""
+    base = f"{seed} ma stabilną pozycję rynkową i rosnące przychody. "
+    return (base * (size // len(base) + 1))[:size]
+
+
+def fake_companies(count: int) -> List[Dict[str, str]]:
+    """Deterministyczna lista firm w formacie TrendingCompany."""
+    return [
+        {
+            "name": f"Company {index:04d}",
+            "ticker": f"C{index:04d}",
+            "reason": f"Firma {index} ogłosiła nowy produkt",
+        }
+        for index in range(count)
+    ]
+
+
+# ============================================================================
+# ATRAPA LLM
+# ============================================================================
+
+
+class FakeLLMServer:
+    """
+    Lokalny serwer udający API OpenAI chat/completions.
+
+    Rozpoznaje zadanie po fragmentach opisu z tasks.yaml i zwraca
+    odpowiedź w formacie ReAct ("Final Answer: ...") z poprawnym JSON-em
+    dla schematów TrendingCompanyList i TrendingCompanyResearchList.
+
+    Atrybuty:
+        companies: Liczba firm zwracanych przez etap wyszukiwania
+        latency: Opóźnienie każdej odpowiedzi w sekundach
+        payload_size: Długość każdego pola tekstowego analizy (znaki)
+        requests: Liczba obsłużonych żądań
+    """
+
+    def __init__(self, companies: int, latency: float = 0.0, payload_size: int = 400):
+        self.companies = companies
+        self.latency = latency
+        self.payload_size = payload_size
+        self.requests = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self) -> "FakeLLMServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def research(self, name: str) -> Dict[str, str]:
+        """Analiza firmy w formacie TrendingCompanyResearch."""
+        return {
+            "name": name,
+            "market_position": _filler(self.payload_size, name),
+            "future_outlook": _filler(self.payload_size, name),
+            "investment_potential": _filler(self.payload_size, name),
+        }
+
+    def answer(self, prompt: str) -> str:
+        """Zwraca treść odpowiedzi dla promptu (wybór po opisie zadania)."""
+        if "wybierz najlepszą firmę" in prompt:
+            return "Wybrana firma: Company 0000 (C0000)\n\nPozostałe firmy mają słabsze perspektywy."
+        single = re.search(r"szczegółową analizę firmy (.+?) \(ticker", prompt)
+        if single:  # Tryb fan-out - analiza jednej firmy
+            return json.dumps(self.research(single.group(1)), ensure_ascii=False)
+        if "szczegółową analizę" in prompt:
+            research = [self.research(company["name"]) for company in fake_companies(self.companies)]
+            return json.dumps({"research_list": research}, ensure_ascii=False)
+        return json.dumps({"companies": fake_companies(self.companies)}, ensure_ascii=False)
+
+    def _handler(self) -> Type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802 - nazwa wymagana przez http.server
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = "\n".join(
+                    str(message.get("content", "")) for message in body.get("messages", [])
+                )
+                if server.latency:
+                    time.sleep(server.latency)
+                server.requests += 1
+                content = f"Thought: I now can give a great answer\nFinal Answer: {server.answer(prompt)}"
+                payload = json.dumps(
+                    {
+                        "id": f"fake-{server.requests}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "fake"),
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": content},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": {
+                            "prompt_tokens": len(prompt) // 4,
+                            "completion_tokens": len(content) // 4,
+                            "total_tokens": (len(prompt) + len(content)) // 4,
+                        },
+                    }
+                ).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args: Any) -> None:
+                pass  # Bez logów każdego żądania - zaburzałyby pomiar
+
+        return Handler
+
+
+# ============================================================================
+# ATRAPA WYSZUKIWARKI
+# ============================================================================
+
+
+class FakeSearchInput(BaseModel):
+    search_query: str = Field(..., description="Zapytanie do wyszukania w internecie.")
+
+
+class FakeSearchTool(BaseTool):
+    """Wyszukiwarka zwracająca stałe wyniki po zadanym opóźnieniu."""
+
+    name: str = "Search the internet with Serper"
+    description: str = "Narzędzie do wyszukiwania informacji w internecie."
+    args_schema: Type[BaseModel] = FakeSearchInput
+    latency: float = 0.0
+    payload_size: int = 2000
+
+    def _run(self, search_query: str, **kwargs: Any) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return json.dumps(
+            {"organic": [{"title": search_query, "snippet": _filler(self.payload_size, search_query)}]}
+        )
@@ -0,0 +1,237 @@
+"""
+Wsadowe uruchamianie załogi dla wielu kombinacji sektor/region.
+
+Pojedyncze uruchomienie załogi większość czasu czeka na I/O (odpowiedzi LLM
+i wyszukiwania Serper), więc przegląd wielu sektorów i regionów wykonywany
+po kolei jest niepotrzebnie wolny. Ten moduł uruchamia wiele kombinacji
+współbieżnie przez asyncio, z konfigurowalnym limitem równoległości.
+
+Kluczowe założenia:
+- Każda kombinacja dostaje własną instancję załogi (brak współdzielonego stanu)
+- Każda kombinacja zapisuje wyniki do własnego katalogu wyjściowego,
+  więc uruchomienia nie nadpisują wspólnych plików output/*.json
+- Na końcu raportowany jest łączny czas i przepustowość
+"""
+
+import asyncio
+import itertools
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ai_agents_crew_stock_picker.crew import AiAgentsCrewStockPicker
+
+# Domyślny limit równoległych uruchomień - chroni przed limitami dostawców API
+DEFAULT_CONCURRENCY = 4
+
+# Katalog bazowy, w którym powstają podkatalogi dla poszczególnych kombinacji
+DEFAULT_OUTPUT_ROOT = "output/batch"
+
+
+# ============================================================================
+# WYNIKI URUCHOMIEŃ
+# ============================================================================
+
+
+@dataclass
+class BatchRunResult:
+    """
+    Wynik pojedynczego uruchomienia w ramach partii.
+
+    Atrybuty:
+        inputs: Dane wejściowe przekazane do załogi
+        output_dir: Katalog, do którego zapisano pliki wynikowe
+        duration: Czas trwania uruchomienia w sekundach
+        raw: Surowy wynik końcowy załogi (None w przypadku błędu)
+        error: Opis błędu (None, jeśli uruchomienie się powiodło)
+    """
+
+    inputs: Dict[str, Any]
+    output_dir: str
+    duration: float
+    raw: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchReport:
+    """
+    Podsumowanie całej partii uruchomień.
+
+    Atrybuty:
+        results: Wyniki poszczególnych kombinacji (w kolejności wejściowej)
+        wall_time: Łączny czas zegarowy całej partii w sekundach
+        concurrency: Użyty limit równoległości
+    """
+
+    results: List[BatchRunResult] = field(default_factory=list)
+    wall_time: float = 0.0
+    concurrency: int = DEFAULT_CONCURRENCY
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for result in self.results if result.ok)
+
+    @property
+    def throughput(self) -> float:
+        """Liczba zakończonych uruchomień na minutę czasu zegarowego."""
+        if self.wall_time <= 0:
+            return 0.0
+        return len(self.results) / self.wall_time * 60
+
+    def summary(self) -> str:
+        """Zwraca czytelne podsumowanie partii do wyświetlenia w konsoli."""
+        lines = [
+            f"Uruchomienia: {len(self.results)} "
+            f"(udane: {self.succeeded}, błędy: {len(self.results) - self.succeeded})",
+            f"Równoległość: {self.concurrency}",
+            f"Czas całkowity: {self.wall_time:.1f} s",
+            f"Przepustowość: {self.throughput:.2f} uruchomień/min",
+        ]
+        for result in self.results:
+            status = "OK" if result.ok else f"BŁĄD: {result.error}"
+            lines.append(
+                f"  - {result.output_dir} ({result.duration:.1f} s): {status}"
+            )
+        return "\n".join(lines)
+
+
+# ============================================================================
+# PRZYGOTOWANIE DANYCH WEJŚCIOWYCH
+# ============================================================================
+
+
+def load_inputs_file(path: str) -> List[Dict[str, Any]]:
+    """
+    Wczytuje listę danych wejściowych z pliku.
+
+    Obsługiwane formaty:
+        - JSON: lista słowników, np. [{"sector": "technology", "region": "Africa"}]
+        - JSONL: jeden słownik w każdej linii
+
+    Args:
+        path: Ścieżka do pliku z danymi wejściowymi
+
+    Returns:
+        Lista słowników z danymi wejściowymi dla załogi
+
+    Raises:
+        ValueError: Jeśli plik nie zawiera listy słowników
+    """
+    text = Path(path).read_text(encoding="utf-8").strip()
+    if path.endswith(".jsonl"):
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        items = json.loads(text)
+
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        raise ValueError(f"Plik {path} musi zawierać listę obiektów JSON")
+    return items
+
+
+def combine_inputs(sectors: List[str], regions: List[str]) -> List[Dict[str, Any]]:
+    """
+    Tworzy wszystkie kombinacje sektorów i regionów (iloczyn kartezjański).
+
+    Args:
+        sectors: Lista sektorów (np. ["technology", "healthcare"])
+        regions: Lista regionów (np. ["Africa", "Europe"])
+
+    Returns:
+        Lista słowników {"sector": ..., "region": ...}
+    """
+    return [
+        {"sector": sector, "region": region}
+        for sector, region in itertools.product(sectors, regions)
+    ]
+
+
+def output_dir_for(inputs: Dict[str, Any], index: int, root: str) -> str:
+    """
+    Wyznacza unikalny katalog wyjściowy dla danej kombinacji.
+
+    Indeks jest częścią nazwy, dzięki czemu powtórzone kombinacje
+    w pliku wejściowym nie nadpisują swoich wyników.
+    """
+    label = "_".join(str(value) for value in inputs.values()) or "run"
+    slug = re.sub(r"[^a-z0-9]+", "-", label.lower()).strip("-")
+    return str(Path(root) / f"{index:03d}_{slug}")
+
+
+# ============================================================================
+# URUCHAMIANIE PARTII
+# ============================================================================
+
+
+async def _run_one(
+    inputs: Dict[str, Any],
+    output_dir: str,
+    semaphore: asyncio.Semaphore,
+) -> BatchRunResult:
+    """
+    Uruchamia pojedynczą kombinację, respektując limit równoległości.
+
+    Każde uruchomienie tworzy nową instancję załogi, ponieważ obiekty
+    Crew, Agent i Task przechowują stan wykonania i nie mogą być
+    bezpiecznie współdzielone między równoległymi uruchomieniami.
+    """
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            crew_instance = AiAgentsCrewStockPicker()
+            crew_instance.output_dir = output_dir
+            result = await crew_instance.crew().kickoff_async(inputs=inputs)
+            return BatchRunResult(
+                inputs=inputs,
+                output_dir=output_dir,
+                duration=time.perf_counter() - start,
+                raw=result.raw,
+            )
+        except Exception as e:  # Błąd jednej kombinacji nie przerywa partii
+            return BatchRunResult(
+                inputs=inputs,
+                output_dir=output_dir,
+                duration=time.perf_counter() - start,
+                error=str(e),
+            )
+
+
+async def run_batch(
+    inputs_list: List[Dict[str, Any]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    output_root: str = DEFAULT_OUTPUT_ROOT,
+) -> BatchReport:
+    """
+    Uruchamia załogę współbieżnie dla wszystkich podanych danych wejściowych.
+
+    Args:
+        inputs_list: Lista słowników z danymi wejściowymi (po jednym na uruchomienie)
+        concurrency: Maksymalna liczba jednocześnie działających załóg
+        output_root: Katalog bazowy dla katalogów wyjściowych kombinacji
+
+    Returns:
+        BatchReport z wynikami wszystkich uruchomień i statystykami czasu
+    """
+    if concurrency < 1:
+        raise ValueError("Limit równoległości musi być większy od zera")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            _run_one(inputs, output_dir_for(inputs, index, output_root), semaphore)
+            for index, inputs in enumerate(inputs_list)
+        )
+    )
+    return BatchReport(
+        results=list(results),
+        wall_time=time.perf_counter() - start,
+        concurrency=concurrency,
+    )
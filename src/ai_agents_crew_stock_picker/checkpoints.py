@@ -0,0 +1,142 @@
+"""
+Punkty kontrolne (checkpointy) etapów załogi i wznawianie uruchomień.
+
+Gdy pick_best_company zawiedzie (błąd LLM, przekroczony czas powiadomienia),
+trzeba było uruchamiać całą załogę od nowa - łącznie z już opłaconymi
+etapami find_trending_companies i research_trending_companies. Ten moduł
+zapisuje zwalidowany wynik każdego zadania pod identyfikatorem uruchomienia,
+a polecenie replay wznawia pracę od pierwszego niedokończonego etapu.
+
+Struktura katalogu (domyślnie output/checkpoints, zmienna CHECKPOINT_DIR):
+    <run_id>/manifest.json     - dane wejściowe, tryb, katalog wyników, lista
+                                 ukończonych etapów
+    <run_id>/<zadanie>.json    - wynik zadania (raw i dane Pydantic)
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+DEFAULT_CHECKPOINT_DIR = "output/checkpoints"
+
+
+def new_run_id() -> str:
+    """Tworzy identyfikator uruchomienia sortowalny po czasie."""
+    return datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    """Zapis atomowy - przerwanie procesu nie zostawi uszkodzonego pliku."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    temporary.replace(path)
+
+
+class CheckpointStore:
+    """
+    Magazyn checkpointów etapów w katalogu na dysku.
+
+    Atrybuty:
+        root: Katalog bazowy checkpointów
+    """
+
+    def __init__(self, root: str = DEFAULT_CHECKPOINT_DIR):
+        self.root = Path(root)
+
+    @classmethod
+    def from_env(cls) -> "CheckpointStore":
+        return cls(os.getenv("CHECKPOINT_DIR", DEFAULT_CHECKPOINT_DIR))
+
+    def _manifest_path(self, run_id: str) -> Path:
+        return self.root / run_id / "manifest.json"
+
+    def start(
+        self, run_id: str, inputs: Dict[str, Any], mode: str, output_dir: str = "output"
+    ) -> None:
+        """Zapisuje manifest nowego uruchomienia (istniejący pozostaje bez zmian)."""
+        path = self._manifest_path(run_id)
+        if path.exists():
+            return
+        _write_json(
+            path,
+            {
+                "run_id": run_id,
+                "inputs": inputs,
+                "mode": mode,
+                "output_dir": output_dir,
+                "created_at": datetime.now().isoformat(),
+                "stages": [],
+            },
+        )
+
+    def save_stage(
+        self,
+        run_id: str,
+        stage: str,
+        raw: str,
+        result: Optional[BaseModel] = None,
+    ) -> None:
+        """
+        Zapisuje wynik ukończonego zadania i dopisuje je do manifestu.
+
+        Args:
+            run_id: Identyfikator uruchomienia
+            stage: Nazwa zadania (np. research_trending_companies)
+            raw: Surowy wynik zadania
+            result: Zwalidowany wynik Pydantic (None dla wyników tekstowych)
+        """
+        _write_json(
+            self.root / run_id / f"{stage}.json",
+            {
+                "raw": raw,
+                "pydantic": result.model_dump() if result is not None else None,
+                "completed_at": datetime.now().isoformat(),
+            },
+        )
+        path = self._manifest_path(run_id)
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        if stage not in manifest["stages"]:
+            manifest["stages"].append(stage)
+            _write_json(path, manifest)
+
+    def load(self, run_id: str) -> Dict[str, Any]:
+        """
+        Wczytuje manifest wraz z wynikami ukończonych etapów.
+
+        Returns:
+            Manifest z dodatkowym kluczem "results" (etap -> zapisany wynik)
+
+        Raises:
+            FileNotFoundError: Jeśli uruchomienie o podanym ID nie istnieje
+        """
+        path = self._manifest_path(run_id)
+        if not path.exists():
+            raise FileNotFoundError(f"Brak checkpointów dla uruchomienia {run_id}")
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        manifest["results"] = {
+            stage: json.loads((self.root / run_id / f"{stage}.json").read_text(encoding="utf-8"))
+            for stage in manifest["stages"]
+        }
+        return manifest
+
+    def runs(self) -> List[str]:
+        """Zwraca identyfikatory zapisanych uruchomień (od najnowszego)."""
+        if not self.root.exists():
+            return []
+        return sorted(
+            (path.parent.name for path in self.root.glob("*/manifest.json")), reverse=True
+        )
+
+    def latest_incomplete(self, final_stage: str) -> Optional[str]:
+        """Zwraca najnowsze uruchomienie, które nie ukończyło etapu final_stage."""
+        for run_id in self.runs():
+            manifest = json.loads(self._manifest_path(run_id).read_text(encoding="utf-8"))
+            if final_stage not in manifest["stages"]:
+                return run_id
+        return None
@@ -0,0 +1,270 @@
+"""
+Kompaktowanie analiz firm przed etapem wyboru (pick_best_company).
+
+pick_best_company otrzymywał pełny wynik research_trending_companies jako
+kontekst - dla każdej firmy trzy długie akapity (market_position,
+future_outlook, investment_potential). Manager w trybie hierarchicznym
+przesyła ten kontekst ponownie we własnych rundach, więc rozmiar promptu
+rośnie liniowo z liczbą firm i powyżej ~10 firm dominuje koszt i czas.
+
+Ten moduł skraca każdą analizę do ustrukturyzowanego podsumowania
+mieszczącego się w budżecie tokenów - lokalnie, metodą ekstrakcyjną
+(wybór najważniejszych zdań), bez dodatkowego wywołania LLM:
+- budżet jest dzielony równo między firmy, a w obrębie firmy między pola;
+  niewykorzystana część krótkich pól trafia do dłuższych
+- zdania są oceniane według częstości kluczowych słów w analizie,
+  obecności liczb (przychody, wzrost, udział w rynku) i pozycji
+- zdania powtarzające treść już wybranych są pomijane
+- wybrane zdania zachowują kolejność z oryginału
+
+Zmienne środowiskowe (opcjonalne):
+    - COMPACTION_TOKEN_BUDGET: Budżet tokenów analiz wszystkich firm
+      przekazywanych do wyboru (domyślnie: 1500; 0 wyłącza kompaktowanie)
+"""
+
+import json
+import os
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+DEFAULT_TOKEN_BUDGET = 1500
+
+# Pola TrendingCompanyResearch skracane przez kompaktowanie (pozostałe,
+# jak nazwa i ticker, są przekazywane bez zmian)
+COMPACTED_FIELDS = ("market_position", "future_outlook", "investment_potential")
+
+# Minimalny budżet firmy - przy bardzo wielu firmach każda zachowuje
+# przynajmniej jedno krótkie zdanie na pole
+MIN_COMPANY_TOKENS = 45
+
+# Bonusy oceny zdań: liczby niosą fakty finansowe, a pierwsze zdanie
+# akapitu zwykle streszcza jego treść
+NUMBER_BONUS = 0.5
+LEAD_BONUS = 0.3
+
+# Zdania o większym podobieństwie słów (Jaccard) do już wybranego są pomijane
+REDUNDANCY_THRESHOLD = 0.6
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d")
+
+# Słowa pomijane przy ocenie zdań (angielskie i polskie)
+STOPWORDS = frozenset(
+    """
+    the and for with that this from are was were has have its their will which
+    into also over more than such been being about after while there these those
+    oraz jest się które który która jako przez jego jej ich dla może będzie także
+    jednak został została było były tego tym też już nad pod przy
+    """.split()
+)
+
+
+# ============================================================================
+# LICZENIE TOKENÓW
+# ============================================================================
+
+
+@lru_cache(maxsize=None)
+def _tokenizer() -> Optional[Callable[[str], List[int]]]:
+    """
+    Tokenizer modeli gpt-4o (tiktoken), jeśli pakiet jest zainstalowany.
+
+    tiktoken pobiera plik kodowania przy pierwszym użyciu - bez dostępu
+    do sieci (i bez lokalnej kopii) używane jest przybliżenie.
+    """
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base").encode
+    except Exception:  # ImportError lub brak pliku kodowania (offline)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Liczba tokenów tekstu (tiktoken lub przybliżenie: 4 znaki na token)."""
+    encode = _tokenizer()
+    if encode is None:
+        return (len(text) + 3) // 4
+    return len(encode(text))
+
+
+# ============================================================================
+# STRESZCZANIE EKSTRAKCYJNE
+# ============================================================================
+
+
+def _keywords(sentence: str) -> List[str]:
+    return [
+        word
+        for word in _WORD.findall(sentence.lower())
+        if len(word) > 2 and word not in STOPWORDS and not word.isdigit()
+    ]
+
+
+def _truncate(sentence: str, budget: int) -> str:
+    """Skraca pojedyncze zdanie do budżetu, obcinając całe słowa."""
+    words = sentence.split()
+    while len(words) > 1 and count_tokens(" ".join(words) + " …") > budget:
+        words.pop()
+    return " ".join(words) + " …"
+
+
+def summarize(text: str, budget: int) -> str:
+    """
+    Wybiera najważniejsze zdania tekstu mieszczące się w budżecie tokenów.
+
+    Args:
+        text: Tekst do skrócenia (np. akapit market_position)
+        budget: Maksymalna liczba tokenów wyniku
+
+    Returns:
+        Tekst bez zmian, jeśli mieści się w budżecie; w przeciwnym razie
+        wybrane zdania w oryginalnej kolejności
+    """
+    text = text.strip()
+    if count_tokens(text) <= budget:
+        return text
+    sentences = [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+    keywords = [set(_keywords(sentence)) for sentence in sentences]
+    frequency = Counter(word for words in keywords for word in words)
+    top = max(frequency.values(), default=1)
+
+    def score(index: int) -> float:
+        words = keywords[index]
+        centrality = sum(frequency[word] / top for word in words) / max(1.0, len(words) ** 0.5)
+        bonus = NUMBER_BONUS if _NUMBER.search(sentences[index]) else 0.0
+        return centrality + bonus + (LEAD_BONUS if index == 0 else 0.0)
+
+    selected: List[int] = []
+    remaining = budget
+    for index in sorted(range(len(sentences)), key=score, reverse=True):
+        cost = count_tokens(sentences[index])
+        if cost > remaining:
+            continue
+        if any(
+            len(keywords[index] & keywords[chosen])
+            > REDUNDANCY_THRESHOLD * max(1, len(keywords[index] | keywords[chosen]))
+            for chosen in selected
+        ):
+            continue
+        selected.append(index)
+        remaining -= cost + 1  # Spacja łącząca zdania
+    if not selected:
+        # Nawet najlepsze zdanie przekracza budżet - skracamy je
+        return _truncate(sentences[max(range(len(sentences)), key=score)], budget)
+    return " ".join(sentences[index] for index in sorted(selected))
+
+
+def _split_budget(lengths: Sequence[int], budget: int) -> List[int]:
+    """
+    Dzieli budżet między pola: krótkie pola zachowują pełną długość,
+    a niewykorzystana część przypada pozostałym (water-filling).
+    """
+    shares = [0] * len(lengths)
+    pending = sorted(range(len(lengths)), key=lambda index: lengths[index])
+    left = budget
+    while pending:
+        share = left // len(pending)
+        index = pending.pop(0)
+        shares[index] = min(lengths[index], share)
+        left -= shares[index]
+    return shares
+
+
+# ============================================================================
+# KOMPAKTOWANIE LISTY ANALIZ
+# ============================================================================
+
+
+@dataclass
+class CompactionReport:
+    """
+    Podsumowanie kompaktowania kontekstu jednego uruchomienia.
+
+    Atrybuty:
+        companies: Liczba firm w analizie
+        budget: Budżet tokenów wszystkich firm
+        tokens_before: Tokeny kontekstu przed kompaktowaniem
+        tokens_after: Tokeny kontekstu po kompaktowaniu
+    """
+
+    companies: int
+    budget: int
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    @property
+    def ratio(self) -> float:
+        """Udział zaoszczędzonych tokenów (0-1)."""
+        return self.tokens_saved / self.tokens_before if self.tokens_before else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {**asdict(self), "tokens_saved": self.tokens_saved, "ratio": round(self.ratio, 4)}
+
+    def summary(self) -> str:
+        return (
+            f"Kompaktowanie analiz ({self.companies} firm): {self.tokens_before} -> "
+            f"{self.tokens_after} tokenów (oszczędność {self.tokens_saved}, {self.ratio:.0%})"
+        )
+
+
+def context_json(entries: Sequence[BaseModel]) -> str:
+    """Zwięzły JSON analiz dla kolejnego etapu - bez pól technicznych i wartości pustych."""
+    research = [entry.model_dump(exclude={"from_cache"}, exclude_none=True) for entry in entries]
+    return json.dumps(
+        {"research_list": research},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def compact_research(
+    entries: Sequence[BaseModel],
+    budget: int,
+) -> Tuple[List[BaseModel], CompactionReport]:
+    """
+    Skraca analizy firm (TrendingCompanyResearch) do łącznego budżetu tokenów.
+
+    Args:
+        entries: Analizy firm
+        budget: Budżet tokenów pól COMPACTED_FIELDS wszystkich firm
+
+    Returns:
+        (skrócone kopie analiz, raport z liczbą tokenów przed i po)
+    """
+    before = count_tokens(context_json(entries))
+    company_budget = max(MIN_COMPANY_TOKENS, budget // max(1, len(entries)))
+    compacted: List[BaseModel] = []
+    for entry in entries:
+        texts = [str(getattr(entry, name) or "") for name in COMPACTED_FIELDS]
+        shares = _split_budget([count_tokens(text) for text in texts], company_budget)
+        compacted.append(
+            entry.model_copy(
+                update={
+                    name: summarize(text, share)
+                    for name, text, share in zip(COMPACTED_FIELDS, texts, shares)
+                }
+            )
+        )
+    report = CompactionReport(
+        companies=len(entries),
+        budget=budget,
+        tokens_before=before,
+        tokens_after=count_tokens(context_json(compacted)),
+    )
+    return compacted, report
+
+
+def token_budget() -> int:
+    """Budżet kompaktowania ze zmiennej COMPACTION_TOKEN_BUDGET (0 - wyłączone)."""
+    return int(os.getenv("COMPACTION_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
@@ -13,17 +13,44 @@ Kluczowe komponenty:
 - Pamięć: System pamięci krótko- i długoterminowej dla agentów
 """
 
-from typing import List
+import copy
+import hashlib
+import os
+import shutil
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, TypeVar, Union
 
 from crewai import Agent, Crew, Process, Task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from crewai.memory import EntityMemory, LongTermMemory, ShortTermMemory
 from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
 from crewai.memory.storage.rag_storage import RAGStorage
-from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool
-from pydantic import BaseModel, Field
+from crewai.crews.crew_output import CrewOutput
+from crewai.events.event_listener import event_listener
+from crewai.project import CrewBase, agent, before_kickoff, crew, task
+from crewai.project.utils import cache as memoize_cache
+from crewai.tasks.output_format import OutputFormat
+from crewai.tasks.task_output import TaskOutput
+from pydantic import BaseModel, Field, ValidationError
+import yaml
 
+from .checkpoints import CheckpointStore, new_run_id
+from .compaction import CompactionReport, compact_research, context_json, token_budget
+from .embeddings import memory_collection_tag, memory_embedder_config
+from .fanout import DEFAULT_ITEM_TIMEOUT, DEFAULT_MAX_WORKERS, fan_out_iter
+from .llm_cache import CachingLLM, LLMResponseStore, wrap_llm
+from .rate_governor import govern_llm
+from .registry import CompanyRegistry, detect_pick, normalize_name
+from .research_store import ResearchStore, company_key
+from .run_history import RunHistory
+from .streaming import JsonlSink, stream_path
+from .symbols import shared_symbol_index
+from .knowledge import shared_knowledge_index
+from .tools.cached_search_tool import CachedSerperDevTool, SearchCache
+from .tools.knowledge_tool import KnowledgeSearchTool
+from .tools.market_data_tool import MarketDataTool, shared_market_data
 from .tools.push_tool import PushNotificationTool
 
 # ============================================================================
@@ -81,6 +108,13 @@ class TrendingCompanyResearch(BaseModel):
     investment_potential: str = Field(
         description="Potencjał inwestycyjny i odpowiedniość dla inwestycji"
     )
+    ticker: Optional[str] = Field(
+        default=None, description="Symbol giełdowy firmy (np. AAPL, MSFT)"
+    )
+    from_cache: bool = Field(
+        default=False,
+        description="Czy analiza pochodzi z wcześniejszego uruchomienia (ustawia system, nie agent)",
+    )
 
 
 class TrendingCompanyResearchList(BaseModel):
@@ -96,6 +130,178 @@ class TrendingCompanyResearchList(BaseModel):
     )
 
 
+# ============================================================================
+# WYNIKI ZADAŃ
+# ============================================================================
+# CrewAI 1.5 nie konwertuje wyniku zadania z guardrailem przed wywołaniem
+# guardraila (output.pydantic jest None przy pierwszej próbie), a wynik
+# zapisany w checkpoincie lub ustawiony ręcznie też może być tylko tekstem.
+# Dlatego ustrukturyzowany wynik jest zawsze walidowany z output.raw.
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def parse_output(output: TaskOutput, model: Type[Model]) -> Model:
+    """
+    Zwraca wynik zadania jako model Pydantic (z output.pydantic lub output.raw).
+
+    JSON może być otoczony tekstem lub blokiem markdown (```json) -
+    walidowany jest fragment od pierwszego "{" do ostatniego "}".
+
+    Raises:
+        ValidationError: Jeśli wynik nie jest zgodny ze schematem
+    """
+    if isinstance(output.pydantic, model):
+        return output.pydantic
+    raw = output.raw or ""
+    start, end = raw.find("{"), raw.rfind("}")
+    return model.model_validate_json(raw[start:end + 1] if 0 <= start < end else raw)
+
+
+def typed_output(output: Optional[TaskOutput], model: Type[Model]) -> Optional[Model]:
+    """Jak parse_output, ale zwraca None dla brakującego lub niezgodnego wyniku."""
+    if output is None:
+        return None
+    try:
+        return parse_output(output, model)
+    except ValidationError:
+        return None
+
+
+# Nagłówek dopisywany do opisu zadania analizy, gdy część firm ma świeżą
+# analizę w magazynie (patrz _note_cached_research)
+CACHED_RESEARCH_NOTE = "\n\nFirmy z aktualną analizą z wcześniejszych uruchomień"
+
+# Dostępne tryby wykonania załogi (patrz AiAgentsCrewStockPicker.execution_mode)
+EXECUTION_MODES = ("hierarchical", "pipeline")
+
+
+# ============================================================================
+# MAGAZYNY PAMIĘCI
+# ============================================================================
+
+
+@lru_cache(maxsize=None)
+def shared_memory_storages() -> Tuple[LTMSQLiteStorage, RAGStorage, RAGStorage]:
+    """
+    Zwraca magazyny pamięci (długo-, krótkoterminowej i encji) otwarte raz na proces.
+
+    Otwarcie bazy SQLite i kolekcji ChromaDB zajmuje sekundy. Współdzielenie
+    magazynów pozwala długo działającemu procesowi (tryb usługi, tryb wsadowy)
+    ponosić ten koszt tylko raz. Każda załoga tworzy własne obiekty pamięci
+    wokół tych magazynów, więc równoległe uruchomienia nie dzielą stanu
+    wykonania (bieżącego agenta i zadania).
+    """
+    return memory_storages("./memory/long_term_mem_store.db")
+
+
+def memory_storages(
+    long_term_path: str, collection_suffix: str = ""
+) -> Tuple[LTMSQLiteStorage, RAGStorage, RAGStorage]:
+    """
+    Tworzy magazyny pamięci załogi.
+
+    Kolekcje ChromaDB są nazywane według embeddera (memory_collection_tag) -
+    zmiana MEMORY_EMBEDDER nie trafia w kolekcje o innym wymiarze wektorów.
+
+    Args:
+        long_term_path: Ścieżka do bazy pamięci długoterminowej
+        collection_suffix: Przyrostek nazw kolekcji ChromaDB - RAGStorage
+            ignoruje path, więc osobna pamięć wymaga osobnych kolekcji
+    """
+    collections = f"{memory_collection_tag()}{collection_suffix}"
+    # ========================================================================
+    # KONFIGURACJA PAMIĘCI DŁUGOTERMINOWEJ
+    # ========================================================================
+    # Pamięć długoterminowa przechowuje ważne informacje w bazie SQLite.
+    # Używana do przechowywania kluczowych decyzji i rekomendacji.
+    long_term_storage = LTMSQLiteStorage(db_path=long_term_path)
+
+    # ========================================================================
+    # KONFIGURACJA PAMIĘCI KRÓTKOTERMINOWEJ
+    # ========================================================================
+    # Pamięć krótkoterminowa przechowuje ostatnie interakcje w ChromaDB.
+    # Używa embeddings do wyszukiwania podobnych kontekstów.
+    # Embeddingi przechodzą przez cache na dysku (identyczne teksty nie są
+    # embeddowane ponownie); embedder wybiera zmienna MEMORY_EMBEDDER
+    # (openai, hashing lub sentence-transformers - dwa ostatnie lokalne).
+    short_term_storage = RAGStorage(
+        embedder_config=memory_embedder_config(),
+        type=f"short_term_{collections}",
+        path="./memory",  # Ścieżka do przechowywania danych ChromaDB
+    )
+
+    # ========================================================================
+    # KONFIGURACJA PAMIĘCI ENCJI
+    # ========================================================================
+    # Pamięć encji przechowuje informacje o konkretnych rzeczach
+    # (firmy, osoby, miejsca) w ChromaDB.
+    # Umożliwia agentom zapamiętywanie szczegółów o konkretnych firmach.
+    # Osobna kolekcja ("entities") - wyszukiwanie encji nie przeszukuje
+    # indeksu pamięci krótkoterminowej i odwrotnie.
+    entity_storage = RAGStorage(
+        embedder_config=memory_embedder_config(),
+        type=f"entities_{collections}",  # Własna kolekcja ChromaDB dla encji
+        path="./memory",  # Ścieżka do przechowywania danych ChromaDB
+    )
+    return long_term_storage, short_term_storage, entity_storage
+
+
+# ============================================================================
+# KONFIGURACJA YAML I ZWALNIANIE INSTANCJI
+# ============================================================================
+
+
+@lru_cache(maxsize=None)
+def _parsed_yaml(path: str, modified: float) -> Dict[str, Any]:
+    """Sparsowany plik YAML (klucz obejmuje czas modyfikacji - zmiana pliku unieważnia wpis)."""
+    with open(path, encoding="utf-8") as file:
+        content = yaml.safe_load(file)
+    return content if isinstance(content, dict) else {}
+
+
+def load_crew_yaml(config_path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Wczytuje agents.yaml / tasks.yaml, parsując każdy plik raz na proces.
+
+    CrewBase wczytuje konfigurację przy tworzeniu każdej instancji załogi,
+    a tryb usługi tworzy instancję na każde zlecenie. Instancja dostaje
+    kopię - CrewBase podmienia w niej nazwy agentów i narzędzi na obiekty.
+
+    Raises:
+        FileNotFoundError: Jeśli plik nie istnieje (CrewBase przyjmuje wtedy
+            pustą konfigurację)
+    """
+    path = str(config_path)
+    return copy.deepcopy(_parsed_yaml(path, os.path.getmtime(path)))
+
+
+def release_memoized(instance: Any) -> int:
+    """
+    Usuwa z cache CrewAI agentów i zadania zapamiętane dla instancji załogi.
+
+    Metody @agent i @task są memoizowane w jednym globalnym CacheHandler,
+    z kluczem zawierającym id(instance). Zapamiętane obiekty trzymają metody
+    związane z instancją (guardraile, callbacki), więc bez tego instancja -
+    z agentami, LLM i połączeniami - żyje do końca procesu. Z tego samego
+    powodu usuwane są zakończone zadania z execution_spans globalnego
+    EventListener CrewAI (wpis zakończonego zadania ma wartość None i nigdy
+    nie jest usuwany).
+
+    Returns:
+        Liczba usuniętych wpisów cache
+    """
+    marker = str(("__instance__", id(instance)))
+    with memoize_cache._lock.w_locked():
+        stale = [key for key in memoize_cache._cache if marker in key]
+        for key in stale:
+            del memoize_cache._cache[key]
+    spans = event_listener.execution_spans
+    for finished in [span_task for span_task, span in list(spans.items()) if span is None]:
+        spans.pop(finished, None)
+    return len(stale)
+
+
 # ============================================================================
 # GŁÓWNA KLASA ZAŁOGI
 # ============================================================================
@@ -112,13 +318,33 @@ class AiAgentsCrewStockPicker:
     Ta klasa definiuje strukturę całego systemu multi-agentowego:
     - Agenci: Specjalizowani agenci do różnych zadań
     - Zadania: Definicje zadań wykonywanych przez agentów
-    - Proces: Hierarchiczny proces z managerem LLM
+    - Proces: Hierarchiczny proces z managerem LLM lub potok bez managera
     - Pamięć: System pamięci dla agentów
     """
 
     agents: List[BaseAgent]
     tasks: List[Task]
 
+    # Katalog, do którego zadania zapisują pliki wynikowe (output_file).
+    # Można go nadpisać na instancji przed wywołaniem crew(), aby równoległe
+    # uruchomienia (np. tryb wsadowy) nie nadpisywały sobie nawzajem wyników.
+    output_dir: str = "output"
+
+    # Tryb wykonania załogi:
+    # - "hierarchical": manager LLM deleguje zadania (domyślny, jak dotychczas)
+    # - "pipeline": zadania wykonywane według grafu zależności z tasks.yaml
+    #   (context:), bez managera - oszczędza rundy LLM na delegowanie
+    # Domyślną wartość można zmienić zmienną środowiskową CREW_EXECUTION_MODE.
+    execution_mode: str = os.getenv("CREW_EXECUTION_MODE", "hierarchical")
+
+    # Identyfikator uruchomienia, pod którym zapisywane są checkpointy etapów.
+    # Nadawany przy pierwszym uruchomieniu; resume() ustawia ID wznawianego.
+    run_id: Optional[str] = None
+
+    # Raport kompaktowania analiz przed wyborem firmy (liczba tokenów przed
+    # i po) - ustawiany po etapie research_trending_companies
+    compaction_report: Optional[CompactionReport] = None
+
     # ========================================================================
     # DEFINICJE AGENTÓW
     # ========================================================================
@@ -131,7 +357,9 @@ class AiAgentsCrewStockPicker:
         Agent odpowiedzialny za wyszukiwanie firm w trendzie w wiadomościach.
 
         Narzędzia:
-            - SerperDevTool: Narzędzie do wyszukiwania w internecie
+            - CachedSerperDevTool: Wyszukiwanie w internecie (Serper z cache)
+            - KnowledgeSearchTool: Baza wiedzy z katalogu knowledge/
+              (podzbiory z klucza "knowledge_subsets" w agents.yaml)
 
         Pamięć:
             - Włączona: Agent pamięta wcześniej znalezione firmy,
@@ -139,7 +367,8 @@ class AiAgentsCrewStockPicker:
         """
         return Agent(
             config=self.agents_config["trending_company_finder"],
-            tools=[SerperDevTool()],
+            llm=self._llm("trending_company_finder"),
+            tools=[self._search_tool(), *self._knowledge_tools("trending_company_finder")],
             memory=True,  # Włączona pamięć, aby unikać duplikatów
         )
 
@@ -149,7 +378,11 @@ class AiAgentsCrewStockPicker:
         Agent odpowiedzialny za szczegółową analizę finansową firm.
 
         Narzędzia:
-            - SerperDevTool: Narzędzie do wyszukiwania informacji finansowych
+            - CachedSerperDevTool: Wyszukiwanie informacji finansowych
+              (to samo narzędzie co u trending_company_finder)
+            - MarketDataTool: Wskaźniki ilościowe z lokalnych danych
+              rynkowych (jeśli katalog MARKET_DATA_DIR zawiera dane)
+            - KnowledgeSearchTool: Baza wiedzy z katalogu knowledge/
 
         Pamięć:
             - Wyłączona: Agent wykonuje czystą analizę danych dostarczonych
@@ -157,7 +390,12 @@ class AiAgentsCrewStockPicker:
         """
         return Agent(
             config=self.agents_config["financial_researcher"],
-            tools=[SerperDevTool()],
+            llm=self._llm("financial_researcher"),
+            tools=[
+                self._search_tool(),
+                *self._market_data_tools(),
+                *self._knowledge_tools("financial_researcher"),
+            ],
             # Pamięć wyłączona - agent wykonuje analizę na podstawie kontekstu
         )
 
@@ -169,6 +407,10 @@ class AiAgentsCrewStockPicker:
         Narzędzia:
             - PushNotificationTool: Niestandardowe narzędzie do wysyłania
               powiadomień push do użytkownika
+            - MarketDataTool: Porównanie kandydatów na lokalnych danych
+              rynkowych (jeśli katalog MARKET_DATA_DIR zawiera dane)
+            - KnowledgeSearchTool: Profil inwestora i listy obserwowanych
+              spółek z katalogu knowledge/
 
         Pamięć:
             - Włączona: Agent pamięta wcześniejsze rekomendacje,
@@ -176,7 +418,12 @@ class AiAgentsCrewStockPicker:
         """
         return Agent(
             config=self.agents_config["stock_picker"],
-            tools=[PushNotificationTool()],
+            llm=self._llm("stock_picker"),
+            tools=[
+                PushNotificationTool(),
+                *self._market_data_tools(),
+                *self._knowledge_tools("stock_picker"),
+            ],
             memory=True,  # Włączona pamięć, aby unikać powtórzeń
         )
 
@@ -197,10 +444,17 @@ class AiAgentsCrewStockPicker:
 
         To zadanie wymusza zwrócenie danych w formacie JSON zgodnym
         ze schematem Pydantic, co zapewnia stabilność transferu danych.
+
+        Guardrail weryfikuje firmy w indeksie symboli giełdowych (firmy
+        nienotowane są usuwane, tickery i nazwy poprawiane) i sprawdza je
+        w rejestrze firm: firmy już wybrane lub niedawno analizowane są
+        usuwane przed kosztowną analizą.
         """
         return Task(
             config=self.tasks_config["find_trending_companies"],
             output_pydantic=TrendingCompanyList,  # Wymusza ustrukturyzowane wyjście
+            guardrail=self._registry_guardrail,  # Odrzuca firmy nienotowane i już omówione
+            callback=self._checkpoint_task,  # Zapisuje wynik jako checkpoint
         )
 
     @task
@@ -214,10 +468,15 @@ class AiAgentsCrewStockPicker:
 
         To zadanie otrzymuje wyniki z poprzedniego zadania jako kontekst
         i generuje szczegółową analizę każdej firmy.
+
+        Firmy ze świeżą analizą z wcześniejszych uruchomień są pomijane,
+        a ich analizy dołączane z magazynu (oznaczone from_cache=True).
         """
         return Task(
             config=self.tasks_config["research_trending_companies"],
             output_pydantic=TrendingCompanyResearchList,  # Wymusza ustrukturyzowane wyjście
+            guardrail=self._research_guardrail,  # Dołącza analizy z magazynu
+            callback=self._after_research,  # Checkpoint i kompaktowanie analiz
         )
 
     @task
@@ -231,11 +490,18 @@ class AiAgentsCrewStockPicker:
 
         To zadanie analizuje wszystkie analizy i wybiera najlepszą firmę,
         wysyłając powiadomienie push do użytkownika.
+
+        Zamiast pełnych analiz kontekstem jest ich skrócona wersja mieszcząca
+        się w budżecie tokenów (COMPACTION_TOKEN_BUDGET, 0 wyłącza skracanie).
         """
-        return Task(
+        pick = Task(
             config=self.tasks_config["pick_best_company"],
             # Brak output_pydantic - zwraca tekstowy raport markdown
+            callback=self._record_pick,  # Checkpoint i zapis wybranej firmy w rejestrze
         )
+        if token_budget() > 0:
+            pick.context = [self._compacted_research()]
+        return pick
 
     # ========================================================================
     # KONFIGURACJA ZAŁOGI
@@ -250,7 +516,11 @@ class AiAgentsCrewStockPicker:
         """
         Tworzy i konfiguruje główną załogę agentów.
 
-        Proces hierarchiczny:
+        Tryb "pipeline" (bez managera):
+            - Zadania wykonywane w kolejności wynikającej z context w tasks.yaml
+            - Brak dodatkowych rund LLM na delegowanie zadań
+
+        Proces hierarchiczny (tryb "hierarchical"):
             - Manager LLM autonomicznie decyduje o kolejności zadań
             - Manager deleguje zadania do odpowiednich agentów
             - Proces jest bardziej elastyczny niż sekwencyjny
@@ -261,58 +531,44 @@ class AiAgentsCrewStockPicker:
             - Entity: RAG (ChromaDB) - przechowuje informacje o konkretnych encjach
         """
 
-        # ====================================================================
-        # MANAGER AGENT
-        # ====================================================================
-        # Manager to specjalny agent LLM, który koordynuje pracę załogi.
-        # allow_delegation=True umożliwia managerowi delegowanie zadań
-        # do innych agentów w sposób autonomiczny.
-        manager = Agent(
-            config=self.agents_config["manager"],
-            allow_delegation=True,  # Manager może delegować zadania
-        )
+        if self.execution_mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"Nieznany tryb wykonania: {self.execution_mode} "
+                f"(dostępne: {', '.join(EXECUTION_MODES)})"
+            )
 
         # ====================================================================
-        # KONFIGURACJA PAMIĘCI DŁUGOTERMINOWEJ
+        # KATALOG WYJŚCIOWY
         # ====================================================================
-        # Pamięć długoterminowa przechowuje ważne informacje w bazie SQLite.
-        # Używana do przechowywania kluczowych decyzji i rekomendacji.
-        long_term_memory = LongTermMemory(
-            storage=LTMSQLiteStorage(db_path="./memory/long_term_mem_store.db")
-        )
+        # Ścieżki output_file z tasks.yaml wskazują na wspólny katalog output/.
+        # Przekierowujemy je do katalogu tej instancji, zachowując nazwy plików.
+        self._redirect_output_files(self.tasks)
 
         # ====================================================================
-        # KONFIGURACJA PAMIĘCI KRÓTKOTERMINOWEJ
+        # TRYB POTOKU (BEZ MANAGERA)
         # ====================================================================
-        # Pamięć krótkoterminowa przechowuje ostatnie interakcje w ChromaDB.
-        # Używa embeddings do wyszukiwania podobnych kontekstów.
-        # Wymaga modelu embeddings (np. text-embedding-3-small).
-        short_term_memory = ShortTermMemory(
-            storage=RAGStorage(
-                embedder_config={
-                    "provider": "openai",
-                    "model": "text-embedding-3-small",  # Model do generowania embeddings
-                },
-                type="short_term",
-                path="./memory",  # Ścieżka do przechowywania danych ChromaDB
+        # Graf zadań jest już zdefiniowany przez context: w tasks.yaml, więc
+        # manager nie musi o nim decydować. Proces sekwencyjny wykonuje zadania
+        # w kolejności topologicznej i przekazuje wyniki zgodnie z context.
+        if self.execution_mode == "pipeline":
+            return Crew(
+                agents=self.agents,
+                tasks=self._ordered_tasks(self.tasks),
+                process=Process.sequential,  # Bez managera - brak rund delegowania
+                verbose=True,
+                **self._memory(),
             )
-        )
 
         # ====================================================================
-        # KONFIGURACJA PAMIĘCI ENCJI
+        # MANAGER AGENT
         # ====================================================================
-        # Pamięć encji przechowuje informacje o konkretnych rzeczach
-        # (firmy, osoby, miejsca) w ChromaDB.
-        # Umożliwia agentom zapamiętywanie szczegółów o konkretnych firmach.
-        entity_memory = EntityMemory(
-            storage=RAGStorage(
-                embedder_config={
-                    "provider": "openai",
-                    "model": "text-embedding-3-small",  # Model do generowania embeddings
-                },
-                type="short_term",  # Typ magazynu (może być również "entity")
-                path="./memory",  # Ścieżka do przechowywania danych ChromaDB
-            )
+        # Manager to specjalny agent LLM, który koordynuje pracę załogi.
+        # allow_delegation=True umożliwia managerowi delegowanie zadań
+        # do innych agentów w sposób autonomiczny.
+        manager = Agent(
+            config=self.agents_config["manager"],
+            llm=self._llm("manager"),
+            allow_delegation=True,  # Manager może delegować zadania
         )
 
         # ====================================================================
@@ -326,8 +582,822 @@ class AiAgentsCrewStockPicker:
             process=Process.hierarchical,  # Proces hierarchiczny z managerem
             verbose=True,  # Szczegółowe logi podczas działania
             manager_agent=manager,  # Agent zarządzający (delegujący zadania)
-            memory=True,  # Włącza system pamięci dla załogi
-            long_term_memory=long_term_memory,  # Pamięć długoterminowa
-            short_term_memory=short_term_memory,  # Pamięć krótkoterminowa
-            entity_memory=entity_memory,  # Pamięć encji
+            **self._memory(),  # System pamięci (długo-, krótkoterminowa i encji)
         )
+
+    def _memory(self) -> Dict[str, Any]:
+        """
+        Zwraca konfigurację pamięci załogi jako argumenty dla Crew.
+
+        Obiekty pamięci są tworzone raz na instancję, dzięki czemu wszystkie
+        załogi budowane z tej instancji (także etapy trybu fan-out)
+        korzystają z tych samych obiektów. Magazyny pod spodem (SQLite,
+        ChromaDB) są współdzielone w całym procesie - patrz shared_memory_storages().
+        """
+        if getattr(self, "_memory_kwargs", None) is not None:
+            return self._memory_kwargs
+
+        long_term_storage, short_term_storage, entity_storage = (
+            getattr(self, "_memory_storages", None) or shared_memory_storages()
+        )
+        self._memory_kwargs = {
+            "memory": True,  # Włącza system pamięci dla załogi
+            "long_term_memory": LongTermMemory(storage=long_term_storage),
+            "short_term_memory": ShortTermMemory(storage=short_term_storage),
+            "entity_memory": EntityMemory(storage=entity_storage),
+        }
+        return self._memory_kwargs
+
+    @staticmethod
+    def _ordered_tasks(tasks: List[Task]) -> List[Task]:
+        """
+        Sortuje zadania topologicznie według zależności context.
+
+        Kolejność z definicji klasy jest zachowywana wszędzie tam, gdzie
+        zależności na to pozwalają - zadanie trafia na listę dopiero po
+        wszystkich zadaniach, z których wyników korzysta.
+
+        Raises:
+            ValueError: Jeśli zależności między zadaniami tworzą cykl
+        """
+        ordered: List[Task] = []
+        remaining = list(tasks)
+        known = {id(candidate) for candidate in tasks}
+        while remaining:
+            done = {id(candidate) for candidate in ordered}
+            ready = next(
+                (
+                    candidate
+                    for candidate in remaining
+                    # context może być wartością "nie podano" zamiast listy
+                    if all(
+                        id(dependency) in done or id(dependency) not in known
+                        for dependency in (
+                            candidate.context
+                            if isinstance(candidate.context, list)
+                            else []
+                        )
+                    )
+                ),
+                None,
+            )
+            if ready is None:
+                raise ValueError("Zależności context między zadaniami tworzą cykl")
+            ordered.append(ready)
+            remaining = [candidate for candidate in remaining if candidate is not ready]
+        return ordered
+
+    # ========================================================================
+    # REJESTR FIRM (DEDUPLIKACJA MIĘDZY URUCHOMIENIAMI)
+    # ========================================================================
+
+    def _registry(self) -> CompanyRegistry:
+        """Zwraca rejestr firm tej instancji (tworzony przy pierwszym użyciu)."""
+        if getattr(self, "_company_registry", None) is None:
+            self._company_registry = CompanyRegistry.from_env()
+        return self._company_registry
+
+    def _registry_guardrail(self, output: TaskOutput) -> Tuple[bool, Any]:
+        """
+        Guardrail zadania find_trending_companies.
+
+        Usuwa z listy firmy nienotowane na giełdzie (indeks symboli) oraz
+        firmy już wybrane lub niedawno analizowane, zanim trafią do
+        kosztownego etapu analizy. Jeśli nie zostaje żadna firma albo wynik
+        nie jest zgodny ze schematem, zadanie jest odrzucane z informacją
+        zwrotną - agent poprawia wynik lub szuka zamienników.
+
+        Zwracany jest zawsze JSON listy - CrewAI konwertuje go wtedy
+        na output.pydantic (wynik zwrócony jako TaskOutput nie jest konwertowany).
+        """
+        try:
+            companies = parse_output(output, TrendingCompanyList)
+        except ValidationError as e:
+            return False, (
+                "Wynik musi być poprawnym JSON-em zgodnym ze schematem listy firm "
+                f"(companies: name, ticker, reason). Błędy: {e}"
+            )
+
+        listed, unlisted = self._validate_symbols(companies.companies)
+        if unlisted and not listed:
+            unlisted_names = ", ".join(f"{c.name} ({c.ticker})" for c in unlisted)
+            return False, (
+                f"Nie znaleziono tych firm na giełdzie: {unlisted_names}. "
+                "Znajdź firmy notowane na giełdzie i podaj ich poprawne tickery."
+            )
+        if unlisted:
+            print(f"Pominięto firmy nienotowane: {', '.join(c.name for c in unlisted)}")
+
+        registry = self._registry()
+        new, covered = registry.split_new(listed)
+        if covered and not new:
+            covered_names = ", ".join(company.name for company in covered)
+            return False, (
+                f"Wszystkie znalezione firmy zostały już omówione: {covered_names}. "
+                "Znajdź inne firmy w trendzie, których nie ma na tej liście."
+            )
+        if covered:
+            print(f"Pominięto firmy już omówione: {', '.join(c.name for c in covered)}")
+        registry.mark_seen(new)
+        self._note_cached_research(new)
+        return True, TrendingCompanyList(companies=new).model_dump_json()
+
+    def _validate_symbols(self, companies: List[TrendingCompany]) -> Tuple[List, List]:
+        """
+        Rozwiązuje firmy w lokalnym indeksie symboli (symbols.py).
+
+        Returns:
+            (firmy notowane z tickerem i nazwą z listingu, firmy nienotowane);
+            bez pliku listingu wszystkie firmy są przepuszczane bez zmian
+        """
+        index = shared_symbol_index()
+        if not index.available:
+            return list(companies), []
+        return index.validate(companies)
+
+    # ========================================================================
+    # PONOWNE UŻYCIE ANALIZ (MAGAZYN WYNIKÓW)
+    # ========================================================================
+
+    @before_kickoff
+    def _remember_inputs(self, inputs: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Zapamiętuje dane wejściowe - guardraile potrzebują sektora uruchomienia,
+        a manifest checkpointów pozwala później wznowić uruchomienie.
+        Rozpoczyna też pomiar czasu uruchomienia i etapów (historia uruchomień).
+        """
+        self._run_inputs = dict(inputs or {})
+        self._run_started = self._stage_finished = time.time()
+        self._stage_seconds: Dict[str, float] = {}
+        self._research_streamed = False
+        self._checkpoints().start(
+            self._ensure_run_id(), self._run_inputs, self.execution_mode, self.output_dir
+        )
+        return inputs
+
+    def _sector(self) -> str:
+        return str(getattr(self, "_run_inputs", {}).get("sector", ""))
+
+    def use_isolated_state(self, directory: str, fresh: bool = False) -> None:
+        """
+        Kieruje rejestr firm, magazyn analiz, historię uruchomień, cache
+        wyszukiwania i odpowiedzi LLM oraz pamięć tej instancji do osobnego
+        katalogu.
+
+        Używane przy pomiarach (np. porównanie trybów), w których uruchomienie
+        nie może korzystać z analiz, wyborów, trafień w cache ani wspomnień
+        poprzednich uruchomień. Kolekcje ChromaDB pamięci są nazywane według
+        katalogu (RAGStorage nie przyjmuje własnej ścieżki).
+
+        Args:
+            directory: Katalog stanu instancji
+            fresh: Usuwa wcześniejszy stan z katalogu i z kolekcji pamięci
+        """
+        state = Path(directory)
+        if fresh:
+            shutil.rmtree(state, ignore_errors=True)
+        state.mkdir(parents=True, exist_ok=True)
+        self._company_registry = CompanyRegistry(path=str(state / "company_registry.db"))
+        self._research_results = ResearchStore(path=str(state / "research_store.db"))
+        self._run_history = RunHistory(path=str(state / "run_history.db"))
+
+        # Agenci (a z nimi narzędzie wyszukiwania i LLM) powstają już
+        # w konstruktorze - podmieniamy magazyny cache w istniejących obiektach.
+        self._search_cache = SearchCache(path=str(state / "search_cache.db"))
+        search_tool = self._search_tool()
+        if isinstance(search_tool, CachedSerperDevTool):
+            search_tool.cache = self._search_cache
+        self._llm_store = LLMResponseStore(path=str(state / "llm_cache.db"))
+        members = (self.trending_company_finder(), self.financial_researcher(), self.stock_picker())
+        for member in members:
+            if isinstance(member.llm, CachingLLM):
+                member.llm.store = self._llm_store
+
+        suffix = "_" + hashlib.sha1(str(state.resolve()).encode("utf-8")).hexdigest()[:10]
+        self._memory_storages = memory_storages(str(state / "long_term_mem_store.db"), suffix)
+        if fresh:
+            for storage in self._memory_storages[1:]:
+                storage.reset()
+        self._memory_kwargs = None
+
+    def close(self) -> None:
+        """
+        Zwalnia zasoby instancji po zakończonym uruchomieniu.
+
+        Usuwa agentów i zadania tej instancji z cache CrewAI (release_memoized)
+        i zamyka połączenia SQLite rejestru firm, magazynu analiz, historii
+        i cache instancji.
+        Wymagane w długo działających procesach (tryb usługi), które tworzą
+        instancję na każde zlecenie; instancja nie nadaje się potem do użycia.
+        """
+        release_memoized(self)
+        stores = (
+            "_company_registry", "_research_results", "_run_history", "_search_cache", "_llm_store"
+        )
+        for name in stores:
+            store = self.__dict__.pop(name, None)
+            if store is not None:
+                store.close()
+        for name in ("agents", "tasks"):
+            self.__dict__.pop(name, None)
+
+    def _research_store(self) -> ResearchStore:
+        """Zwraca magazyn analiz tej instancji (tworzony przy pierwszym użyciu)."""
+        if getattr(self, "_research_results", None) is None:
+            self._research_results = ResearchStore.from_env()
+        return self._research_results
+
+    def _note_cached_research(self, companies: List[TrendingCompany]) -> None:
+        """
+        Informuje financial_researcher, których firm nie musi analizować.
+
+        Do opisu zadania research_trending_companies dopisywana jest lista firm
+        ze świeżą analizą w magazynie - guardrail zadania dołączy je później.
+        """
+        research_task = self.research_trending_companies()
+        base = research_task.description.split(CACHED_RESEARCH_NOTE)[0]
+        cached = [
+            company.name
+            for company in companies
+            if self._research_store().get_fresh(company.name, company.ticker, self._sector())
+        ]
+        research_task.description = base + (
+            f"{CACHED_RESEARCH_NOTE}: {', '.join(cached)}. "
+            "Nie analizuj tych firm - ich analizy zostaną dołączone automatycznie."
+            if cached
+            else ""
+        )
+
+    def _research_guardrail(self, output: TaskOutput) -> Tuple[bool, Any]:
+        """
+        Guardrail zadania research_trending_companies.
+
+        Zapisuje nowe analizy w magazynie i uzupełnia listę o świeże analizy
+        firm pominiętych przez financial_researcher. Wynik niezgodny ze
+        schematem jest odrzucany z informacją zwrotną; zwracany jest zawsze
+        JSON listy, aby CrewAI ustawił output.pydantic.
+        """
+        try:
+            research = parse_output(output, TrendingCompanyResearchList)
+        except ValidationError as e:
+            return False, (
+                "Wynik musi być poprawnym JSON-em zgodnym ze schematem raportu "
+                "(research_list: name, market_position, future_outlook, "
+                f"investment_potential, ticker). Błędy: {e}"
+            )
+        found = typed_output(self.find_trending_companies().output, TrendingCompanyList)
+        if found is None:
+            return True, research.model_dump_json()  # Brak listy kandydatów do scalenia
+        merged = self._merge_research(found.companies, research.research_list)
+        return True, merged.model_dump_json()
+
+    def _merge_research(
+        self,
+        candidates: List[TrendingCompany],
+        fresh: List[TrendingCompanyResearch],
+    ) -> TrendingCompanyResearchList:
+        """
+        Scala nowe analizy z analizami z magazynu w kolejności kandydatów.
+
+        Nowe analizy są zapisywane w magazynie. Dla kandydata bez nowej
+        analizy używana jest świeża analiza z magazynu (from_cache=True).
+        Nowe analizy niepasujące do żadnego kandydata trafiają na koniec listy.
+        """
+        store, sector = self._research_store(), self._sector()
+        by_key: Dict[str, TrendingCompanyResearch] = {}
+        for entry in fresh:
+            entry.from_cache = False  # Agent nie decyduje o pochodzeniu analizy
+            by_key.setdefault(company_key(entry.name, entry.ticker), entry)
+            by_key.setdefault(f"name:{normalize_name(entry.name)}", entry)
+
+        merged: List[TrendingCompanyResearch] = []
+        used = set()
+        for company in candidates:
+            entry = by_key.get(company_key(company.name, company.ticker)) or by_key.get(
+                f"name:{normalize_name(company.name)}"
+            )
+            if entry is not None and id(entry) not in used:
+                entry.ticker = entry.ticker or company.ticker
+                store.put(company.name, company.ticker, sector, entry.model_dump(exclude={"from_cache"}))
+                merged.append(entry)
+                used.add(id(entry))
+                continue
+            cached = store.get_fresh(company.name, company.ticker, sector)
+            if cached is not None:
+                merged.append(TrendingCompanyResearch(**{**cached, "from_cache": True}))
+
+        merged.extend(entry for entry in fresh if id(entry) not in used)
+        return TrendingCompanyResearchList(research_list=merged)
+
+    def _record_pick(self, output: TaskOutput) -> None:
+        """
+        Callback zadania pick_best_company - zapisuje wybór w rejestrze.
+
+        Kandydaci pochodzą z wyniku find_trending_companies (walidowanego
+        z raw - przy guardrailu output.pydantic bywa puste), a wybrana firma
+        jest odczytywana z linii "Wybrana firma: <nazwa> (<ticker>)" raportu
+        decyzji (detect_pick). Niejednoznaczny wybór nie jest zapisywany
+        w rejestrze; uruchomienie trafia do historii niezależnie od wyboru.
+        """
+        self._checkpoint_task(output)
+        found = typed_output(self.find_trending_companies().output, TrendingCompanyList)
+        if found is None:
+            return
+        picked = detect_pick(output.raw, found.companies)
+        if picked is not None:
+            self._registry().record_pick(picked)
+        else:
+            print("Nie rozpoznano jednoznacznie wybranej firmy - wybór nie trafi do rejestru")
+        self._record_history(found.companies, picked)
+
+    def _record_history(
+        self, companies: List[TrendingCompany], picked: Optional[TrendingCompany]
+    ) -> None:
+        """Dopisuje uruchomienie do historii (run_history.py) - firmy, analizy i wybór."""
+        researched = typed_output(
+            self.research_trending_companies().output, TrendingCompanyResearchList
+        )
+        research = researched.research_list if researched is not None else []
+        started = getattr(self, "_run_started", None)
+        self._history().record(
+            self._ensure_run_id(),
+            getattr(self, "_run_inputs", {}),
+            self.execution_mode,
+            companies,
+            research=research,
+            picked=picked,
+            duration=round(time.time() - started, 2) if started else None,
+            stage_seconds=getattr(self, "_stage_seconds", {}),
+        )
+
+    def _history(self) -> RunHistory:
+        """Zwraca historię uruchomień tej instancji (tworzoną przy pierwszym użyciu)."""
+        if getattr(self, "_run_history", None) is None:
+            self._run_history = RunHistory.from_env()
+        return self._run_history
+
+    def _llm(self, agent_name: str):
+        """
+        Zwraca LLM agenta objęty wspólnym limitem tempa i opakowany w cache
+        odpowiedzi, jeśli jest włączony.
+
+        Agent z "llm_cache: false" w agents.yaml zawsze korzysta
+        bezpośrednio z modelu (np. gdy jego odpowiedzi muszą być świeże).
+        Cache jest warstwą zewnętrzną - odpowiedzi z cache nie zużywają limitu.
+        """
+        config = self.agents_config[agent_name]
+        governed = govern_llm(config.get("llm"))
+        if config.get("llm_cache", True) is False:
+            return governed
+        # Tryb cache pochodzi z LLM_CACHE_MODE - agenci z YAML powstają już
+        # w konstruktorze klasy (CrewBase), przed ustawieniem atrybutów instancji.
+        return wrap_llm(governed, store=getattr(self, "_llm_store", None))
+
+    def _search_tool(self) -> CachedSerperDevTool:
+        """
+        Zwraca narzędzie wyszukiwania współdzielone przez agentów tej załogi.
+
+        Obaj agenci wyszukujący korzystają z jednej instancji (i wspólnego
+        cache na dysku), więc powtarzające się zapytania są płatne tylko raz.
+        """
+        if getattr(self, "_shared_search_tool", None) is None:
+            self._shared_search_tool = CachedSerperDevTool()
+        return self._shared_search_tool
+
+    def _market_data_tools(self) -> List[MarketDataTool]:
+        """
+        Zwraca narzędzie przesiewu danych rynkowych (lub pustą listę, gdy brak danych).
+
+        Bez plików w MARKET_DATA_DIR agenci nie dostają narzędzia, które
+        zwracałoby wyłącznie błędy. Dane są wczytywane leniwie, przy pierwszym
+        użyciu, i współdzielone przez wszystkie załogi w procesie.
+        """
+        if getattr(self, "_shared_market_data_tools", None) is None:
+            store = shared_market_data()
+            self._shared_market_data_tools = [MarketDataTool(store=store)] if store.available else []
+        return self._shared_market_data_tools
+
+    def _knowledge_tools(self, agent_name: str) -> List[KnowledgeSearchTool]:
+        """
+        Zwraca narzędzie bazy wiedzy agenta (lub pustą listę bez plików wiedzy).
+
+        Klucz "knowledge_subsets" w agents.yaml wybiera podzbiory (podkatalogi
+        knowledge/), które agent przeszukuje; bez klucza - wszystkie. Agent,
+        dla którego podzbiorów nie ma plików, nie dostaje narzędzia.
+        Indeks jest wspólny dla procesu i ładowany przy pierwszym wyszukiwaniu,
+        więc budowa załogi niczego nie embedduje.
+        """
+        index = shared_knowledge_index()
+        subsets = self.agents_config[agent_name].get("knowledge_subsets")
+        present = index.file_subsets()
+        if not present or (subsets is not None and not present & set(subsets)):
+            return []
+        return [KnowledgeSearchTool(index=index, subsets=subsets)]
+
+    def _redirect_output_files(self, tasks: List[Task]) -> None:
+        """
+        Przenosi pliki wynikowe zadań do katalogu self.output_dir.
+
+        Dla domyślnego katalogu "output" ścieżki pozostają bez zmian,
+        więc zwykłe uruchomienie zachowuje dotychczasowe zachowanie.
+        """
+        for stage_task in tasks:
+            if stage_task.output_file:
+                file_name = os.path.basename(stage_task.output_file)
+                stage_task.output_file = os.path.join(self.output_dir, file_name)
+
+    # ========================================================================
+    # TRYB FAN-OUT: RÓWNOLEGŁA ANALIZA FIRM
+    # ========================================================================
+    # Zamiast jednego zadania analizującego wszystkie firmy po kolei,
+    # każda firma z listy TrendingCompanyList jest analizowana przez osobne
+    # zadanie. Zadania działają współbieżnie w ograniczonej puli, a wyniki
+    # są scalane w TrendingCompanyResearchList przed wyborem najlepszej firmy.
+    # Każda analiza jest udostępniana zaraz po powstaniu (stream_research,
+    # plik research_stream.jsonl) - nie trzeba czekać na najwolniejszą firmę.
+
+    def kickoff_fanout(
+        self,
+        inputs: Dict[str, Any],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        company_timeout: float = DEFAULT_ITEM_TIMEOUT,
+        on_research: Optional[Callable[[TrendingCompanyResearch], None]] = None,
+    ) -> CrewOutput:
+        """
+        Uruchamia załogę z równoległą analizą każdej firmy.
+
+        Etapy:
+            1. find_trending_companies - jak w zwykłym trybie
+            2. research_single_company - osobno dla każdej firmy, współbieżnie
+            3. pick_best_company - otrzymuje scalone analizy jako kontekst
+
+        Args:
+            inputs: Dane wejściowe załogi (np. sector, region)
+            max_workers: Maksymalna liczba firm analizowanych jednocześnie
+            company_timeout: Limit czasu analizy jednej firmy w sekundach
+            on_research: Wywoływana z każdą analizą zaraz po jej powstaniu
+
+        Returns:
+            CrewOutput etapu wyboru najlepszej firmy
+
+        Raises:
+            RuntimeError: Jeśli nie udało się przeanalizować żadnej firmy
+        """
+        for entry in self.stream_research(inputs, max_workers, company_timeout):
+            if on_research is not None:
+                on_research(entry)
+
+        # Etap 3: wybór najlepszej firmy
+        return self._run_stage(self.pick_best_company(), inputs)
+
+    def stream_research(
+        self,
+        inputs: Dict[str, Any],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        company_timeout: float = DEFAULT_ITEM_TIMEOUT,
+    ) -> Iterator[TrendingCompanyResearch]:
+        """
+        Etapy 1 i 2 trybu fan-out jako generator analiz firm.
+
+        Najpierw zwracane są świeże analizy z magazynu (od razu po wyszukaniu
+        firm), a potem nowe analizy w kolejności ukończenia. Każda analiza
+        jest też dopisywana do pliku research_stream.jsonl w katalogu wyników
+        (streaming.py). Po wyczerpaniu generatora zadanie
+        research_trending_companies ma scalony wynik, a research_report.json
+        jest zapisany jak w zwykłym trybie - można przejść do wyboru firmy.
+
+        Args:
+            inputs: Dane wejściowe załogi (np. sector, region)
+            max_workers: Maksymalna liczba firm analizowanych jednocześnie
+            company_timeout: Limit czasu analizy jednej firmy w sekundach
+
+        Yields:
+            Zwalidowane analizy TrendingCompanyResearch
+
+        Raises:
+            RuntimeError: Jeśli etap wyszukiwania nie zwrócił listy firm
+                lub nie udało się przeanalizować żadnej firmy
+        """
+        find_task = self.find_trending_companies()
+        research_task = self.research_trending_companies()
+        self._redirect_output_files([find_task, research_task, self.pick_best_company()])
+        self._remember_inputs(inputs)  # Etapy to osobne załogi bez hooków CrewBase
+
+        # Etap 1: wyszukanie firm w trendzie
+        self._run_stage(find_task, inputs)
+        companies = typed_output(find_task.output, TrendingCompanyList)
+        if companies is None:
+            raise RuntimeError(
+                "Etap find_trending_companies nie zwrócił listy firm zgodnej ze schematem"
+            )
+
+        # Etap 2: równoległa analiza firm - tylko nowych lub z nieaktualną analizą
+        store, sector = self._research_store(), self._sector()
+        to_research = []
+        fresh = []
+        with self._research_sink() as sink:
+            for company in companies.companies:
+                cached = store.get_fresh(company.name, company.ticker, sector)
+                if cached is None:
+                    to_research.append(company)
+                    continue
+                entry = TrendingCompanyResearch(**{**cached, "from_cache": True})
+                sink.research(entry, "cache")
+                yield entry
+
+            results = fan_out_iter(
+                to_research,
+                lambda company: self._research_company(company, inputs),
+                max_workers=max_workers,
+                timeout=company_timeout,
+            )
+            for result in results:
+                if not result.ok:
+                    print(f"Pominięto firmę {result.item.name}: {result.error}")
+                    sink.error(result.item.name, result.item.ticker, result.error, result.duration)
+                    continue
+                result.value.ticker = result.item.ticker
+                fresh.append(result.value)
+                sink.research(result.value, "fresh", result.duration)
+                yield result.value
+
+        research_list = self._merge_research(companies.companies, fresh)
+        if not research_list.research_list:
+            raise RuntimeError("Nie udało się przeanalizować żadnej firmy")
+
+        # Scalony wynik zastępuje wyjście zadania research_trending_companies -
+        # pick_best_company odczytuje go jako kontekst, a plik raportu
+        # pozostaje zgodny ze zwykłym trybem.
+        self._research_streamed = True
+        self._complete_task(research_task, research_list)
+        self._after_research(research_task.output)
+
+    def _research_sink(self) -> JsonlSink:
+        """Plik strumienia analiz bieżącego uruchomienia (w katalogu wyników)."""
+        return JsonlSink(stream_path(self.output_dir), self._ensure_run_id())
+
+    def _run_stage(self, stage_task: Task, inputs: Dict[str, Any]) -> CrewOutput:
+        """Uruchamia pojedyncze zadanie jako jednoetapową załogę z pamięcią."""
+        return Crew(
+            agents=[stage_task.agent],
+            tasks=[stage_task],
+            process=Process.sequential,
+            verbose=True,
+            **self._memory(),
+        ).kickoff(inputs=inputs)
+
+    def _research_company(
+        self, company: TrendingCompany, inputs: Dict[str, Any]
+    ) -> TrendingCompanyResearch:
+        """
+        Analizuje jedną firmę w osobnej, jednozadaniowej załodze.
+
+        Każde wywołanie tworzy nowego agenta, ponieważ agent przechowuje
+        stan wykonania i nie może obsługiwać kilku zadań jednocześnie.
+        """
+        researcher = Agent(
+            config=self.agents_config["financial_researcher"],
+            llm=self._llm("financial_researcher"),
+            tools=[
+                self._search_tool(),
+                *self._market_data_tools(),
+                *self._knowledge_tools("financial_researcher"),
+            ],
+        )
+        research_task = Task(
+            config=self.tasks_config["research_single_company"],
+            agent=researcher,
+            output_pydantic=TrendingCompanyResearch,
+        )
+        output = Crew(
+            agents=[researcher],
+            tasks=[research_task],
+            process=Process.sequential,
+        ).kickoff(
+            inputs={
+                **inputs,
+                "company_name": company.name,
+                "company_ticker": company.ticker,
+                "company_reason": company.reason,
+            }
+        )
+        if output.pydantic is None:
+            raise ValueError(f"Brak ustrukturyzowanej analizy dla {company.name}")
+        return output.pydantic
+
+    def _complete_task(self, completed_task: Task, result: Union[BaseModel, str]) -> None:
+        """
+        Oznacza zadanie jako wykonane z podanym wynikiem.
+
+        Ustawia wyjście zadania (używane jako kontekst przez kolejne zadania)
+        i zapisuje jego output_file, tak jak zrobiłoby to CrewAI.
+        Wynik tekstowy (np. raport markdown) jest zapisywany bez zmian.
+        """
+        structured = isinstance(result, BaseModel)
+        completed_task.output = TaskOutput(
+            name=completed_task.name,
+            description=completed_task.description,
+            expected_output=completed_task.expected_output,
+            raw=result.model_dump_json() if structured else result,
+            pydantic=result if structured else None,
+            agent=completed_task.agent.role,
+            output_format=OutputFormat.PYDANTIC if structured else OutputFormat.RAW,
+        )
+        if completed_task.output_file:
+            path = Path(completed_task.output_file)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(
+                result.model_dump_json(indent=2) if structured else result, encoding="utf-8"
+            )
+
+    # ========================================================================
+    # CHECKPOINTY ETAPÓW I WZNAWIANIE
+    # ========================================================================
+    # Wynik każdego zadania jest zapisywany pod identyfikatorem uruchomienia.
+    # Gdy późniejszy etap zawiedzie (błąd LLM, limit czasu powiadomienia),
+    # resume() odtwarza ukończone etapy z checkpointów zamiast je powtarzać.
+
+    def _ensure_run_id(self) -> str:
+        if self.run_id is None:
+            self.run_id = new_run_id()
+        return self.run_id
+
+    def _checkpoints(self) -> CheckpointStore:
+        """Zwraca magazyn checkpointów tej instancji (tworzony przy pierwszym użyciu)."""
+        if getattr(self, "_checkpoint_store", None) is None:
+            self._checkpoint_store = CheckpointStore.from_env()
+        return self._checkpoint_store
+
+    def _checkpoint_task(self, output: TaskOutput) -> None:
+        """
+        Callback zadań - zapisuje zwalidowany wynik etapu jako checkpoint.
+
+        Gdy output.pydantic nie jest ustawione, wynik jest walidowany z raw
+        według output_pydantic zadania - resume() odtwarza wtedy etap jako
+        ustrukturyzowany wynik, a nie sam tekst.
+        """
+        result = output.pydantic
+        model = self._output_model(output.name)
+        if result is None and model is not None:
+            result = typed_output(output, model)
+        self._checkpoints().save_stage(self._ensure_run_id(), output.name, output.raw, result)
+        # Czas etapu liczony od końca poprzedniego (etapy odtworzone z
+        # checkpointu przy wznowieniu nie są mierzone)
+        now = time.time()
+        if hasattr(self, "_stage_seconds"):
+            self._stage_seconds[output.name] = round(now - self._stage_finished, 2)
+            self._stage_finished = now
+
+    def _stage_tasks(self) -> List[Task]:
+        """
+        Zadania etapów uruchomienia w kolejności definicji.
+
+        Metody @task są memoizowane, a self.tasks istnieje dopiero po crew() -
+        resume() i callbacki nie mogą na nim polegać.
+        """
+        return [
+            self.find_trending_companies(),
+            self.research_trending_companies(),
+            self.pick_best_company(),
+        ]
+
+    def _output_model(self, task_name: Optional[str]) -> Optional[Type[BaseModel]]:
+        """Schemat wyniku (output_pydantic) zadania o podanej nazwie."""
+        for stage_task in self._stage_tasks():
+            if stage_task.name == task_name:
+                return stage_task.output_pydantic
+        return None
+
+    def resume(self, run_id: str) -> CrewOutput:
+        """
+        Wznawia uruchomienie od pierwszego nieukończonego etapu.
+
+        Ukończone etapy są odtwarzane z checkpointów (jako wyjścia zadań,
+        więc kolejne etapy otrzymują je jako kontekst), a pozostałe zadania
+        wykonywane są sekwencyjnie według grafu context - bez managera,
+        ponieważ kolejność etapów jest już ustalona.
+
+        Args:
+            run_id: Identyfikator wznawianego uruchomienia
+
+        Returns:
+            CrewOutput ostatniego wykonanego etapu
+
+        Raises:
+            FileNotFoundError: Jeśli brak checkpointów dla run_id
+            ValueError: Jeśli wszystkie etapy zostały już ukończone
+        """
+        manifest = self._checkpoints().load(run_id)
+        self.run_id = run_id
+        self.output_dir = manifest.get("output_dir", self.output_dir)
+        inputs = manifest["inputs"]
+        self._remember_inputs(inputs)
+
+        ordered = self._ordered_tasks(self._stage_tasks())
+        self._redirect_output_files(ordered)
+        remaining: List[Task] = []
+        for stage_task in ordered:
+            saved = manifest["results"].get(stage_task.name)
+            if remaining or saved is None:
+                remaining.append(stage_task)  # Po pierwszym brakującym etapie - wszystko od nowa
+                continue
+            if saved["pydantic"] is not None and stage_task.output_pydantic is not None:
+                self._complete_task(
+                    stage_task, stage_task.output_pydantic.model_validate(saved["pydantic"])
+                )
+            else:
+                self._complete_task(stage_task, saved["raw"])
+            print(f"Odtworzono etap {stage_task.name} z checkpointu {run_id}")
+        if not remaining:
+            raise ValueError(f"Uruchomienie {run_id} zostało już ukończone")
+
+        # Guardrail wyszukiwania nie zostanie wykonany ponownie - podpowiedź
+        # o analizach z magazynu trzeba odtworzyć dla etapu analizy.
+        found = self.find_trending_companies().output
+        if found is not None and isinstance(found.pydantic, TrendingCompanyList):
+            self._note_cached_research(found.pydantic.companies)
+        # Kompaktowany kontekst wyboru powstaje w callbacku etapu analizy,
+        # który przy odtworzeniu z checkpointu nie jest wywoływany.
+        researched = self.research_trending_companies().output
+        if researched is not None:
+            self._compact_research(researched)
+
+        agents: List[BaseAgent] = []
+        for stage_task in remaining:
+            if all(stage_task.agent is not known for known in agents):
+                agents.append(stage_task.agent)
+        return Crew(
+            agents=agents,
+            tasks=remaining,
+            process=Process.sequential,
+            verbose=True,
+            **self._memory(),
+        ).kickoff(inputs=inputs)
+
+    # ========================================================================
+    # KOMPAKTOWANIE KONTEKSTU WYBORU
+    # ========================================================================
+    # Etap bez LLM między research_trending_companies a pick_best_company:
+    # analizy są skracane ekstrakcyjnie do budżetu tokenów (compaction.py),
+    # a wynik trafia do pomocniczego zadania używanego jako kontekst wyboru.
+
+    def _compacted_research(self) -> Task:
+        """Zadanie pomocnicze przechowujące skrócone analizy (nie jest wykonywane)."""
+        if getattr(self, "_compaction_task", None) is None:
+            research_task = self.research_trending_companies()
+            self._compaction_task = Task(
+                name="compact_research",
+                description="Skrócone analizy firm w trendzie (w budżecie tokenów)",
+                expected_output="Analizy firm: pozycja rynkowa, perspektywy i potencjał",
+                agent=research_task.agent,
+                context=[research_task],
+            )
+        return self._compaction_task
+
+    def _after_research(self, output: TaskOutput) -> None:
+        """
+        Callback zadania research_trending_companies - checkpoint, strumień
+        analiz i kompaktowanie.
+
+        Zwykłe zadanie zwraca wszystkie analizy w jednej odpowiedzi LLM, więc
+        trafiają one do research_stream.jsonl razem, po walidacji listy z raw
+        (w trybie fan-out zapisuje je na bieżąco stream_research).
+        """
+        self._checkpoint_task(output)
+        research = typed_output(output, TrendingCompanyResearchList)
+        if not getattr(self, "_research_streamed", False) and research is not None:
+            with self._research_sink() as sink:
+                for entry in research.research_list:
+                    sink.research(entry, "cache" if entry.from_cache else "fresh")
+        self._compact_research(output)
+
+    def _compact_research(self, output: TaskOutput) -> None:
+        """
+        Ustawia kontekst wyboru: skrócone analizy lub - gdy wynik nie jest
+        zgodny ze schematem - niezmieniony wynik etapu analizy.
+        """
+        budget = token_budget()
+        if budget <= 0:
+            return
+        compaction_task = self._compacted_research()
+        research = typed_output(output, TrendingCompanyResearchList)
+        if research is None:
+            compaction_task.output = output
+            return
+        compacted, report = compact_research(research.research_list, budget)
+        self.compaction_report = report
+        print(report.summary())
+        compaction_task.output = TaskOutput(
+            name=compaction_task.name,
+            description=compaction_task.description,
+            expected_output=compaction_task.expected_output,
+            raw=context_json(compacted),
+            pydantic=TrendingCompanyResearchList(research_list=compacted),
+            agent=compaction_task.agent.role,
+            output_format=OutputFormat.PYDANTIC,
+        )
+
+
+# CrewBase wstrzykuje load_yaml do klasy przy jej tworzeniu - podmiana po
+# dekoracji, aby kolejne instancje nie parsowały YAML od nowa
+AiAgentsCrewStockPicker.load_yaml = staticmethod(load_crew_yaml)
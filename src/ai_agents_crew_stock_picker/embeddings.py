@@ -0,0 +1,320 @@
+"""
+Embeddingi dla pamięci załogi: lokalne modele i trwały cache.
+
+Pamięć krótkoterminowa i pamięć encji (RAGStorage/ChromaDB) wymagają
+embeddingu każdego zapisywanego i wyszukiwanego tekstu. Z dostawcą OpenAI
+każda operacja to osobne żądanie sieciowe, a identyczne teksty są
+embeddowane od nowa przy każdym uruchomieniu.
+
+Ten moduł dostarcza:
+- HashingEmbedder: lokalny wektoryzator haszujący (bez sieci i bez modelu)
+- SentenceTransformerEmbedder: mały model CPU (opcjonalna zależność)
+- OpenAIEmbedder: dotychczasowy dostawca (text-embedding-3-small)
+- CachedEmbedder: cache na dysku kluczowany hashem treści, działający przed
+  dowolnym z powyższych i wysyłający chybienia w paczkach
+
+Zmienne środowiskowe (opcjonalne):
+    - MEMORY_EMBEDDER: hashing | sentence-transformers | openai (domyślnie: openai)
+    - EMBEDDING_CACHE_PATH: Ścieżka do cache (domyślnie: ./memory/embedding_cache.db)
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Type
+
+import numpy as np
+from crewai.rag.core.types import Documents, Embeddings
+from crewai.rag.embeddings.providers.custom.embedding_callable import CustomEmbeddingFunction
+
+DEFAULT_EMBEDDER = "openai"
+DEFAULT_CACHE_PATH = "./memory/embedding_cache.db"
+DEFAULT_BATCH_SIZE = 64
+
+
+# ============================================================================
+# LOKALNE I ZDALNE EMBEDDERY
+# ============================================================================
+# Każdy embedder to obiekt z atrybutem "name" (identyfikującym przestrzeń
+# wektorów w cache) i metodą embed(texts) -> lista wektorów.
+
+
+class HashingEmbedder:
+    """
+    Lokalny wektoryzator haszujący (feature hashing).
+
+    Słowa i trigramy znakowe są haszowane do wektora o stałym wymiarze,
+    a wynik jest normalizowany (L2). Nie wymaga modelu ani sieci i działa
+    w mikrosekundach - wystarcza do wyszukiwania podobnych notatek
+    o tych samych firmach i tematach.
+    """
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _features(self, text: str) -> List[str]:
+        words = re.findall(r"\w+", text.lower())
+        trigrams = [
+            word[i : i + 3] for word in words if len(word) > 3 for i in range(len(word) - 2)
+        ]
+        return words + trigrams
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                # Znak z osobnego bitu ogranicza wpływ kolizji haszy
+                sign = 1.0 if value >> 63 else -1.0
+                vectors[row, value % self.dimensions] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).tolist()
+
+
+class SentenceTransformerEmbedder:
+    """
+    Lokalny model embeddingów uruchamiany na CPU (sentence-transformers).
+
+    Wymaga opcjonalnego pakietu sentence-transformers. Model jest ładowany
+    przy pierwszym użyciu, więc sam import modułu nic nie kosztuje.
+    """
+
+    def __init__(self, model: str = "all-MiniLM-L6-v2"):
+        self.model = model
+        self.name = f"st-{model}"
+        self._encoder = None
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        if self._encoder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise ImportError(
+                    "Embedder sentence-transformers wymaga pakietu "
+                    "sentence-transformers (pip install sentence-transformers)"
+                ) from e
+            self._encoder = SentenceTransformer(self.model, device="cpu")
+        return self._encoder.encode(list(texts), normalize_embeddings=True).tolist()
+
+
+class OpenAIEmbedder:
+    """Embeddingi OpenAI (dotychczasowy dostawca pamięci załogi)."""
+
+    def __init__(self, model: str = "text-embedding-3-small"):
+        self.model = model
+        self.name = f"openai-{model}"
+        self._function = None
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        if self._function is None:
+            from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
+
+            self._function = OpenAIEmbeddingFunction(
+                api_key=os.getenv("OPENAI_API_KEY"), model_name=self.model
+            )
+        return [list(map(float, vector)) for vector in self._function(list(texts))]
+
+
+# Rejestr dostępnych embedderów (nazwa z MEMORY_EMBEDDER -> fabryka)
+EMBEDDERS: Dict[str, Callable[[], object]] = {
+    "hashing": HashingEmbedder,
+    "sentence-transformers": SentenceTransformerEmbedder,
+    "openai": OpenAIEmbedder,
+}
+
+
+# ============================================================================
+# CACHE EMBEDDINGÓW
+# ============================================================================
+
+
+class CachedEmbedder:
+    """
+    Trwały cache embeddingów kluczowany hashem treści.
+
+    Klucz obejmuje nazwę embeddera, więc zmiana modelu nie zwraca wektorów
+    z innej przestrzeni. Brakujące teksty są deduplikowane i wysyłane
+    do embeddera w paczkach, zamiast pojedynczymi żądaniami.
+
+    Atrybuty:
+        embedder: Embedder obsługujący chybienia
+        batch_size: Maksymalna liczba tekstów w jednym wywołaniu embeddera
+        hits: Liczba tekstów obsłużonych z cache
+        misses: Liczba tekstów przekazanych do embeddera
+    """
+
+    def __init__(
+        self,
+        embedder,
+        path: str = DEFAULT_CACHE_PATH,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _key(self, text: str) -> str:
+        raw = f"{self.embedder.name}\0{text}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        # SQLite ogranicza liczbę parametrów zapytania - pytamy w porcjach
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                chunk,
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Zwraca embeddingi tekstów, korzystając z cache tam, gdzie to możliwe.
+
+        Args:
+            texts: Teksty do zembeddowania
+
+        Returns:
+            Lista wektorów w kolejności tekstów wejściowych
+        """
+        keys = [self._key(text) for text in texts]
+        missing: Dict[str, str] = {}
+        with self._lock:
+            vectors = self._lookup(list(set(keys)))
+            for key, text in zip(keys, texts):
+                if key not in vectors:
+                    missing.setdefault(key, text)
+            # Cache jest współdzielony przez wątki fan-out - liczniki pod blokadą
+            self.hits += len(texts) - sum(1 for key in keys if key in missing)
+            self.misses += len(missing)
+
+        missing_keys = list(missing)
+        for start in range(0, len(missing_keys), self.batch_size):
+            batch_keys = missing_keys[start : start + self.batch_size]
+            batch_vectors = self.embedder.embed([missing[key] for key in batch_keys])
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [
+                        (key, np.asarray(vector, dtype=np.float32).tobytes())
+                        for key, vector in zip(batch_keys, batch_vectors)
+                    ],
+                )
+                self._conn.commit()
+            vectors.update(zip(batch_keys, batch_vectors))
+
+        return [vectors[key] for key in keys]
+
+
+@lru_cache(maxsize=None)
+def shared_cached_embedder(backend: Optional[str] = None) -> CachedEmbedder:
+    """
+    Zwraca jeden cache embeddingów na proces dla danego embeddera.
+
+    Args:
+        backend: Nazwa embeddera z EMBEDDERS (domyślnie z MEMORY_EMBEDDER)
+
+    Raises:
+        ValueError: Jeśli embedder o podanej nazwie nie istnieje
+    """
+    backend = backend or os.getenv("MEMORY_EMBEDDER", DEFAULT_EMBEDDER)
+    if backend not in EMBEDDERS:
+        raise ValueError(
+            f"Nieznany embedder: {backend} (dostępne: {', '.join(EMBEDDERS)})"
+        )
+    return CachedEmbedder(
+        EMBEDDERS[backend](),
+        path=os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH),
+    )
+
+
+# ============================================================================
+# INTEGRACJA Z RAGStorage (ChromaDB)
+# ============================================================================
+
+# Maksymalna długość znacznika embeddera w nazwie kolekcji ChromaDB
+# (nazwa kolekcji ma najwyżej 63 znaki, dłuższą CrewAI by ucięło)
+MAX_COLLECTION_TAG = 32
+
+
+def memory_collection_tag(backend: Optional[str] = None) -> str:
+    """
+    Zwraca znacznik przestrzeni wektorów embeddera do nazw kolekcji ChromaDB.
+
+    Kolekcja przechowuje wektory jednego wymiaru - po zmianie MEMORY_EMBEDDER
+    (np. 1536-wymiarowe OpenAI na 384-wymiarowy hashing) zapis do starej
+    kolekcji kończy się błędem niezgodności wymiarów. Znacznik pochodzi
+    z nazwy embeddera (model i wymiar), więc każdy embedder ma własne kolekcje.
+
+    Przykład: "hashing-384" -> "hashing_384"
+    """
+    name = shared_cached_embedder(backend).embedder.name
+    tag = re.sub(r"[^a-zA-Z0-9]+", "_", name).strip("_")
+    if len(tag) > MAX_COLLECTION_TAG:
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+        tag = f"{tag[: MAX_COLLECTION_TAG - 9]}_{digest}"
+    return tag
+
+
+
+class CachedEmbeddingFunction(CustomEmbeddingFunction):
+    """
+    Funkcja embeddingów ChromaDB korzystająca ze współdzielonego cache.
+
+    RAGStorage tworzy funkcję embeddingów samodzielnie (dostawca "custom",
+    który przyjmuje tylko podklasy CustomEmbeddingFunction), dlatego
+    konfiguracja embeddera jest atrybutem klasy - patrz embedding_function_for().
+    """
+
+    backend: Optional[str] = None
+
+    def __init__(self, *args, **kwargs):
+        self._cached = shared_cached_embedder(self.backend)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return [np.asarray(v, dtype=np.float32) for v in self._cached.embed(list(input))]
+
+    @staticmethod
+    def name() -> str:
+        return "cached_embedder"
+
+
+def embedding_function_for(backend: Optional[str] = None) -> Type[CachedEmbeddingFunction]:
+    """Zwraca klasę funkcji embeddingów z ustawionym embedderem."""
+    return type(
+        "CachedEmbeddingFunction", (CachedEmbeddingFunction,), {"backend": backend}
+    )
+
+
+def memory_embedder_config(backend: Optional[str] = None) -> Dict[str, object]:
+    """
+    Zwraca embedder_config dla RAGStorage korzystający z cache embeddingów.
+
+    Args:
+        backend: Nazwa embeddera (domyślnie z MEMORY_EMBEDDER)
+    """
+    return {
+        "provider": "custom",
+        "config": {"embedding_callable": embedding_function_for(backend)},
+    }
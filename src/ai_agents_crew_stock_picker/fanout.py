@@ -0,0 +1,171 @@
+"""
+Równoległe wykonywanie zadań dla wielu elementów (fan-out).
+
+Zadanie research_trending_companies analizuje wszystkie firmy po kolei,
+więc jego czas rośnie liniowo z liczbą firm. Ten moduł pozwala rozdzielić
+pracę na niezależne zadania (po jednym na firmę) i wykonać je współbieżnie
+z ograniczoną pulą oraz limitem czasu dla każdego elementu.
+
+Wyniki można odbierać w miarę ich powstawania (callback on_result lub
+generator fan_out_iter) - pierwszy wynik jest dostępny, zanim skończy się
+najwolniejszy element.
+
+Moduł jest niezależny od CrewAI - przyjmuje dowolną funkcję przetwarzającą
+pojedynczy element, dzięki czemu można go użyć dla każdego etapu załogi.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Generic, Iterator, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Domyślne parametry fan-outu dla etapu analizy firm
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_ITEM_TIMEOUT = 300.0  # Sekundy na analizę jednej firmy
+
+
+@dataclass
+class FanOutResult(Generic[T, R]):
+    """
+    Wynik przetworzenia pojedynczego elementu.
+
+    Atrybuty:
+        item: Element wejściowy
+        value: Wynik funkcji (None w przypadku błędu lub przekroczenia czasu)
+        error: Opis błędu (None, jeśli przetwarzanie się powiodło)
+        duration: Czas przetwarzania w sekundach
+    """
+
+    item: T
+    value: Optional[R] = None
+    error: Optional[str] = None
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def _process(
+    item: T,
+    fn: Callable[[T], R],
+    semaphore: asyncio.Semaphore,
+    executor: ThreadPoolExecutor,
+    timeout: Optional[float],
+) -> FanOutResult:
+    """
+    Przetwarza jeden element w osobnym wątku z limitem czasu.
+
+    Wątku nie da się przerwać, ale po przekroczeniu limitu przestajemy
+    na niego czekać i zwalniamy miejsce w puli - jeden wolny element
+    nie blokuje całego etapu.
+    """
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            value = await asyncio.wait_for(
+                loop.run_in_executor(executor, fn, item), timeout
+            )
+            return FanOutResult(item, value=value, duration=time.perf_counter() - start)
+        except asyncio.TimeoutError:
+            error = f"przekroczono limit czasu ({timeout:g} s)"
+        except Exception as e:  # Błąd jednego elementu nie przerywa pozostałych
+            error = str(e) or type(e).__name__
+        return FanOutResult(item, error=error, duration=time.perf_counter() - start)
+
+
+async def fan_out_async(
+    items: Sequence[T],
+    fn: Callable[[T], R],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    timeout: Optional[float] = DEFAULT_ITEM_TIMEOUT,
+    on_result: Optional[Callable[[FanOutResult], None]] = None,
+) -> List[FanOutResult]:
+    """
+    Wykonuje fn dla każdego elementu współbieżnie (wersja asynchroniczna).
+
+    Args:
+        items: Elementy do przetworzenia
+        fn: Funkcja synchroniczna przetwarzająca jeden element
+        max_workers: Maksymalna liczba jednocześnie przetwarzanych elementów
+        timeout: Limit czasu na element w sekundach (None - bez limitu)
+        on_result: Wywoływana z każdym wynikiem zaraz po jego powstaniu
+            (w kolejności ukończenia, w wątku pętli zdarzeń)
+
+    Returns:
+        Lista wyników w kolejności elementów wejściowych
+    """
+    if max_workers < 1:
+        raise ValueError("Liczba wątków musi być większa od zera")
+    semaphore = asyncio.Semaphore(max_workers)
+    # Pula ma miejsce dla każdego elementu: wątki porzucone po przekroczeniu
+    # czasu nie mogą blokować kolejnych elementów. Liczbę aktywnych zadań
+    # ogranicza semafor, a wątki powstają dopiero wtedy, gdy są potrzebne.
+    executor = ThreadPoolExecutor(max_workers=max(1, len(items)))
+
+    async def process(item: T) -> FanOutResult:
+        result = await _process(item, fn, semaphore, executor, timeout)
+        if on_result is not None:
+            on_result(result)
+        return result
+
+    try:
+        return list(await asyncio.gather(*(process(item) for item in items)))
+    finally:
+        # Nie czekamy na porzucone wątki - ich wyniki i tak zostaną pominięte
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def fan_out(
+    items: Sequence[T],
+    fn: Callable[[T], R],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    timeout: Optional[float] = DEFAULT_ITEM_TIMEOUT,
+    on_result: Optional[Callable[[FanOutResult], None]] = None,
+) -> List[FanOutResult]:
+    """
+    Synchroniczna wersja fan_out_async dla kodu bez pętli zdarzeń.
+
+    Zadania CrewAI są synchroniczne (kickoff), więc to jest podstawowy
+    punkt wejścia używany przez załogę.
+    """
+    return asyncio.run(fan_out_async(items, fn, max_workers, timeout, on_result))
+
+
+def fan_out_iter(
+    items: Sequence[T],
+    fn: Callable[[T], R],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    timeout: Optional[float] = DEFAULT_ITEM_TIMEOUT,
+) -> Iterator[FanOutResult]:
+    """
+    Generator wyników fan_out w kolejności ukończenia elementów.
+
+    Fan-out działa w osobnym wątku, a wyniki trafiają do kolejki zaraz po
+    powstaniu - konsument przetwarza pierwszy wynik, gdy pozostałe elementy
+    są jeszcze w toku. Błąd samego fan-outu (nie elementu) jest zgłaszany
+    po odebraniu wszystkich wyników.
+    """
+    results: "queue.Queue[Optional[FanOutResult]]" = queue.Queue()
+    failure: List[BaseException] = []
+
+    def run() -> None:
+        try:
+            fan_out(items, fn, max_workers, timeout, on_result=results.put)
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            results.put(None)  # Koniec strumienia
+
+    threading.Thread(target=run, name="fan-out", daemon=True).start()
+    while (result := results.get()) is not None:
+        yield result
+    if failure:
+        raise failure[0]
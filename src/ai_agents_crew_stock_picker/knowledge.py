@@ -0,0 +1,317 @@
+"""
+Indeks wiedzy z katalogu knowledge/ - budowany przyrostowo, ładowany raz.
+
+Katalog knowledge/ (profile inwestorów, listy obserwowanych spółek, własne
+analizy) nie był podłączony do załogi. Źródła wiedzy CrewAI dzielą pliki
+na fragmenty i embeddują je przy każdej budowie załogi, więc koszt rósłby
+z każdym dodanym dokumentem. Ten moduł utrzymuje trwały indeks fragmentów:
+- fragmenty i ich embeddingi są zapisywane w SQLite
+- przy aktualizacji ponownie embeddowane są tylko pliki, których hash treści
+  się zmienił (lub gdy zmienił się embedder); usunięte pliki znikają z indeksu
+- indeks jest ładowany leniwie, raz na proces, do macierzy NumPy
+  i współdzielony przez wszystkich agentów
+
+Pliki są grupowane w podzbiory według podkatalogu (knowledge/watchlists/...
+-> "watchlists"; pliki bezpośrednio w knowledge/ -> "general"). Agent
+przeszukuje tylko podzbiory z klucza "knowledge_subsets" w agents.yaml, więc każde
+wyszukiwanie skanuje wyłącznie potrzebne macierze.
+
+Embeddingi pochodzą ze wspólnego cache embeddingów (embeddings.py,
+MEMORY_EMBEDDER).
+
+Zmienne środowiskowe (opcjonalne):
+    - KNOWLEDGE_DIR: Katalog plików wiedzy (domyślnie: knowledge)
+    - KNOWLEDGE_INDEX_PATH: Ścieżka do indeksu (domyślnie: ./memory/knowledge_index.db)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+DEFAULT_KNOWLEDGE_DIR = "knowledge"
+DEFAULT_INDEX_PATH = "./memory/knowledge_index.db"
+
+KNOWLEDGE_SUFFIXES = (".txt", ".md", ".csv", ".json")
+GENERAL_SUBSET = "general"
+
+# Fragment to okno słów z zakładką - zdanie na granicy trafia do obu fragmentów
+CHUNK_WORDS = 200
+CHUNK_OVERLAP = 40
+
+
+def chunk_text(text: str, words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """Dzieli tekst na fragmenty po `words` słów, zachodzące na siebie o `overlap`."""
+    tokens = text.split()
+    step = max(1, words - overlap)
+    return [
+        " ".join(tokens[start:start + words])
+        for start in range(0, max(1, len(tokens) - overlap), step)
+        if tokens[start:start + words]
+    ]
+
+
+@dataclass
+class KnowledgeHit:
+    """
+    Fragment wiedzy znaleziony dla zapytania.
+
+    Atrybuty:
+        source: Ścieżka pliku względem katalogu wiedzy
+        subset: Podzbiór (podkatalog) pliku
+        text: Treść fragmentu
+        score: Podobieństwo kosinusowe do zapytania
+    """
+
+    source: str
+    subset: str
+    text: str
+    score: float
+
+
+@dataclass
+class IndexUpdate:
+    """Wynik przyrostowej aktualizacji indeksu (liczby plików i fragmentów)."""
+
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    chunks_embedded: int = 0
+    duration: float = 0.0
+
+
+class KnowledgeIndex:
+    """
+    Trwały indeks fragmentów plików wiedzy z wyszukiwaniem wektorowym.
+
+    Atrybuty:
+        directory: Katalog plików wiedzy
+        last_update: Wynik ostatniej aktualizacji (None przed załadowaniem)
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_KNOWLEDGE_DIR,
+        path: str = DEFAULT_INDEX_PATH,
+        embedder=None,
+    ):
+        self.directory = Path(directory)
+        self.last_update: Optional[IndexUpdate] = None
+        self._embedder = embedder
+        self._subsets: Dict[str, Tuple[List[str], List[str], np.ndarray]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                subset TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                embedder TEXT NOT NULL,
+                indexed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                path TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                subset TEXT NOT NULL,
+                text TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                PRIMARY KEY (path, position)
+            )
+            """
+        )
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> "KnowledgeIndex":
+        """Tworzy indeks na podstawie zmiennych środowiskowych."""
+        return cls(
+            directory=os.getenv("KNOWLEDGE_DIR", DEFAULT_KNOWLEDGE_DIR),
+            path=os.getenv("KNOWLEDGE_INDEX_PATH", DEFAULT_INDEX_PATH),
+        )
+
+    @property
+    def embedder(self):
+        # Import leniwy - embedder (i jego cache) powstaje dopiero przy pierwszym użyciu
+        if self._embedder is None:
+            from ai_agents_crew_stock_picker.embeddings import shared_cached_embedder
+
+            self._embedder = shared_cached_embedder()
+        return self._embedder
+
+    def files(self) -> List[Path]:
+        """Pliki wiedzy w katalogu (rekurencyjnie, posortowane)."""
+        if not self.directory.is_dir():
+            return []
+        return sorted(
+            path
+            for path in self.directory.rglob("*")
+            if path.is_file() and path.suffix.lower() in KNOWLEDGE_SUFFIXES
+        )
+
+    @property
+    def available(self) -> bool:
+        """Czy katalog zawiera pliki wiedzy (bez ładowania indeksu)."""
+        return bool(self.files())
+
+    def file_subsets(self) -> Set[str]:
+        """Podzbiory plików obecnych w katalogu (bez ładowania indeksu)."""
+        return {self._subset(path) for path in self.files()}
+
+    def _subset(self, path: Path) -> str:
+        parts = path.relative_to(self.directory).parts
+        return parts[0] if len(parts) > 1 else GENERAL_SUBSET
+
+    # ------------------------------------------------------------------------
+    # Aktualizacja przyrostowa
+    # ------------------------------------------------------------------------
+
+    def update(self) -> IndexUpdate:
+        """
+        Synchronizuje indeks z katalogiem wiedzy.
+
+        Embeddowane są tylko fragmenty plików nowych i zmienionych (inny hash
+        treści lub inny embedder); fragmenty usuniętych plików są kasowane.
+        """
+        start = time.perf_counter()
+        result = IndexUpdate()
+        # Nazwa embeddera (CachedEmbedder opakowuje właściwy embedder)
+        embedder_name = getattr(self.embedder, "embedder", self.embedder).name
+        known = {
+            path: (sha256, embedder)
+            for path, sha256, embedder in self._conn.execute(
+                "SELECT path, sha256, embedder FROM files"
+            )
+        }
+        present = set()
+        for file in self.files():
+            relative = file.relative_to(self.directory).as_posix()
+            present.add(relative)
+            content = file.read_bytes()
+            digest = hashlib.sha256(content).hexdigest()
+            if known.get(relative) == (digest, embedder_name):
+                result.unchanged += 1
+                continue
+            if relative in known:
+                result.changed += 1
+            else:
+                result.added += 1
+            subset = self._subset(file)
+            chunks = chunk_text(content.decode("utf-8", errors="replace"))
+            vectors = self.embedder.embed(chunks) if chunks else []
+            result.chunks_embedded += len(chunks)
+            with self._conn:
+                self._conn.execute("DELETE FROM chunks WHERE path = ?", (relative,))
+                self._conn.executemany(
+                    "INSERT INTO chunks (path, position, subset, text, embedding) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (relative, position, subset, text, np.asarray(vector, np.float32).tobytes())
+                        for position, (text, vector) in enumerate(zip(chunks, vectors))
+                    ],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files (path, subset, sha256, embedder, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (relative, subset, digest, embedder_name, time.time()),
+                )
+        removed = set(known) - present
+        with self._conn:
+            for relative in removed:
+                self._conn.execute("DELETE FROM chunks WHERE path = ?", (relative,))
+                self._conn.execute("DELETE FROM files WHERE path = ?", (relative,))
+        result.removed = len(removed)
+        result.duration = round(time.perf_counter() - start, 4)
+        return result
+
+    # ------------------------------------------------------------------------
+    # Ładowanie i wyszukiwanie
+    # ------------------------------------------------------------------------
+
+    def load(self) -> "KnowledgeIndex":
+        """Aktualizuje indeks i ładuje go do pamięci (raz na instancję)."""
+        if self._loaded:
+            return self
+        with self._lock:
+            if self._loaded:
+                return self
+            self.last_update = self.update()
+            grouped: Dict[str, Tuple[List[str], List[str], List[np.ndarray]]] = {}
+            rows = self._conn.execute(
+                "SELECT subset, path, text, embedding FROM chunks ORDER BY path, position"
+            )
+            for subset, path, text, blob in rows:
+                sources, texts, vectors = grouped.setdefault(subset, ([], [], []))
+                sources.append(path)
+                texts.append(text)
+                vectors.append(np.frombuffer(blob, dtype=np.float32))
+            for subset, (sources, texts, vectors) in grouped.items():
+                matrix = np.vstack(vectors)
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                self._subsets[subset] = (sources, texts, matrix / np.where(norms == 0, 1, norms))
+            self._loaded = True
+        return self
+
+    @property
+    def subsets(self) -> List[str]:
+        """Podzbiory obecne w indeksie."""
+        return sorted(self.load()._subsets)
+
+    def search(
+        self,
+        query: str,
+        subsets: Optional[Sequence[str]] = None,
+        top_k: int = 4,
+    ) -> List[KnowledgeHit]:
+        """
+        Zwraca fragmenty najbardziej podobne do zapytania.
+
+        Args:
+            query: Treść zapytania
+            subsets: Przeszukiwane podzbiory (None - wszystkie, pusta lista - żaden)
+            top_k: Maksymalna liczba fragmentów
+
+        Returns:
+            Fragmenty posortowane malejąco według podobieństwa
+        """
+        self.load()
+        if subsets is None:
+            subsets = list(self._subsets)
+        selected = [name for name in subsets if name in self._subsets]
+        if not selected or not query.strip():
+            return []
+        vector = np.asarray(self.embedder.embed([query])[0], dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        hits: List[KnowledgeHit] = []
+        for name in selected:
+            sources, texts, matrix = self._subsets[name]
+            scores = matrix @ vector
+            best = np.argsort(-scores)[:top_k]
+            hits.extend(
+                KnowledgeHit(sources[row], name, texts[row], round(float(scores[row]), 4))
+                for row in best
+            )
+        hits.sort(key=lambda hit: hit.score, reverse=True)
+        return hits[:top_k]
+
+
+@lru_cache(maxsize=None)
+def shared_knowledge_index() -> KnowledgeIndex:
+    """Zwraca jeden indeks wiedzy na proces (ładowany przy pierwszym wyszukiwaniu)."""
+    return KnowledgeIndex.from_env()
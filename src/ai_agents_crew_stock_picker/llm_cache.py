@@ -0,0 +1,342 @@
+"""
+Deterministyczny cache odpowiedzi LLM z trybami nagrywania i odtwarzania.
+
+Każde uruchomienie wysyła te same prompty do openai/gpt-4o-mini dla
+wszystkich agentów. Przy pracy nad promptami lub schematami Pydantic
+oznacza to minuty oczekiwania i koszty za każdą iterację. Ta warstwa
+opakowuje LLM agenta i zapisuje odpowiedzi w kompaktowym magazynie na dysku.
+
+Tryby (zmienna LLM_CACHE_MODE lub flaga --llm-cache):
+    - off: bez cache (domyślnie)
+    - record: każde wywołanie trafia do LLM, a odpowiedź jest zapisywana
+    - replay: odpowiedzi wyłącznie z magazynu, bez sieci (brak wpisu = błąd)
+    - auto: odpowiedź z magazynu, jeśli istnieje, w przeciwnym razie LLM i zapis
+
+Zmienne środowiskowe (opcjonalne):
+    - LLM_CACHE_PATH: Ścieżka do magazynu (domyślnie: ./memory/llm_cache.db)
+    - LLM_CACHE_MAX_MB: Limit rozmiaru magazynu w MB (domyślnie: 200)
+
+Agent może zrezygnować z cache kluczem "llm_cache: false" w agents.yaml.
+
+Uwaga: pamięć załogi dołącza do promptów wcześniejsze wyniki, więc odtwarzanie
+trafia w nagrania tylko przy tym samym stanie katalogu ./memory co podczas
+nagrywania (np. kopii zrobionej przed nagraniem).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from crewai import LLM
+from crewai.llms.base_llm import BaseLLM
+from crewai.types.usage_metrics import UsageMetrics
+from pydantic import BaseModel
+
+LLM_CACHE_MODES = ("off", "record", "replay", "auto")
+DEFAULT_CACHE_PATH = "./memory/llm_cache.db"
+DEFAULT_MAX_MB = 200
+
+
+class ReplayMissError(RuntimeError):
+    """Brak nagranej odpowiedzi dla zapytania w trybie replay."""
+
+
+# Parametry LLM zmieniające odpowiedź modelu - wchodzą do klucza zapytania
+SAMPLING_PARAMS = (
+    "temperature",
+    "top_p",
+    "n",
+    "max_tokens",
+    "max_completion_tokens",
+    "presence_penalty",
+    "frequency_penalty",
+    "logit_bias",
+    "response_format",
+    "seed",
+    "logprobs",
+    "top_logprobs",
+    "reasoning_effort",
+    "stop",
+)
+
+
+def _param_value(value: Any) -> Any:
+    """Postać parametru do klucza - klasy Pydantic (response_format) jako schemat JSON."""
+    if isinstance(value, type) and issubclass(value, BaseModel):
+        return {"schema": value.__name__, "json_schema": value.model_json_schema()}
+    return value
+
+
+def request_params(llm: Any, **overrides: Any) -> Dict[str, Any]:
+    """
+    Zbiera parametry próbkowania LLM (SAMPLING_PARAMS) do klucza zapytania.
+
+    Opakowania (CachingLLM, GovernedLLM) przechowują właściwy model w inner -
+    parametry odczytywane są z najgłębszego LLM. Wartości z overrides
+    (np. response_model przekazany do call) mają pierwszeństwo. Pomijane są
+    parametry nieustawione, więc dodanie nowego parametru nie unieważnia
+    istniejących nagrań.
+    """
+    while getattr(llm, "inner", None) is not None:
+        llm = llm.inner
+    params = {name: getattr(llm, name, None) for name in SAMPLING_PARAMS}
+    params.update(overrides)
+    return {
+        name: _param_value(value)
+        for name, value in sorted(params.items())
+        if value is not None and value != []
+    }
+
+
+def request_key(
+    model: str,
+    messages: Union[str, List[Dict[str, Any]]],
+    tools: Optional[List[Dict[str, Any]]] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Tworzy deterministyczny klucz zapytania do LLM.
+
+    Klucz obejmuje model, wiadomości, definicje narzędzi i parametry
+    próbkowania (request_params) - serializowane z posortowanymi kluczami,
+    aby kolejność pól w słownikach nie miała wpływu. Ta sama rozmowa przy
+    innej temperaturze lub innym response_format to osobny wpis.
+    """
+    payload = {"model": model, "messages": messages, "tools": tools or []}
+    if params:
+        payload["params"] = params
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+# ============================================================================
+# MAGAZYN ODPOWIEDZI
+# ============================================================================
+
+
+class LLMResponseStore:
+    """
+    Magazyn odpowiedzi LLM w SQLite z kompresją i limitem rozmiaru.
+
+    Odpowiedzi są kompresowane (zlib), a po przekroczeniu limitu usuwane są
+    najdawniej używane wpisy. Instancja jest bezpieczna wątkowo.
+
+    Atrybuty:
+        max_bytes: Maksymalny łączny rozmiar skompresowanych odpowiedzi
+        hits: Liczba odpowiedzi obsłużonych z magazynu
+        misses: Liczba zapytań bez zapisanej odpowiedzi
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_mb: float = DEFAULT_MAX_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_responses_access "
+            "ON llm_responses (last_access)"
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Zamyka połączenie z magazynem (instancja nie nadaje się do dalszego użycia)."""
+        with self._lock:
+            self._conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """Zwraca zapisaną odpowiedź lub None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_responses SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+            self.hits += 1
+            return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, key: str, model: str, response: str) -> None:
+        """Zapisuje odpowiedź i usuwa najstarsze wpisy ponad limit rozmiaru."""
+        blob = zlib.compress(response.encode("utf-8"), 6)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses "
+                "(key, model, response, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, model, blob, len(blob), time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Usuwa najdawniej używane odpowiedzi, dopóki magazyn przekracza limit."""
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        rows = self._conn.execute(
+            "SELECT key, size FROM llm_responses ORDER BY last_access ASC"
+        )
+        to_delete = []
+        for key, size in rows:
+            if excess <= 0:
+                break
+            to_delete.append((key,))
+            excess -= size
+        self._conn.executemany("DELETE FROM llm_responses WHERE key = ?", to_delete)
+
+
+@lru_cache(maxsize=None)
+def shared_llm_store() -> LLMResponseStore:
+    """Zwraca jeden magazyn odpowiedzi na proces (współdzielony przez agentów)."""
+    return LLMResponseStore(
+        path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+        max_mb=float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB)),
+    )
+
+
+# ============================================================================
+# LLM Z CACHE
+# ============================================================================
+
+
+class CachingLLM(BaseLLM):
+    """
+    LLM nagrywający i odtwarzający odpowiedzi innego LLM.
+
+    Opakowuje dowolny LLM CrewAI. Cache obejmuje tylko odpowiedzi tekstowe -
+    wyniki ustrukturyzowane lub wywołania funkcji są przekazywane bez zmian.
+
+    Zużycie tokenów (get_token_usage_summary) pochodzi z opakowanego LLM,
+    więc odpowiedzi odtworzone z magazynu liczą się jako 0 tokenów - nie
+    trafiają do API. Ich liczbę podaje store.hits.
+
+    Atrybuty:
+        inner: Opakowywany LLM (używany w trybach record i auto)
+        mode: Tryb cache (record, replay lub auto)
+        store: Magazyn odpowiedzi
+    """
+
+    def __init__(self, inner: BaseLLM, mode: str, store: Optional[LLMResponseStore] = None):
+        if mode not in LLM_CACHE_MODES or mode == "off":
+            raise ValueError(f"Nieprawidłowy tryb cache LLM: {mode}")
+        super().__init__(model=inner.model, temperature=getattr(inner, "temperature", None))
+        self.inner = inner
+        self.mode = mode
+        self.store = store or shared_llm_store()
+        # Crew.calculate_usage_metrics odczytuje zużycie z LLM agenta (tego opakowania)
+        self._token_usage = inner._token_usage
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, Any]]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+        from_task: Optional[Any] = None,
+        from_agent: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> Union[str, Any]:
+        """
+        Zwraca odpowiedź z magazynu lub z opakowanego LLM, zależnie od trybu.
+
+        Raises:
+            ReplayMissError: W trybie replay, gdy brak nagranej odpowiedzi
+        """
+        # Słowa stopu CrewAI ustawia na tym opakowaniu, nie na inner
+        params = request_params(
+            self.inner, stop=self.stop, response_model=kwargs.get("response_model")
+        )
+        key = request_key(self.model, messages, tools, params)
+        if self.mode in ("replay", "auto"):
+            cached = self.store.get(key)
+            if cached is not None:
+                return cached
+            if self.mode == "replay":
+                raise ReplayMissError(
+                    f"Brak nagranej odpowiedzi dla modelu {self.model} - "
+                    "uruchom załogę najpierw w trybie record"
+                )
+
+        # CrewAI ustawia słowa stopu (np. "Observation:") na LLM agenta,
+        # czyli na tym opakowaniu - przekazujemy je do właściwego modelu.
+        self.inner.stop = self.stop
+        response = self.inner.call(
+            messages,
+            tools=tools,
+            callbacks=callbacks,
+            available_functions=available_functions,
+            from_task=from_task,
+            from_agent=from_agent,
+            **kwargs,
+        )
+        if isinstance(response, str):
+            self.store.put(key, self.model, response)
+        return response
+
+    def get_token_usage_summary(self) -> UsageMetrics:
+        return self.inner.get_token_usage_summary()
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+
+def wrap_llm(
+    llm: Union[str, BaseLLM, None],
+    mode: Optional[str] = None,
+    store: Optional[LLMResponseStore] = None,
+) -> Union[str, BaseLLM, None]:
+    """
+    Opakowuje LLM agenta w cache, jeśli tryb cache jest włączony.
+
+    Args:
+        llm: Nazwa modelu (np. "openai/gpt-4o-mini") lub obiekt LLM
+        mode: Tryb cache (domyślnie z LLM_CACHE_MODE)
+        store: Magazyn odpowiedzi (domyślnie współdzielony w procesie)
+
+    Returns:
+        CachingLLM albo niezmieniony llm, gdy cache jest wyłączony
+    """
+    mode = mode or os.getenv("LLM_CACHE_MODE", "off")
+    if mode not in LLM_CACHE_MODES:
+        raise ValueError(
+            f"Nieznany tryb cache LLM: {mode} (dostępne: {', '.join(LLM_CACHE_MODES)})"
+        )
+    if mode == "off" or llm is None:
+        return llm
+    inner = LLM(model=llm) if isinstance(llm, str) else llm
+    return CachingLLM(inner, mode, store=store)
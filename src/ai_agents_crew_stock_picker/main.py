@@ -10,11 +10,83 @@ Użycie:
     python -m ai_agents_crew_stock_picker.main
     lub
     crewai run
+
+Tryb potoku bez managera (zadania według grafu context z tasks.yaml):
+    python -m ai_agents_crew_stock_picker.main --mode pipeline
+
+Porównanie trybów (czas i tokeny na tych samych danych):
+    compare_modes --sector technology --region Africa
+
+Równoległa analiza firm (osobne zadanie na każdą firmę); każda analiza
+trafia do output/research_stream.jsonl zaraz po powstaniu:
+    python -m ai_agents_crew_stock_picker.main --fanout --max-workers 4
+    tail -f output/research_stream.jsonl
+
+Nagranie odpowiedzi LLM i ponowne uruchomienie offline (np. test promptów):
+    python -m ai_agents_crew_stock_picker.main --llm-cache record
+    python -m ai_agents_crew_stock_picker.main --llm-cache replay
+
+Wznowienie przerwanego uruchomienia od pierwszego nieukończonego etapu:
+    replay                      (najnowsze nieukończone uruchomienie)
+    replay --run-id 20250101-120000-abc123
+
+Tryb usługi (jeden rozgrzany proces, zlecenia przez HTTP lub gniazdo uniksowe):
+    serve --port 8765
+    curl -X POST localhost:8765/runs -d '{"inputs": {"sector": "technology"}, "wait": true}'
+
+Utrzymanie pamięci (retencja, deduplikacja, VACUUM) - także automatycznie
+przed uruchomieniem, nie częściej niż co MEMORY_MAINTENANCE_INTERVAL_HOURS:
+    maintain_memory --retention-days 90 --max-entries 5000
+
+Historia uruchomień (wybory, skuteczność tickerów, czasy etapów):
+    history picks --sector healthcare --days 90
+    history hit-rate --days 365 --min-appearances 3
+    history company NVDA
+
+Tryb wsadowy (wiele kombinacji sektor/region równolegle):
+    batch --sectors technology,healthcare --regions Africa,Europe --concurrency 4
+    batch --inputs-file inputs.json
 """
 
+import argparse
+import asyncio
+import json
+import os
+import time
 import warnings
 
-from ai_agents_crew_stock_picker.crew import AiAgentsCrewStockPicker
+from ai_agents_crew_stock_picker.batch import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_OUTPUT_ROOT,
+    combine_inputs,
+    load_inputs_file,
+    run_batch,
+)
+from ai_agents_crew_stock_picker.checkpoints import CheckpointStore, new_run_id
+from ai_agents_crew_stock_picker.crew import EXECUTION_MODES, AiAgentsCrewStockPicker
+from ai_agents_crew_stock_picker.fanout import DEFAULT_ITEM_TIMEOUT, DEFAULT_MAX_WORKERS
+from ai_agents_crew_stock_picker.llm_cache import LLM_CACHE_MODES, shared_llm_store
+from ai_agents_crew_stock_picker.memory_maintenance import (
+    DEFAULT_MEMORY_DIR,
+    MaintenancePolicy,
+    maintain_if_due,
+    run_maintenance,
+)
+from ai_agents_crew_stock_picker.mode_comparison import (
+    DEFAULT_COMPARISON_ROOT,
+    compare_modes as run_mode_comparison,
+)
+from ai_agents_crew_stock_picker.rate_governor import shared_governor
+from ai_agents_crew_stock_picker.run_history import RunHistory, format_rows
+from ai_agents_crew_stock_picker.service import (
+    DEFAULT_CONCURRENCY as DEFAULT_SERVICE_CONCURRENCY,
+    DEFAULT_HOST,
+    DEFAULT_OUTPUT_ROOT as DEFAULT_SERVICE_OUTPUT_ROOT,
+    DEFAULT_PORT,
+    serve as run_service,
+)
+from ai_agents_crew_stock_picker.tools.cached_search_tool import shared_search_cache
+from ai_agents_crew_stock_picker.tracing import RunTracer
 
 # Ignoruj ostrzeżenia składniowe z modułu pysbd (używanego przez CrewAI)
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
@@ -27,7 +99,29 @@ def main():
     Definiuje dane wejściowe dla załogi i uruchamia proces hierarchiczny.
     Dane wejściowe są automatycznie interpolowane do zadań i agentów
     zgodnie z konfiguracją w plikach YAML.
+
+    Flaga --mode wybiera tryb wykonania (domyślnie hierarchiczny).
+    Flaga --fanout włącza równoległą analizę firm (osobne zadanie na firmę).
+    Flaga --llm-cache włącza nagrywanie/odtwarzanie odpowiedzi LLM.
     """
+    parser = argparse.ArgumentParser(description="Uruchomienie załogi Stock Picker")
+    parser.add_argument(
+        "--mode",
+        choices=EXECUTION_MODES,
+        help="Tryb wykonania: hierarchical (z managerem) lub pipeline (bez managera)",
+    )
+    parser.add_argument(
+        "--fanout", action="store_true", help="Analizuj firmy równolegle (fan-out)"
+    )
+    parser.add_argument(
+        "--llm-cache",
+        choices=LLM_CACHE_MODES,
+        help="Cache odpowiedzi LLM: record (nagrywaj), replay (offline), auto, off",
+    )
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--company-timeout", type=float, default=DEFAULT_ITEM_TIMEOUT)
+    args = parser.parse_args()
+
     # ========================================================================
     # KONFIGURACJA DANYCH WEJŚCIOWYCH
     # ========================================================================
@@ -44,9 +138,35 @@ def main():
     # 1. Tworzy instancję klasy załogi
     # 2. Wywołuje metodę crew() aby uzyskać obiekt Crew
     # 3. Uruchamia proces za pomocą kickoff() z danymi wejściowymi
+    if args.llm_cache:
+        # Ustawiane przed utworzeniem załogi - agenci powstają w konstruktorze
+        os.environ["LLM_CACHE_MODE"] = args.llm_cache
+    # Utrzymanie pamięci między uruchomieniami - przed otwarciem magazynów przez załogę
+    maintenance = maintain_if_due()
+    if maintenance is not None:
+        print("\n=== MEMORY MAINTENANCE ===\n")
+        print(maintenance.summary())
     crew_instance = AiAgentsCrewStockPicker()
-    crew = crew_instance.crew()
-    result = crew.kickoff(inputs=inputs)
+    if args.mode:
+        crew_instance.execution_mode = args.mode
+    crew_instance.run_id = new_run_id()
+    print(f"Uruchomienie {crew_instance.run_id} (wznowienie: replay --run-id <id>)")
+
+    # Tracer zbiera czasy agentów, zadań, narzędzi, LLM i pamięci
+    with RunTracer(run_id=crew_instance.run_id) as tracer:
+        if args.fanout:
+            started = time.perf_counter()
+            result = crew_instance.kickoff_fanout(
+                inputs,
+                max_workers=args.max_workers,
+                company_timeout=args.company_timeout,
+                on_research=lambda entry: print(
+                    f"Analiza gotowa po {time.perf_counter() - started:.1f} s: {entry.name}"
+                ),
+            )
+        else:
+            crew = crew_instance.crew()
+            result = crew.kickoff(inputs=inputs)
 
     # ========================================================================
     # WYŚWIETLANIE WYNIKÓW
@@ -55,6 +175,217 @@ def main():
     print("\n\n=== FINAL DECISION ===\n\n")
     print(result.raw)
 
+    # ========================================================================
+    # PODSUMOWANIE CZASU I EKSPORT METRYK
+    # ========================================================================
+    # Cache wyszukiwania pokazuje, ile zapytań Serper zaoszczędzono
+    tracer.record_usage(result.token_usage)
+    search_stats = shared_search_cache().stats()
+    tracer.record_cache("search", search_stats["hits"], search_stats["misses"])
+    if os.getenv("LLM_CACHE_MODE", "off") != "off":
+        llm_store = shared_llm_store()
+        tracer.record_cache("llm", llm_store.hits, llm_store.misses)
+    # Oszczędność tokenów dzięki kompaktowaniu analiz przed wyborem firmy
+    report = crew_instance.compaction_report
+    if report is not None:
+        tracer.record_compaction(report.tokens_before, report.tokens_after)
+    # Bieżące limity, kolejka i liczba błędów 429 wspólnych ograniczników tempa
+    for provider in ("llm", "search"):
+        tracer.record_limits(provider, shared_governor(provider).metrics())
+
+    trace_path = tracer.save_json(os.path.join(crew_instance.output_dir, "traces"))
+    tracer.write_openmetrics(os.path.join(crew_instance.output_dir, "metrics.prom"))
+    print("\n\n=== LATENCY BREAKDOWN ===\n\n")
+    print(tracer.breakdown_table())
+    print(f"\nŚlad uruchomienia: {trace_path}")
+
+
+def replay():
+    """
+    Wznawia przerwane lub nieudane uruchomienie z checkpointów etapów.
+
+    Ukończone etapy (np. find_trending_companies i research_trending_companies)
+    są odtwarzane z zapisanych wyników, a załoga wykonuje tylko pozostałe.
+    Bez --run-id wznawiane jest najnowsze nieukończone uruchomienie.
+    """
+    parser = argparse.ArgumentParser(description="Wznowienie uruchomienia załogi")
+    parser.add_argument(
+        "--run-id", help="Identyfikator uruchomienia (domyślnie najnowsze nieukończone)"
+    )
+    args = parser.parse_args()
+
+    run_id = args.run_id or CheckpointStore.from_env().latest_incomplete("pick_best_company")
+    if run_id is None:
+        print("Brak nieukończonych uruchomień do wznowienia")
+        return
+
+    result = AiAgentsCrewStockPicker().resume(run_id)
+
+    print("\n\n=== FINAL DECISION ===\n\n")
+    print(result.raw)
+
+
+def maintain_memory():
+    """
+    Porządkuje magazyny pamięci załogi (./memory) według polityki retencji.
+
+    Domyślne wartości pochodzą ze zmiennych środowiskowych MEMORY_* (patrz
+    memory_maintenance.py). Uruchamiaj między uruchomieniami załogi -
+    VACUUM pomija bazy zablokowane przez działający proces.
+    """
+    policy = MaintenancePolicy.from_env()
+    parser = argparse.ArgumentParser(description="Utrzymanie pamięci załogi")
+    parser.add_argument("--memory-dir", default=DEFAULT_MEMORY_DIR)
+    parser.add_argument("--chroma-dir", default=None, help="Domyślnie katalog danych CrewAI")
+    parser.add_argument("--retention-days", type=float, default=policy.retention_days)
+    parser.add_argument("--max-entries", type=int, default=policy.max_entries)
+    parser.add_argument("--dedup-similarity", type=float, default=policy.dedup_similarity)
+    args = parser.parse_args()
+
+    policy.retention_days = args.retention_days
+    policy.max_entries = args.max_entries
+    policy.dedup_similarity = args.dedup_similarity
+    report = run_maintenance(args.memory_dir, policy, args.chroma_dir)
+    print("\n\n=== MEMORY MAINTENANCE ===\n\n")
+    print(report.summary())
+
+
+# Kolumny tabeli wyników dla każdego zapytania historii
+HISTORY_COLUMNS = {
+    "picks": ("recorded_at", "sector", "region", "ticker", "name", "duration"),
+    "hit-rate": ("ticker", "appearances", "researched", "picks", "hit_rate"),
+    "runs": ("recorded_at", "run_id", "sector", "mode", "companies", "picked_ticker", "duration"),
+    "company": ("recorded_at", "sector", "name", "researched", "from_cache", "picked"),
+}
+
+
+def history():
+    """
+    Odpytuje historię uruchomień (run_history.py).
+
+    Zapytania: picks (wybrane firmy), hit-rate (jak często znaleziona
+    firma zostaje wybrana), runs (uruchomienia z czasami etapów),
+    company TICKER (historia jednej firmy). --json wypisuje pełne wiersze.
+    """
+    parser = argparse.ArgumentParser(description="Historia uruchomień załogi")
+    parser.add_argument("query", choices=tuple(HISTORY_COLUMNS))
+    parser.add_argument("ticker", nargs="?", help="Ticker (dla zapytania company)")
+    parser.add_argument("--sector", help="Tylko uruchomienia dla sektora")
+    parser.add_argument("--days", type=float, help="Tylko uruchomienia z ostatnich N dni")
+    parser.add_argument("--min-appearances", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Wynik w formacie JSON")
+    args = parser.parse_args()
+
+    store = RunHistory.from_env()
+    if args.query == "picks":
+        rows = store.picks(args.sector, args.days, args.ticker, limit=args.limit)
+    elif args.query == "hit-rate":
+        rows = store.hit_rates(args.sector, args.days, args.min_appearances, limit=args.limit)
+    elif args.query == "runs":
+        rows = store.runs(args.sector, args.days, limit=args.limit)
+    elif args.ticker:
+        rows = store.company(args.ticker, limit=args.limit)
+    else:
+        parser.error("zapytanie company wymaga tickera")
+
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+    else:
+        print(format_rows(rows, HISTORY_COLUMNS[args.query]))
+
+
+def batch():
+    """
+    Uruchamia załogę wsadowo dla wielu kombinacji danych wejściowych.
+
+    Dane wejściowe pochodzą z pliku (--inputs-file, JSON lub JSONL)
+    albo z iloczynu list --sectors i --regions. Każda kombinacja zapisuje
+    wyniki do osobnego podkatalogu w --output-root.
+    """
+    parser = argparse.ArgumentParser(description="Wsadowe uruchamianie załogi")
+    parser.add_argument("--inputs-file", help="Plik JSON/JSONL z listą danych wejściowych")
+    parser.add_argument("--sectors", default="technology", help="Sektory oddzielone przecinkami")
+    parser.add_argument("--regions", default="Africa", help="Regiony oddzielone przecinkami")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--output-root", default=DEFAULT_OUTPUT_ROOT)
+    args = parser.parse_args()
+
+    if args.inputs_file:
+        inputs_list = load_inputs_file(args.inputs_file)
+    else:
+        inputs_list = combine_inputs(
+            [s.strip() for s in args.sectors.split(",") if s.strip()],
+            [r.strip() for r in args.regions.split(",") if r.strip()],
+        )
+
+    report = asyncio.run(
+        run_batch(inputs_list, args.concurrency, args.output_root)
+    )
+    print("\n\n=== BATCH SUMMARY ===\n\n")
+    print(report.summary())
+
+
+def compare_modes():
+    """
+    Porównuje tryby wykonania załogi na tych samych danych wejściowych.
+
+    Uruchamia załogę kolejno w każdym trybie (na pustym stanie, przy
+    --repeats w naprzemiennej kolejności) i wyświetla tabelę ze średnim
+    czasem wykonania i zużyciem tokenów. Raport JSON trafia do --output-root.
+    """
+    parser = argparse.ArgumentParser(description="Porównanie trybów wykonania załogi")
+    parser.add_argument("--sector", default="technology")
+    parser.add_argument("--region", default="Africa")
+    parser.add_argument(
+        "--modes", default=",".join(EXECUTION_MODES), help="Tryby oddzielone przecinkami"
+    )
+    parser.add_argument("--output-root", default=DEFAULT_COMPARISON_ROOT)
+    parser.add_argument(
+        "--repeats", type=int, default=1, help="Powtórzenia każdego trybu (kolejność naprzemienna)"
+    )
+    args = parser.parse_args()
+
+    report = run_mode_comparison(
+        {"sector": args.sector, "region": args.region},
+        modes=[m.strip() for m in args.modes.split(",") if m.strip()],
+        output_root=args.output_root,
+        repeats=args.repeats,
+    )
+    print("\n\n=== MODE COMPARISON ===\n\n")
+    print(report.to_table())
+
+
+def serve():
+    """
+    Uruchamia załogę jako długo działającą usługę.
+
+    Koszty startu (import CrewAI, YAML, agenci, bazy pamięci) są ponoszone
+    raz, a kolejne uruchomienia są zlecane przez API HTTP (port TCP
+    lub --socket dla gniazda uniksowego) i wykonywane współbieżnie.
+    """
+    parser = argparse.ArgumentParser(description="Usługa załogi Stock Picker")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", DEFAULT_PORT)))
+    parser.add_argument("--socket", help="Ścieżka gniazda uniksowego zamiast portu TCP")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("SERVICE_CONCURRENCY", DEFAULT_SERVICE_CONCURRENCY)),
+    )
+    parser.add_argument(
+        "--output-root", default=os.getenv("SERVICE_OUTPUT_ROOT", DEFAULT_SERVICE_OUTPUT_ROOT)
+    )
+    args = parser.parse_args()
+
+    run_service(
+        host=args.host,
+        port=args.port,
+        socket_path=args.socket,
+        concurrency=args.concurrency,
+        output_root=args.output_root,
+    )
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,565 @@
+"""
+Utrzymanie magazynów pamięci załogi: retencja, deduplikacja, VACUUM.
+
+Pamięć długoterminowa (LTMSQLiteStorage, long_term_mem_store.db) i kolekcje
+ChromaDB (pamięć krótkoterminowa i encji, w katalogu danych CrewAI -
+db_storage_path()) rosną bez ograniczeń - każde uruchomienie dopisuje
+nowe wpisy, często prawie identyczne z poprzednimi.
+Wraz z liczbą zaplanowanych uruchomień rośnie czas wyszukiwania w pamięci
+i zajętość dysku. Ten moduł porządkuje magazyny według polityki retencji:
+- usuwa wpisy starsze niż MEMORY_RETENTION_DAYS
+- usuwa prawie identyczne wpisy (ten sam tekst po normalizacji, a w ChromaDB
+  także embeddingi o podobieństwie kosinusowym >= MEMORY_DEDUP_SIMILARITY),
+  zachowując najnowszy
+- ogranicza liczbę wpisów magazynu do MEMORY_MAX_ENTRIES (najnowsze zostają)
+- tworzy indeks zapytania pamięci długoterminowej i wykonuje VACUUM
+  oraz PRAGMA optimize na wszystkich bazach SQLite w katalogu pamięci
+  i na bazie ChromaDB
+
+Czas wyszukiwania jest mierzony przed i po porządkowaniu, a każdy raport
+dopisywany do <katalog pamięci>/maintenance.jsonl - historia pokazuje, czy
+wyszukiwanie pozostaje płaskie w kolejnych miesiącach.
+
+Utrzymanie można uruchomić poleceniem maintain_memory lub automatycznie
+między uruchomieniami (main, tryb usługi) - nie częściej niż co
+MEMORY_MAINTENANCE_INTERVAL_HOURS.
+
+ChromaDB nie zapisuje czasu dodania wpisu, więc wiek wpisu w kolekcji
+liczony jest od pierwszego przebiegu utrzymania, który go zobaczył
+(pole metadanych maintenance_first_seen).
+
+Zmienne środowiskowe (opcjonalne):
+    - MEMORY_RETENTION_DAYS: Maksymalny wiek wpisu w dniach (domyślnie: 180;
+      0 wyłącza usuwanie według wieku)
+    - MEMORY_MAX_ENTRIES: Maksymalna liczba wpisów magazynu (domyślnie: 10000;
+      0 - bez limitu)
+    - MEMORY_DEDUP_SIMILARITY: Próg podobieństwa embeddingów uznawanych
+      za duplikat (domyślnie: 0.97)
+    - MEMORY_MAINTENANCE_INTERVAL_HOURS: Minimalny odstęp automatycznego
+      utrzymania (domyślnie: 24; 0 wyłącza utrzymanie automatyczne)
+"""
+
+import json
+import os
+import re
+import sqlite3
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_MEMORY_DIR = "./memory"
+LONG_TERM_DB = "long_term_mem_store.db"
+CHROMA_DB = "chroma.sqlite3"
+MAINTENANCE_LOG = "maintenance.jsonl"
+
+DEFAULT_RETENTION_DAYS = 180.0
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_DEDUP_SIMILARITY = 0.97
+DEFAULT_INTERVAL_HOURS = 24.0
+
+FIRST_SEEN_KEY = "maintenance_first_seen"
+
+# Liczba zapytań próbnych przy pomiarze czasu wyszukiwania
+LATENCY_SAMPLES = 20
+# Wiersze macierzy podobieństw liczone naraz przy deduplikacji embeddingów
+SIMILARITY_BLOCK = 1024
+
+_NON_WORD = re.compile(r"\W+")
+
+
+@dataclass
+class MaintenancePolicy:
+    """
+    Polityka retencji magazynów pamięci.
+
+    Atrybuty:
+        retention_days: Maksymalny wiek wpisu (0 - bez limitu)
+        max_entries: Maksymalna liczba wpisów magazynu (0 - bez limitu)
+        dedup_similarity: Próg podobieństwa kosinusowego duplikatów
+        interval_hours: Minimalny odstęp utrzymania automatycznego (0 - wyłączone)
+    """
+
+    retention_days: float = DEFAULT_RETENTION_DAYS
+    max_entries: int = DEFAULT_MAX_ENTRIES
+    dedup_similarity: float = DEFAULT_DEDUP_SIMILARITY
+    interval_hours: float = DEFAULT_INTERVAL_HOURS
+
+    @classmethod
+    def from_env(cls) -> "MaintenancePolicy":
+        return cls(
+            retention_days=float(os.getenv("MEMORY_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)),
+            max_entries=int(os.getenv("MEMORY_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            dedup_similarity=float(
+                os.getenv("MEMORY_DEDUP_SIMILARITY", DEFAULT_DEDUP_SIMILARITY)
+            ),
+            interval_hours=float(
+                os.getenv("MEMORY_MAINTENANCE_INTERVAL_HOURS", DEFAULT_INTERVAL_HOURS)
+            ),
+        )
+
+    def cutoff(self, now: float) -> Optional[float]:
+        """Czas (epoch), przed którym wpisy są usuwane, lub None bez limitu wieku."""
+        return now - self.retention_days * 24 * 60 * 60 if self.retention_days > 0 else None
+
+
+@dataclass
+class StoreReport:
+    """
+    Wynik utrzymania jednego magazynu (tabeli SQLite lub kolekcji ChromaDB).
+
+    Atrybuty:
+        store: Nazwa magazynu
+        entries_before: Liczba wpisów przed utrzymaniem
+        entries_after: Liczba wpisów po utrzymaniu
+        expired: Wpisy usunięte według wieku
+        duplicates: Usunięte duplikaty
+        trimmed: Wpisy usunięte ponad limit liczby
+        latency_before_ms: Mediana czasu wyszukiwania przed utrzymaniem
+        latency_after_ms: Mediana czasu wyszukiwania po utrzymaniu
+        skipped: Powód pominięcia magazynu (None - wykonano)
+    """
+
+    store: str
+    entries_before: int = 0
+    entries_after: int = 0
+    expired: int = 0
+    duplicates: int = 0
+    trimmed: int = 0
+    latency_before_ms: Optional[float] = None
+    latency_after_ms: Optional[float] = None
+    skipped: Optional[str] = None
+
+
+@dataclass
+class FileReport:
+    """Wynik VACUUM jednej bazy SQLite (rozmiar z plikiem WAL)."""
+
+    path: str
+    bytes_before: int
+    bytes_after: int
+    skipped: Optional[str] = None
+
+
+@dataclass
+class MaintenanceReport:
+    """
+    Podsumowanie przebiegu utrzymania pamięci.
+
+    Atrybuty:
+        started_at: Czas rozpoczęcia (epoch)
+        duration: Czas trwania w sekundach
+        stores: Wyniki magazynów
+        files: Wyniki VACUUM baz SQLite
+    """
+
+    started_at: float
+    duration: float = 0.0
+    stores: List[StoreReport] = field(default_factory=list)
+    files: List[FileReport] = field(default_factory=list)
+
+    @property
+    def removed(self) -> int:
+        return sum(s.expired + s.duplicates + s.trimmed for s in self.stores)
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return sum(f.bytes_before - f.bytes_after for f in self.files)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "removed": self.removed, "bytes_reclaimed": self.bytes_reclaimed}
+
+    def summary(self) -> str:
+        def latency(value: Optional[float]) -> str:
+            return "-" if value is None else f"{value:.2f}"
+
+        lines = [
+            f"{'Magazyn':<40} {'Przed':>7} {'Po':>7} {'Wiek':>6} {'Dupl.':>6} "
+            f"{'Limit':>6} {'ms przed':>9} {'ms po':>7}"
+        ]
+        for s in self.stores:
+            if s.skipped:
+                lines.append(f"{s.store:<40} pominięto: {s.skipped}")
+                continue
+            lines.append(
+                f"{s.store:<40} {s.entries_before:>7} {s.entries_after:>7} {s.expired:>6} "
+                f"{s.duplicates:>6} {s.trimmed:>6} {latency(s.latency_before_ms):>9} "
+                f"{latency(s.latency_after_ms):>7}"
+            )
+        lines.append(
+            f"Usunięto {self.removed} wpisów, odzyskano {self.bytes_reclaimed / 1024:.0f} KB "
+            f"w {self.duration:.2f} s"
+        )
+        return "\n".join(lines)
+
+
+# ============================================================================
+# POMOCNICZE
+# ============================================================================
+
+
+def _median_ms(query: Callable[[Any], Any], samples: Sequence[Any]) -> Optional[float]:
+    """Mediana czasu wykonania zapytania dla próbek (w milisekundach)."""
+    timings = []
+    for sample in samples:
+        start = time.perf_counter()
+        query(sample)
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 4) if timings else None
+
+
+def _sample(values: Sequence[Any], count: int = LATENCY_SAMPLES) -> List[Any]:
+    """Równomiernie rozłożona próbka (powtarzalna między pomiarami przed i po)."""
+    if len(values) <= count:
+        return list(values)
+    step = len(values) / count
+    return [values[int(index * step)] for index in range(count)]
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    """
+    Czas wpisu pamięci długoterminowej jako epoch.
+
+    CrewAI zapisuje kolumnę datetime jako tekst z time.time(), ale starsze
+    wpisy mogą mieć format ISO. Nieczytelne wartości dają None - takie wpisy
+    nigdy nie są usuwane według wieku.
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+def _text_key(text: str) -> str:
+    """Klucz prawie identycznych tekstów: małe litery, bez interpunkcji i odstępów."""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def _metadata_key(metadata: Optional[str]) -> str:
+    """Klucz metadanych wpisu bez oceny jakości (różni się między podobnymi wpisami)."""
+    try:
+        data = json.loads(metadata or "")
+    except ValueError:
+        return _text_key(metadata or "")
+    if isinstance(data, dict):
+        data.pop("quality", None)
+    return _text_key(json.dumps(data, sort_keys=True, ensure_ascii=False))
+
+
+# ============================================================================
+# PAMIĘĆ DŁUGOTERMINOWA (SQLITE)
+# ============================================================================
+
+# Zapytanie LTMSQLiteStorage.load - pamięć długoterminowa wyszukuje wpisy
+# po dokładnym opisie zadania
+LONG_TERM_QUERY = (
+    "SELECT metadata, datetime, score FROM long_term_memories "
+    "WHERE task_description = ? ORDER BY datetime DESC, score ASC LIMIT 3"
+)
+
+
+def maintain_long_term(path: Path, policy: MaintenancePolicy, now: float) -> StoreReport:
+    """Porządkuje tabelę long_term_memories bazy pamięci długoterminowej."""
+    report = StoreReport(store=path.name)
+    if not path.exists():
+        report.skipped = "brak bazy"
+        return report
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'long_term_memories'"
+        ).fetchone()
+        if not exists:
+            report.skipped = "brak tabeli long_term_memories"
+            return report
+
+        rows = conn.execute(
+            "SELECT id, task_description, metadata, datetime FROM long_term_memories"
+        ).fetchall()
+        report.entries_before = len(rows)
+        tasks = _sample(sorted({row[1] for row in rows if row[1] is not None}))
+
+        def lookup(task: str) -> None:
+            conn.execute(LONG_TERM_QUERY, (task,)).fetchall()
+
+        report.latency_before_ms = _median_ms(lookup, tasks)
+
+        # Od najnowszego: pierwszy wpis o danym kluczu zostaje, kolejne to duplikaty
+        rows.sort(key=lambda row: (_timestamp(row[3]) or 0.0, row[0]), reverse=True)
+        cutoff = policy.cutoff(now)
+        expired, duplicates, kept, seen = [], [], [], set()
+        for row_id, task, metadata, created in rows:
+            timestamp = _timestamp(created)
+            key = (_text_key(task or ""), _metadata_key(metadata))
+            if cutoff is not None and timestamp is not None and timestamp < cutoff:
+                expired.append(row_id)
+            elif key in seen:
+                duplicates.append(row_id)
+            else:
+                seen.add(key)
+                kept.append(row_id)
+        trimmed = kept[policy.max_entries:] if policy.max_entries > 0 else []
+
+        with conn:
+            conn.executemany(
+                "DELETE FROM long_term_memories WHERE id = ?",
+                [(row_id,) for row_id in expired + duplicates + trimmed],
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_long_term_memories_task "
+                "ON long_term_memories (task_description, datetime)"
+            )
+        report.expired, report.duplicates, report.trimmed = (
+            len(expired), len(duplicates), len(trimmed)
+        )
+        report.entries_after = conn.execute(
+            "SELECT COUNT(*) FROM long_term_memories"
+        ).fetchone()[0]
+        report.latency_after_ms = _median_ms(lookup, tasks)
+    finally:
+        conn.close()
+    return report
+
+
+# ============================================================================
+# KOLEKCJE CHROMADB (PAMIĘĆ KRÓTKOTERMINOWA I ENCJI)
+# ============================================================================
+
+
+def _duplicate_rows(embeddings: np.ndarray, threshold: float) -> set:
+    """
+    Indeksy wierszy będących duplikatami wcześniejszych wierszy.
+
+    Wiersze muszą być uporządkowane od najnowszego - zachowywany jest pierwszy
+    (najnowszy) wpis z każdej grupy podobnych. Macierz podobieństw jest
+    liczona blokami, więc pamięć nie rośnie kwadratowo z rozmiarem kolekcji.
+    """
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    unit = embeddings / np.where(norms == 0, 1.0, norms)
+    partners: Dict[int, np.ndarray] = {}
+    for start in range(0, len(unit), SIMILARITY_BLOCK):
+        similarity = unit[start:start + SIMILARITY_BLOCK] @ unit.T
+        for offset, row in enumerate(similarity):
+            later = np.nonzero(row[start + offset + 1:] >= threshold)[0]
+            if len(later):
+                partners[start + offset] = later + start + offset + 1
+    removed: set = set()
+    for index in sorted(partners):
+        if index not in removed:
+            removed.update(partners[index].tolist())
+    return removed
+
+
+def maintain_collection(collection: Any, policy: MaintenancePolicy, now: float) -> StoreReport:
+    """Porządkuje jedną kolekcję ChromaDB."""
+    report = StoreReport(store=f"chroma:{collection.name}")
+    data = collection.get(include=["metadatas", "documents", "embeddings"])
+    ids = list(data["ids"])
+    report.entries_before = report.entries_after = len(ids)
+    if not ids:
+        return report
+    metadatas = [dict(metadata or {}) for metadata in data["metadatas"]]
+    documents = [document or "" for document in data["documents"]]
+    embeddings = np.asarray(data["embeddings"], dtype=np.float32)
+    samples = [vector.tolist() for vector in _sample(embeddings)]
+
+    def lookup(vector: List[float]) -> None:
+        collection.query(query_embeddings=[vector], n_results=min(3, len(ids)))
+
+    report.latency_before_ms = _median_ms(lookup, samples)
+
+    # Wpisy bez znacznika dostają czas bieżącego przebiegu - od niego liczony jest wiek
+    unstamped = [index for index, metadata in enumerate(metadatas) if FIRST_SEEN_KEY not in metadata]
+    for index in unstamped:
+        metadatas[index][FIRST_SEEN_KEY] = now
+    if unstamped:
+        collection.update(
+            ids=[ids[index] for index in unstamped],
+            metadatas=[metadatas[index] for index in unstamped],
+        )
+
+    # Od najnowszego (późniejsza pozycja w kolekcji przy równym czasie)
+    order = sorted(
+        range(len(ids)), key=lambda index: (metadatas[index][FIRST_SEEN_KEY], index), reverse=True
+    )
+    cutoff = policy.cutoff(now)
+    expired = [i for i in order if cutoff is not None and metadatas[i][FIRST_SEEN_KEY] < cutoff]
+    alive = [i for i in order if cutoff is None or metadatas[i][FIRST_SEEN_KEY] >= cutoff]
+
+    duplicates, seen_texts = set(), set()
+    for index in alive:
+        key = _text_key(documents[index])
+        if key in seen_texts:
+            duplicates.add(index)
+        seen_texts.add(key)
+    if policy.dedup_similarity < 1.0 and len(alive) > 1:
+        similar = _duplicate_rows(embeddings[alive], policy.dedup_similarity)
+        duplicates.update(alive[position] for position in similar)
+    kept = [index for index in alive if index not in duplicates]
+    trimmed = kept[policy.max_entries:] if policy.max_entries > 0 else []
+
+    removed = expired + sorted(duplicates) + trimmed
+    if removed:
+        collection.delete(ids=[ids[index] for index in removed])
+    report.expired, report.duplicates, report.trimmed = (
+        len(expired), len(duplicates), len(trimmed)
+    )
+    report.entries_after = collection.count()
+    if report.entries_after:
+        report.latency_after_ms = _median_ms(lookup, samples)
+    return report
+
+
+def chroma_directory() -> Path:
+    """
+    Katalog ChromaDB magazynów RAGStorage.
+
+    CrewAI 1.5 ignoruje parametr path magazynu RAGStorage - Chroma leży
+    w katalogu danych aplikacji (db_storage_path(): appdirs lub
+    CREWAI_STORAGE_DIR), a nie w katalogu pamięci załogi. Klient Chroma
+    używa ścieżki wyliczonej przy imporcie CrewAI, więc odczytujemy ją
+    z tej samej stałej, a nie wołamy db_storage_path() ponownie.
+    """
+    from crewai.rag.chromadb.constants import DEFAULT_STORAGE_PATH
+
+    return Path(DEFAULT_STORAGE_PATH)
+
+
+def maintain_vector_stores(chroma_dir: Path, policy: MaintenancePolicy, now: float) -> List[StoreReport]:
+    """Porządkuje wszystkie kolekcje ChromaDB w katalogu Chroma."""
+    if not (chroma_dir / CHROMA_DB).exists():
+        return []
+    import chromadb
+    from chromadb.config import Settings
+
+    try:
+        # Ustawienia jak w crewai.rag.chromadb.config - klient otwarty przez
+        # RAGStorage w tym samym procesie jest wtedy współdzielony
+        client = chromadb.PersistentClient(
+            path=str(chroma_dir),
+            settings=Settings(
+                persist_directory=str(chroma_dir), allow_reset=True, is_persistent=True
+            ),
+        )
+    except ValueError as e:
+        # Klient o innych ustawieniach jest już otwarty w tym procesie
+        return [StoreReport(store="chroma", skipped=str(e))]
+    reports = []
+    for collection in client.list_collections():
+        if isinstance(collection, str):  # chromadb >= 0.6 zwraca same nazwy
+            collection = client.get_collection(collection)
+        reports.append(maintain_collection(collection, policy, now))
+    return reports
+
+
+# ============================================================================
+# VACUUM BAZ SQLITE
+# ============================================================================
+
+
+def _size(path: Path) -> int:
+    wal = path.with_name(path.name + "-wal")
+    return path.stat().st_size + (wal.stat().st_size if wal.exists() else 0)
+
+
+def vacuum_database(path: Path) -> FileReport:
+    """
+    Wykonuje VACUUM i PRAGMA optimize na jednej bazie SQLite.
+
+    Baza zablokowana przez inny proces jest pomijana - VACUUM wymaga
+    wyłącznego dostępu, a utrzymanie nie może zatrzymać uruchomienia załogi.
+    """
+    report = FileReport(path=str(path), bytes_before=_size(path), bytes_after=0)
+    try:
+        conn = sqlite3.connect(path, timeout=5)
+        try:
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("PRAGMA optimize")
+        finally:
+            conn.close()
+    except sqlite3.OperationalError as e:
+        report.skipped = str(e)
+    report.bytes_after = _size(path)
+    return report
+
+
+def vacuum_databases(memory_dir: Path) -> List[FileReport]:
+    """Wykonuje VACUUM na wszystkich bazach SQLite w katalogu pamięci."""
+    paths = sorted({*memory_dir.rglob("*.db"), *memory_dir.rglob("*.sqlite3")})
+    return [vacuum_database(path) for path in paths]
+
+
+# ============================================================================
+# PRZEBIEG UTRZYMANIA
+# ============================================================================
+
+
+def run_maintenance(
+    memory_dir: str = DEFAULT_MEMORY_DIR,
+    policy: Optional[MaintenancePolicy] = None,
+    chroma_dir: Optional[str] = None,
+) -> MaintenanceReport:
+    """
+    Porządkuje wszystkie magazyny pamięci i dopisuje raport do maintenance.jsonl.
+
+    Args:
+        memory_dir: Katalog pamięci załogi
+        policy: Polityka retencji (domyślnie ze zmiennych środowiskowych)
+        chroma_dir: Katalog ChromaDB (domyślnie katalog CrewAI - chroma_directory())
+    """
+    policy = policy or MaintenancePolicy.from_env()
+    directory = Path(memory_dir)
+    chroma = Path(chroma_dir) if chroma_dir else chroma_directory()
+    now = time.time()
+    start = time.perf_counter()
+    report = MaintenanceReport(started_at=now)
+    report.stores.append(maintain_long_term(directory / LONG_TERM_DB, policy, now))
+    report.stores.extend(maintain_vector_stores(chroma, policy, now))
+    if directory.exists():
+        report.files = vacuum_databases(directory)
+        chroma_db = chroma / CHROMA_DB
+        if chroma_db.exists() and not chroma.resolve().is_relative_to(directory.resolve()):
+            report.files.append(vacuum_database(chroma_db))
+        report.duration = round(time.perf_counter() - start, 4)
+        with (directory / MAINTENANCE_LOG).open("a", encoding="utf-8") as log:
+            log.write(json.dumps(report.to_dict(), ensure_ascii=False) + "\n")
+    return report
+
+
+def last_maintenance(memory_dir: str = DEFAULT_MEMORY_DIR) -> Optional[float]:
+    """Czas (epoch) ostatniego przebiegu utrzymania z maintenance.jsonl."""
+    path = Path(memory_dir) / MAINTENANCE_LOG
+    if not path.exists():
+        return None
+    lines = path.read_text(encoding="utf-8").strip().splitlines()
+    return json.loads(lines[-1])["started_at"] if lines else None
+
+
+def maintain_if_due(
+    memory_dir: str = DEFAULT_MEMORY_DIR,
+    policy: Optional[MaintenancePolicy] = None,
+) -> Optional[MaintenanceReport]:
+    """
+    Uruchamia utrzymanie, jeśli od ostatniego minęło interval_hours.
+
+    Returns:
+        Raport lub None, jeśli utrzymanie nie było potrzebne albo jest wyłączone
+    """
+    policy = policy or MaintenancePolicy.from_env()
+    if policy.interval_hours <= 0 or not Path(memory_dir).exists():
+        return None
+    last = last_maintenance(memory_dir)
+    if last is not None and time.time() - last < policy.interval_hours * 60 * 60:
+        return None
+    return run_maintenance(memory_dir, policy)
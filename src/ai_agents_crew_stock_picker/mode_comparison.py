@@ -0,0 +1,165 @@
+"""
+Porównanie trybów wykonania załogi na tych samych danych wejściowych.
+
+Tryb hierarchiczny dodaje rundy LLM managera (planowanie i delegowanie),
+a tryb potoku wykonuje zadania bezpośrednio według grafu context.
+Ten moduł uruchamia załogę w każdym trybie i zestawia czas wykonania
+oraz zużycie tokenów, aby różnicę można było zmierzyć, a nie zgadywać.
+
+Każde uruchomienie działa na własnym, pustym stanie (<output_root>/<tryb>/state):
+rejestrze firm, magazynie analiz, cache wyszukiwania i odpowiedzi LLM oraz
+pamięci załogi - inaczej drugi tryb korzystałby z analiz, trafień w cache
+i wspomnień pierwszego, a firma wybrana przez pierwszy byłaby dla niego
+pominięta. Przy kilku powtórzeniach kolejność trybów jest naprzemienna,
+aby żaden tryb nie był systematycznie uruchamiany jako pierwszy
+(rozgrzewka procesu, zmienne opóźnienia API).
+"""
+
+import json
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+from ai_agents_crew_stock_picker.crew import EXECUTION_MODES, AiAgentsCrewStockPicker
+
+DEFAULT_COMPARISON_ROOT = "output/compare"
+
+
+@dataclass
+class ModeRun:
+    """
+    Pomiar pojedynczego uruchomienia załogi w danym trybie.
+
+    Atrybuty:
+        mode: Tryb wykonania ("hierarchical" lub "pipeline")
+        duration: Czas wykonania w sekundach
+        total_tokens: Łączna liczba tokenów
+        prompt_tokens: Tokeny wejściowe (prompt)
+        completion_tokens: Tokeny wyjściowe (odpowiedzi)
+        llm_requests: Liczba udanych wywołań LLM
+        repeat: Numer powtórzenia (od 0)
+    """
+
+    mode: str
+    duration: float
+    total_tokens: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_requests: int = 0
+    repeat: int = 0
+
+
+@dataclass
+class ModeComparisonReport:
+    """Zestawienie pomiarów wszystkich porównywanych trybów."""
+
+    inputs: Dict[str, Any]
+    runs: List[ModeRun] = field(default_factory=list)
+
+    def averages(self) -> List[ModeRun]:
+        """Średnie pomiary każdego trybu ze wszystkich powtórzeń (w kolejności trybów)."""
+        modes = list(dict.fromkeys(run.mode for run in self.runs))
+        averaged = []
+        for mode in modes:
+            runs = [run for run in self.runs if run.mode == mode]
+            averaged.append(
+                ModeRun(
+                    mode=mode,
+                    duration=statistics.mean(run.duration for run in runs),
+                    total_tokens=round(statistics.mean(run.total_tokens for run in runs)),
+                    prompt_tokens=round(statistics.mean(run.prompt_tokens for run in runs)),
+                    completion_tokens=round(
+                        statistics.mean(run.completion_tokens for run in runs)
+                    ),
+                    llm_requests=round(statistics.mean(run.llm_requests for run in runs)),
+                    repeat=len(runs),
+                )
+            )
+        return averaged
+
+    def to_table(self) -> str:
+        """Zwraca tabelę porównawczą (średnie z powtórzeń) do wyświetlenia w konsoli."""
+        header = (
+            f"{'Tryb':<14}{'Powt.':>6}{'Czas [s]':>10}{'Tokeny':>10}{'Prompt':>10}"
+            f"{'Odp.':>10}{'Wywołania':>11}"
+        )
+        lines = [header, "-" * len(header)]
+        for run in self.averages():
+            lines.append(
+                f"{run.mode:<14}{run.repeat:>6}{run.duration:>10.1f}{run.total_tokens:>10}"
+                f"{run.prompt_tokens:>10}{run.completion_tokens:>10}{run.llm_requests:>11}"
+            )
+        return "\n".join(lines)
+
+    def save(self, path: str) -> None:
+        """Zapisuje raport (wszystkie uruchomienia i średnie) w formacie JSON."""
+        data = {**asdict(self), "averages": [asdict(run) for run in self.averages()]}
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def mode_order(modes: Sequence[str], repeats: int) -> List[Tuple[int, str]]:
+    """
+    Kolejność uruchomień: (powtórzenie, tryb), co drugie powtórzenie odwrócone.
+
+    Przykład: ("a", "b") x 2 -> (0, a), (0, b), (1, b), (1, a)
+    """
+    order = []
+    for repeat in range(repeats):
+        round_modes = list(modes) if repeat % 2 == 0 else list(reversed(modes))
+        order.extend((repeat, mode) for mode in round_modes)
+    return order
+
+
+def compare_modes(
+    inputs: Dict[str, Any],
+    modes: Sequence[str] = EXECUTION_MODES,
+    output_root: str = DEFAULT_COMPARISON_ROOT,
+    repeats: int = 1,
+) -> ModeComparisonReport:
+    """
+    Uruchamia załogę kolejno w każdym trybie i mierzy czas oraz tokeny.
+
+    Tryby są uruchamiane sekwencyjnie, aby nie konkurowały o limity API
+    i nie zaburzały sobie nawzajem pomiarów czasu.
+
+    Args:
+        inputs: Dane wejściowe załogi (takie same dla każdego trybu)
+        modes: Tryby do porównania
+        output_root: Katalog bazowy - każdy tryb zapisuje wyniki w podkatalogu
+        repeats: Liczba powtórzeń każdego trybu (kolejność naprzemienna)
+
+    Returns:
+        ModeComparisonReport z pomiarami każdego uruchomienia
+    """
+    report = ModeComparisonReport(inputs=inputs)
+    for repeat, mode in mode_order(modes, repeats):
+        crew_instance = AiAgentsCrewStockPicker()
+        crew_instance.execution_mode = mode
+        crew_instance.output_dir = str(Path(output_root) / mode)
+        # Pusty stan przed każdym uruchomieniem - bez analiz, cache i pamięci poprzednich
+        crew_instance.use_isolated_state(str(Path(output_root) / mode / "state"), fresh=True)
+
+        try:
+            start = time.perf_counter()
+            result = crew_instance.crew().kickoff(inputs=inputs)
+            duration = time.perf_counter() - start
+        finally:
+            crew_instance.close()
+
+        usage = result.token_usage
+        report.runs.append(
+            ModeRun(
+                mode=mode,
+                duration=duration,
+                total_tokens=usage.total_tokens,
+                prompt_tokens=usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens,
+                llm_requests=usage.successful_requests,
+                repeat=repeat,
+            )
+        )
+    report.save(str(Path(output_root) / "comparison.json"))
+    return report
@@ -0,0 +1,230 @@
+"""
+Dyspozytor powiadomień push działający w tle.
+
+Dotychczas PushNotificationTool przy każdym wywołaniu odczytywał zmienne
+środowiskowe i wysyłał osobne requests.post() bez ponownego użycia połączenia
+i bez ponowień - blokując wątek agenta na czas odpowiedzi Pushover.
+Przy wielu równoległych przeglądach sektorów wywołania ustawiały się
+w kolejce i przekraczały limit czasu.
+
+Dyspozytor:
+- zwraca sterowanie agentowi natychmiast (kolejka + wątek w tle)
+- używa jednej sesji HTTP z pulą połączeń
+- łączy powiadomienia z jednego uruchomienia w zbiorcze podsumowanie (digest)
+- ponawia nieudane żądania z wykładniczym odstępem (backoff)
+- ogranicza tempo wysyłki (minimalny odstęp między żądaniami)
+
+Zmienne środowiskowe:
+    - PUSHOVER_USER, PUSHOVER_TOKEN: Dane uwierzytelniające (wymagane)
+    - PUSHOVER_URL: URL API (domyślnie Pushover; np. lokalny serwer w testach)
+    - PUSHOVER_COALESCE_SECONDS: Okno łączenia powiadomień (domyślnie: 2)
+    - PUSHOVER_MIN_INTERVAL: Minimalny odstęp między żądaniami w s (domyślnie: 1)
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_PUSHOVER_URL = "https://api.pushover.net/1/messages.json"
+DEFAULT_COALESCE_SECONDS = 2.0
+DEFAULT_MIN_INTERVAL = 1.0
+DEFAULT_RUN_ID = "default"
+
+# Limit długości wiadomości Pushover (znaki)
+MAX_MESSAGE_LENGTH = 1024
+
+
+@dataclass
+class _PendingDigest:
+    """Powiadomienia jednego uruchomienia oczekujące na wysłanie."""
+
+    messages: List[str] = field(default_factory=list)
+    last_added: float = 0.0
+
+
+class NotificationDispatcher:
+    """
+    Asynchroniczny, zbiorczy wysyłacz powiadomień Pushover.
+
+    Atrybuty:
+        url: Adres API (PUSHOVER_URL)
+        coalesce_seconds: Czas bez nowych wiadomości, po którym digest jest wysyłany
+        min_interval: Minimalny odstęp między kolejnymi żądaniami HTTP
+        sent: Liczba wysłanych żądań
+        failed: Liczba żądań nieudanych mimo ponowień
+    """
+
+    def __init__(
+        self,
+        user: Optional[str],
+        token: Optional[str],
+        url: str = DEFAULT_PUSHOVER_URL,
+        coalesce_seconds: float = DEFAULT_COALESCE_SECONDS,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        retries: int = 3,
+        timeout: float = 10.0,
+    ):
+        self.user = user
+        self.token = token
+        self.url = url
+        self.coalesce_seconds = coalesce_seconds
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.sent = 0
+        self.failed = 0
+
+        # Jedna sesja z pulą połączeń; ponowienia z backoff dla błędów
+        # przejściowych i limitów (429). POST nie jest domyślnie ponawiany.
+        self._session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"POST"}),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=1, pool_maxsize=4)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._pending: Dict[str, _PendingDigest] = {}
+        self._last_sent_at = 0.0
+        self._idle = threading.Event()
+        self._idle.set()
+        self._worker = threading.Thread(target=self._loop, name="push-dispatcher", daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def from_env(cls) -> "NotificationDispatcher":
+        """Tworzy dyspozytora na podstawie zmiennych środowiskowych (odczyt raz)."""
+        return cls(
+            user=os.getenv("PUSHOVER_USER"),
+            token=os.getenv("PUSHOVER_TOKEN"),
+            url=os.getenv("PUSHOVER_URL", DEFAULT_PUSHOVER_URL),
+            coalesce_seconds=float(
+                os.getenv("PUSHOVER_COALESCE_SECONDS", DEFAULT_COALESCE_SECONDS)
+            ),
+            min_interval=float(os.getenv("PUSHOVER_MIN_INTERVAL", DEFAULT_MIN_INTERVAL)),
+        )
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.user and self.token)
+
+    # ------------------------------------------------------------------------
+    # API dla narzędzia
+    # ------------------------------------------------------------------------
+
+    def submit(self, message: str, run_id: str = DEFAULT_RUN_ID) -> None:
+        """Dodaje powiadomienie do kolejki i natychmiast wraca."""
+        self._idle.clear()
+        self._queue.put(("message", run_id, message))
+
+    def flush(self, run_id: Optional[str] = None, timeout: float = 30.0) -> bool:
+        """
+        Wysyła od razu oczekujące digesty (wszystkie lub jednego uruchomienia).
+
+        Returns:
+            True, jeśli kolejka została opróżniona przed upływem timeout
+        """
+        self._idle.clear()
+        self._queue.put(("flush", run_id, None))
+        return self._idle.wait(timeout)
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Wysyła wszystkie oczekujące powiadomienia i zamyka sesję HTTP."""
+        self.flush(timeout=timeout)
+        self._session.close()
+
+    # ------------------------------------------------------------------------
+    # Wątek roboczy
+    # ------------------------------------------------------------------------
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                kind, run_id, message = self._queue.get(timeout=self._next_wakeup())
+            except queue.Empty:
+                kind, run_id, message = "tick", None, None
+
+            if kind == "message":
+                digest = self._pending.setdefault(run_id, _PendingDigest())
+                digest.messages.append(message)
+                digest.last_added = time.monotonic()
+            elif kind == "flush":
+                for pending_id in list(self._pending):
+                    if run_id is None or pending_id == run_id:
+                        self._send_digest(pending_id)
+
+            now = time.monotonic()
+            for pending_id, digest in list(self._pending.items()):
+                if now - digest.last_added >= self.coalesce_seconds:
+                    self._send_digest(pending_id)
+
+            if not self._pending and self._queue.empty():
+                self._idle.set()
+
+    def _next_wakeup(self) -> Optional[float]:
+        """Czas do najbliższego digestu gotowego do wysłania (None - czekaj dowolnie)."""
+        if not self._pending:
+            return None
+        oldest = min(digest.last_added for digest in self._pending.values())
+        return max(0.0, oldest + self.coalesce_seconds - time.monotonic())
+
+    def _send_digest(self, run_id: str) -> None:
+        digest = self._pending.pop(run_id)
+        if len(digest.messages) == 1:
+            text = digest.messages[0]
+        else:
+            text = "\n".join(f"• {message}" for message in digest.messages)
+        self._post(text[:MAX_MESSAGE_LENGTH])
+
+    def _post(self, message: str) -> None:
+        """Wysyła jedno żądanie z zachowaniem limitu tempa."""
+        if not self.configured:
+            print(
+                "Błąd: Brak wymaganych zmiennych środowiskowych: "
+                "PUSHOVER_USER i/lub PUSHOVER_TOKEN"
+            )
+            self.failed += 1
+            return
+
+        wait = self._last_sent_at + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            response = self._session.post(
+                self.url,
+                data={"user": self.user, "token": self.token, "message": message},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            self.sent += 1
+        except requests.exceptions.RequestException as e:
+            print(f"Błąd: Błąd podczas wysyłania powiadomienia: {e}")
+            self.failed += 1
+        finally:
+            self._last_sent_at = time.monotonic()
+
+
+@lru_cache(maxsize=None)
+def shared_dispatcher() -> NotificationDispatcher:
+    """
+    Zwraca jednego dyspozytora na proces.
+
+    Przy zamykaniu procesu oczekujące powiadomienia są wysyłane (atexit),
+    więc krótkie uruchomienie CLI nie gubi decyzji wysłanej tuż przed końcem.
+    """
+    dispatcher = NotificationDispatcher.from_env()
+    atexit.register(dispatcher.close)
+    return dispatcher
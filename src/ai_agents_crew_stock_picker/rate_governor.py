@@ -0,0 +1,411 @@
+"""
+Wspólny ogranicznik tempa i adaptacyjnej współbieżności dla LLM i Serper.
+
+Przy równoległych załogach (tryb wsadowy, fan-out) wszyscy agenci
+gpt-4o-mini i narzędzia wyszukiwania trafiają w limity dostawców
+jednocześnie. Każde wywołanie ponawia wtedy żądania na własną rękę,
+a przepustowość skacze między falą żądań a długim wycofaniem.
+
+Ten moduł udostępnia jeden "gubernator" na dostawcę i proces:
+- kubełek żetonów (token bucket) dla żądań na minutę (RPM) i tokenów na minutę (TPM)
+- limit jednoczesnych wywołań dostosowywany metodą AIMD: po każdym udanym
+  wywołaniu limit rośnie addytywnie, a po błędzie 429 lub skoku opóźnienia
+  maleje multiplikatywnie (tempo żądań jest korygowane tak samo)
+- metryki: bieżące limity, liczba wywołań w toku i długość kolejki
+
+Zmienne środowiskowe (opcjonalne; 0 w limitach RPM/TPM/QPS wyłącza limit):
+    - LLM_RPM: Żądania LLM na minutę (domyślnie: 500)
+    - LLM_TPM: Tokeny LLM na minutę (domyślnie: 200000)
+    - LLM_MAX_CONCURRENCY: Maksymalna liczba jednoczesnych wywołań LLM (domyślnie: 8)
+    - SEARCH_QPS: Zapytania Serper na sekundę (domyślnie: 5)
+    - SEARCH_MAX_CONCURRENCY: Maksymalna liczba jednoczesnych wyszukiwań (domyślnie: 4)
+    - RATE_LIMIT_RETRIES: Liczba ponowień po błędzie 429 (domyślnie: 3)
+"""
+
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, TypeVar, Union
+
+from crewai import LLM
+from crewai.llms.base_llm import BaseLLM
+from crewai.types.usage_metrics import UsageMetrics
+
+DEFAULT_LLM_RPM = 500
+DEFAULT_LLM_TPM = 200_000
+DEFAULT_LLM_MAX_CONCURRENCY = 8
+DEFAULT_SEARCH_QPS = 5
+DEFAULT_SEARCH_MAX_CONCURRENCY = 4
+DEFAULT_RETRIES = 3
+
+# Parametry AIMD: spadek o połowę po przeciążeniu, powrót do pełnego tempa
+# po około 1 / INCREASE_STEP udanych wywołaniach
+DECREASE_FACTOR = 0.5
+INCREASE_STEP = 0.02
+MIN_RATE_FRACTION = 0.1
+
+# Wywołanie dłuższe niż LATENCY_SPIKE_FACTOR x średnie opóźnienie
+# traktujemy jak sygnał przeciążenia dostawcy
+LATENCY_SPIKE_FACTOR = 3.0
+LATENCY_SMOOTHING = 0.2
+
+# Szacunek tokenów odpowiedzi rezerwowanych przed wywołaniem LLM
+RESPONSE_TOKENS_ESTIMATE = 500
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Kubełek żetonów z rezerwacją z góry.
+
+    acquire() pobiera żetony od razu (saldo może spaść poniżej zera)
+    i zwraca czas oczekiwania na ich odnowienie. Kolejne wywołania
+    ustawiają się więc w kolejce zamiast konkurować o ten sam żeton.
+
+    Atrybuty:
+        rate: Odnawianie żetonów na sekundę (0 - bez limitu)
+        capacity: Maksymalna liczba zgromadzonych żetonów (wielkość serii)
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Rezerwuje żetony i zwraca czas (s), jaki trzeba odczekać przed wywołaniem."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Koryguje saldo po wywołaniu (np. gdy odpowiedź była dłuższa niż szacunek)."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+    def pause(self, seconds: float) -> None:
+        """Wstrzymuje wydawanie żetonów na podany czas (np. Retry-After)."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+    def set_rate(self, rate: float) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Rozpoznaje błąd limitu dostawcy (HTTP 429) niezależnie od biblioteki klienta."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status == 429:
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return "ratelimit" in text or "rate limit" in text
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Odczytuje nagłówek Retry-After z odpowiedzi błędu, jeśli jest dostępny."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateGovernor:
+    """
+    Ogranicznik tempa i współbieżności wywołań jednego dostawcy.
+
+    Atrybuty:
+        name: Nazwa dostawcy w metrykach (np. "llm", "search")
+        max_rate: Pułap żądań na sekundę (0 - bez limitu)
+        max_concurrency: Pułap jednoczesnych wywołań
+        concurrency: Bieżący limit jednoczesnych wywołań (AIMD)
+        throttled: Liczba błędów 429
+        latency_spikes: Liczba wykrytych skoków opóźnienia
+        wait_seconds: Łączny czas oczekiwania wywołań na limit
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_second: float,
+        max_concurrency: int,
+        tokens_per_second: float = 0.0,
+        retries: int = DEFAULT_RETRIES,
+    ):
+        self.name = name
+        self.max_rate = requests_per_second
+        self.max_concurrency = max(1, max_concurrency)
+        self.retries = retries
+        self.concurrency = float(self.max_concurrency)
+        self.requests = TokenBucket(requests_per_second)
+        # Pojemność kubełka tokenów = limit na minutę, tak jak u dostawcy
+        self.tokens = TokenBucket(tokens_per_second, tokens_per_second * 60)
+        self.calls = 0
+        self.throttled = 0
+        self.latency_spikes = 0
+        self.wait_seconds = 0.0
+        self.peak_queue_depth = 0
+        self._in_flight = 0
+        self._waiting = 0
+        self._latency: Optional[float] = None
+        self._condition = threading.Condition()
+
+    @classmethod
+    def for_llm(cls) -> "RateGovernor":
+        """Gubernator wywołań LLM na podstawie zmiennych środowiskowych."""
+        return cls(
+            "llm",
+            requests_per_second=float(os.getenv("LLM_RPM", DEFAULT_LLM_RPM)) / 60,
+            tokens_per_second=float(os.getenv("LLM_TPM", DEFAULT_LLM_TPM)) / 60,
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_LLM_MAX_CONCURRENCY)),
+            retries=int(os.getenv("RATE_LIMIT_RETRIES", DEFAULT_RETRIES)),
+        )
+
+    @classmethod
+    def for_search(cls) -> "RateGovernor":
+        """Gubernator zapytań Serper na podstawie zmiennych środowiskowych."""
+        return cls(
+            "search",
+            requests_per_second=float(os.getenv("SEARCH_QPS", DEFAULT_SEARCH_QPS)),
+            max_concurrency=int(
+                os.getenv("SEARCH_MAX_CONCURRENCY", DEFAULT_SEARCH_MAX_CONCURRENCY)
+            ),
+            retries=int(os.getenv("RATE_LIMIT_RETRIES", DEFAULT_RETRIES)),
+        )
+
+    # ------------------------------------------------------------------------
+    # Wywołania
+    # ------------------------------------------------------------------------
+
+    def call(self, function: Callable[[], T], tokens: float = 0.0) -> T:
+        """
+        Wykonuje wywołanie dostawcy w granicach limitów.
+
+        Po błędzie 429 limity są zmniejszane, a wywołanie ponawiane
+        (do self.retries razy) - odstęp wynika już z obniżonego tempa.
+
+        Args:
+            function: Wywołanie dostawcy (bez argumentów)
+            tokens: Szacowana liczba tokenów wywołania (dla limitu TPM)
+        """
+        attempt = 0
+        while True:
+            self._enter(tokens)
+            started = time.monotonic()
+            try:
+                result = function()
+            except Exception as error:
+                self._leave()
+                if not is_rate_limit_error(error) or attempt >= self.retries:
+                    raise
+                attempt += 1
+                self._on_throttled(_retry_after(error))
+                continue
+            self._leave()
+            self._on_success(time.monotonic() - started)
+            return result
+
+    def _enter(self, tokens: float) -> None:
+        """Czeka na wolne miejsce (współbieżność), a następnie na żetony."""
+        waited = time.monotonic()
+        with self._condition:
+            self._waiting += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self._waiting)
+            while self._in_flight >= max(1, int(self.concurrency)):
+                self._condition.wait()
+            self._waiting -= 1
+            self._in_flight += 1
+        delay = max(self.requests.acquire(1), self.tokens.acquire(tokens))
+        if delay > 0:
+            time.sleep(delay)
+        with self._condition:
+            self.calls += 1
+            self.wait_seconds += time.monotonic() - waited
+
+    def _leave(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    # ------------------------------------------------------------------------
+    # AIMD
+    # ------------------------------------------------------------------------
+
+    def _on_success(self, latency: float) -> None:
+        with self._condition:
+            spike = (
+                self._latency is not None and latency > LATENCY_SPIKE_FACTOR * self._latency
+            )
+            self._latency = (
+                latency
+                if self._latency is None
+                else (1 - LATENCY_SMOOTHING) * self._latency + LATENCY_SMOOTHING * latency
+            )
+            if spike:
+                self.latency_spikes += 1
+                self._decrease()
+                return
+            # Addytywny wzrost: ok. +1 miejsce po pełnym "oknie" udanych wywołań
+            self.concurrency = min(
+                float(self.max_concurrency), self.concurrency + 1 / max(1.0, self.concurrency)
+            )
+            if self.max_rate > 0:
+                rate = min(self.max_rate, self.requests.rate + self.max_rate * INCREASE_STEP)
+                self.requests.set_rate(rate)
+            self._condition.notify_all()
+
+    def _on_throttled(self, retry_after: Optional[float]) -> None:
+        with self._condition:
+            self.throttled += 1
+            self._decrease()
+            if self.max_rate > 0:
+                rate = max(self.max_rate * MIN_RATE_FRACTION, self.requests.rate * DECREASE_FACTOR)
+                self.requests.set_rate(rate)
+        if retry_after:
+            self.requests.pause(retry_after)
+
+    def _decrease(self) -> None:
+        self.concurrency = max(1.0, self.concurrency * DECREASE_FACTOR)
+
+    # ------------------------------------------------------------------------
+    # Metryki
+    # ------------------------------------------------------------------------
+
+    def metrics(self) -> Dict[str, float]:
+        """Zwraca bieżące limity, obciążenie i liczniki gubernatora."""
+        with self._condition:
+            return {
+                "concurrency_limit": round(self.concurrency, 3),
+                "requests_per_second": round(self.requests.rate, 3),
+                "tokens_per_second": round(self.tokens.rate, 3),
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+                "peak_queue_depth": self.peak_queue_depth,
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "latency_spikes": self.latency_spikes,
+                "wait_seconds": round(self.wait_seconds, 3),
+            }
+
+
+@lru_cache(maxsize=None)
+def shared_governor(name: str) -> RateGovernor:
+    """
+    Zwraca jednego gubernatora dostawcy na proces ("llm" lub "search").
+
+    Wszystkie załogi i agenci w procesie (także w trybie wsadowym)
+    dzielą te same limity, więc razem nie przekraczają limitu dostawcy.
+    """
+    if name == "llm":
+        return RateGovernor.for_llm()
+    if name == "search":
+        return RateGovernor.for_search()
+    raise ValueError(f"Nieznany dostawca: {name} (dostępne: llm, search)")
+
+
+# ============================================================================
+# LLM Z OGRANICZNIKIEM TEMPA
+# ============================================================================
+
+
+def estimate_tokens(messages: Union[str, List[Dict[str, Any]]]) -> int:
+    """Przybliżona liczba tokenów promptu (ok. 4 znaki na token)."""
+    if isinstance(messages, str):
+        return len(messages) // 4
+    return sum(len(str(message.get("content") or "")) for message in messages) // 4
+
+
+class GovernedLLM(BaseLLM):
+    """
+    LLM, którego wywołania przechodzą przez wspólny gubernator tempa.
+
+    Atrybuty:
+        inner: Opakowywany LLM
+        governor: Gubernator (domyślnie współdzielony w procesie)
+    """
+
+    def __init__(self, inner: BaseLLM, governor: Optional[RateGovernor] = None):
+        super().__init__(model=inner.model, temperature=getattr(inner, "temperature", None))
+        self.inner = inner
+        self.governor = governor or shared_governor("llm")
+        # Zużycie tokenów liczy opakowany model, a Crew.calculate_usage_metrics
+        # odczytuje je z LLM agenta - czyli z tego opakowania
+        self._token_usage = inner._token_usage
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, Any]]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+        from_task: Optional[Any] = None,
+        from_agent: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> Union[str, Any]:
+        """Wywołuje opakowany LLM po uzyskaniu zgody gubernatora."""
+        # Słowa stopu CrewAI ustawia na tym opakowaniu (jak w CachingLLM)
+        self.inner.stop = self.stop
+        reserved = estimate_tokens(messages) + RESPONSE_TOKENS_ESTIMATE
+        response = self.governor.call(
+            lambda: self.inner.call(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+                **kwargs,
+            ),
+            tokens=reserved,
+        )
+        if isinstance(response, str):
+            # Korekta rezerwacji o faktyczną długość odpowiedzi
+            self.governor.tokens.adjust(len(response) // 4 - RESPONSE_TOKENS_ESTIMATE)
+        return response
+
+    def get_token_usage_summary(self) -> UsageMetrics:
+        return self.inner.get_token_usage_summary()
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+
+def govern_llm(llm: Union[str, BaseLLM, None]) -> Union[BaseLLM, None]:
+    """
+    Opakowuje LLM agenta we wspólny gubernator tempa.
+
+    Args:
+        llm: Nazwa modelu (np. "openai/gpt-4o-mini") lub obiekt LLM
+
+    Returns:
+        GovernedLLM albo None, gdy agent nie ma skonfigurowanego modelu
+    """
+    if llm is None:
+        return None
+    inner = LLM(model=llm) if isinstance(llm, str) else llm
+    return GovernedLLM(inner)
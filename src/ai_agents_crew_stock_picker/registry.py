@@ -0,0 +1,263 @@
+"""
+Rejestr firm już znalezionych i wybranych przez załogę.
+
+Zasada "nie wybieraj tej samej firmy dwa razy" była dotąd egzekwowana tylko
+przez prompty i rozmytą pamięć RAG. W efekcie wyszukiwacz często zwraca
+firmy już omówione, a financial_researcher ponownie wydaje na nie pełny
+budżet wyszukiwań i LLM. Ten moduł przechowuje ustrukturyzowany rejestr
+(SQLite) indeksowany znormalizowanym tickerem i nazwą firmy.
+
+Rejestr jest sprawdzany zaraz po find_trending_companies (guardrail zadania),
+a każdy wybór z pick_best_company jest w nim zapisywany.
+
+Zmienne środowiskowe (opcjonalne):
+    - COMPANY_REGISTRY_PATH: Ścieżka do bazy (domyślnie: ./memory/company_registry.db)
+    - COMPANY_REGISTRY_SEEN_DAYS: Przez ile dni firma już analizowana jest
+      pomijana (domyślnie: 0); firmy wybrane są pomijane zawsze
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_REGISTRY_PATH = "./memory/company_registry.db"
+# Domyślnie pomijane są tylko firmy już wybrane - świeże analizy firm
+# analizowanych wcześniej są ponownie używane (research_store.py), więc
+# nie ma potrzeby ich odrzucać.
+DEFAULT_SEEN_DAYS = 0.0
+
+# Tickery, których nie da się użyć jako identyfikatora firmy
+MISSING_TICKERS = {"", "N/A", "NA", "NONE", "-", "BRAK", "UNKNOWN", "PRIVATE"}
+
+# Formy prawne pomijane przy porównywaniu nazw ("Apple Inc." == "Apple")
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited",
+    "plc", "llc", "sa", "ag", "nv", "se", "spa", "group", "holdings", "holding",
+}
+
+
+def normalize_ticker(ticker: Optional[str]) -> Optional[str]:
+    """
+    Normalizuje ticker: wielkie litery, bez prefiksu giełdy i znaku $.
+
+    Przykłady: "NASDAQ: aapl" -> "AAPL", "$MSFT" -> "MSFT", "N/A" -> None
+    """
+    if not ticker:
+        return None
+    value = ticker.strip().upper()
+    if ":" in value:
+        value = value.split(":")[-1]  # "NASDAQ:AAPL" -> "AAPL"
+    value = value.strip().lstrip("$").strip()
+    return None if value in MISSING_TICKERS else value
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizuje nazwę firmy: małe litery, bez interpunkcji, znaków
+    diakrytycznych i form prawnych.
+
+    Przykład: "Société Générale S.A." -> "societe generale"
+    """
+    decomposed = unicodedata.normalize("NFKD", name.lower())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    words = re.findall(r"[^\W_]+", stripped)
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+class CompanyRegistry:
+    """
+    Rejestr firm w SQLite z datami pierwszego wystąpienia i ostatniego wyboru.
+
+    Firma jest identyfikowana tickerem, a gdy go brak - znormalizowaną nazwą.
+    Sprawdzanie duplikatów uwzględnia oba klucze, więc ta sama firma zwrócona
+    raz z tickerem, a raz bez niego, nadal zostanie rozpoznana.
+
+    Atrybuty:
+        seen_window: Czas (w sekundach), przez jaki analizowana firma jest pomijana
+    """
+
+    def __init__(self, path: str = DEFAULT_REGISTRY_PATH, seen_days: float = DEFAULT_SEEN_DAYS):
+        self.seen_window = seen_days * 24 * 60 * 60
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS companies (
+                id INTEGER PRIMARY KEY,
+                ticker TEXT UNIQUE,
+                name_key TEXT NOT NULL,
+                name TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                last_picked REAL,
+                pick_count INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_companies_name_key ON companies (name_key)"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> "CompanyRegistry":
+        """Tworzy rejestr na podstawie zmiennych środowiskowych."""
+        return cls(
+            path=os.getenv("COMPANY_REGISTRY_PATH", DEFAULT_REGISTRY_PATH),
+            seen_days=float(os.getenv("COMPANY_REGISTRY_SEEN_DAYS", DEFAULT_SEEN_DAYS)),
+        )
+
+    def close(self) -> None:
+        """Zamyka połączenie z bazą rejestru (instancja nie nadaje się do dalszego użycia)."""
+        with self._lock:
+            self._conn.close()
+
+    def _find(self, name: str, ticker: Optional[str]) -> Optional[Tuple]:
+        """Zwraca wiersz (id, last_seen, last_picked) pasujący po tickerze lub nazwie."""
+        row = None
+        normalized = normalize_ticker(ticker)
+        if normalized:
+            row = self._conn.execute(
+                "SELECT id, last_seen, last_picked FROM companies WHERE ticker = ?",
+                (normalized,),
+            ).fetchone()
+        if row is None:
+            row = self._conn.execute(
+                "SELECT id, last_seen, last_picked FROM companies WHERE name_key = ?",
+                (normalize_name(name),),
+            ).fetchone()
+        return row
+
+    def is_covered(self, name: str, ticker: Optional[str], now: Optional[float] = None) -> bool:
+        """
+        Sprawdza, czy firma była już wybrana lub niedawno analizowana.
+
+        Args:
+            name: Nazwa firmy
+            ticker: Ticker firmy (może być pusty lub "N/A")
+            now: Bieżący czas (do testów), domyślnie time.time()
+        """
+        now = now or time.time()
+        with self._lock:
+            row = self._find(name, ticker)
+        if row is None:
+            return False
+        _, last_seen, last_picked = row
+        return last_picked is not None or now - last_seen < self.seen_window
+
+    def split_new(self, companies: Sequence) -> Tuple[List, List]:
+        """
+        Dzieli firmy (obiekty z polami name i ticker) na nowe i już omówione.
+
+        Duplikaty w obrębie tej samej listy są traktowane jak już omówione.
+
+        Returns:
+            (nowe firmy, pominięte firmy) - w kolejności wejściowej
+        """
+        new, covered = [], []
+        keys_in_batch = set()
+        for company in companies:
+            keys = {normalize_name(company.name), normalize_ticker(company.ticker)} - {None}
+            if keys & keys_in_batch or self.is_covered(company.name, company.ticker):
+                covered.append(company)
+            else:
+                new.append(company)
+                keys_in_batch |= keys
+        return new, covered
+
+    def mark_seen(self, companies: Iterable) -> None:
+        """Zapisuje firmy jako analizowane (aktualizuje last_seen)."""
+        now = time.time()
+        with self._lock:
+            for company in companies:
+                row = self._find(company.name, company.ticker)
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO companies (ticker, name_key, name, first_seen, last_seen) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (
+                            normalize_ticker(company.ticker),
+                            normalize_name(company.name),
+                            company.name,
+                            now,
+                            now,
+                        ),
+                    )
+                else:
+                    # Firma znana dotąd tylko z nazwy może teraz mieć ticker
+                    self._conn.execute(
+                        "UPDATE companies SET last_seen = ?, ticker = COALESCE(ticker, ?) "
+                        "WHERE id = ?",
+                        (now, normalize_ticker(company.ticker), row[0]),
+                    )
+            self._conn.commit()
+
+    def record_pick(self, company) -> None:
+        """Zapisuje wybór firmy przez stock_picker."""
+        self.mark_seen([company])
+        with self._lock:
+            row = self._find(company.name, company.ticker)
+            self._conn.execute(
+                "UPDATE companies SET last_picked = ?, pick_count = pick_count + 1 WHERE id = ?",
+                (time.time(), row[0]),
+            )
+            self._conn.commit()
+
+    def covered_names(self, limit: int = 50) -> List[str]:
+        """Zwraca nazwy ostatnio omówionych firm (np. do podpowiedzi dla agenta)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, ticker FROM companies ORDER BY last_seen DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [f"{name} ({ticker})" if ticker else name for name, ticker in rows]
+
+
+# Linia wyboru, którą zadanie pick_best_company umieszcza na początku raportu
+# ("Wybrana firma: Nvidia (NVDA)", także w markdown: "**Wybrana firma:** ...")
+PICK_LINE = re.compile(r"wybrana firma[*_\s]*:[*_\s]*(?P<pick>[^\n]+)", re.IGNORECASE)
+PICK_TICKER = re.compile(r"\(\s*(?P<ticker>[^()\s]+)\s*\)")
+
+
+def _mentions(text: str, company) -> bool:
+    """Czy tekst wymienia firmę z nazwy lub tickera (ticker - z rozróżnieniem
+    wielkości liter, bo krótkie tickery bywają zwykłymi słowami, np. "A", "ON")."""
+    lowered = text.lower()
+    names = {company.name.lower(), normalize_name(company.name)} - {""}
+    if any(re.search(rf"(?<!\w){re.escape(name)}(?!\w)", lowered) for name in names):
+        return True
+    ticker = normalize_ticker(company.ticker)
+    return bool(ticker and re.search(rf"(?<!\w)\$?{re.escape(ticker)}(?!\w)", text))
+
+
+def detect_pick(decision: str, candidates: Sequence) -> Optional[object]:
+    """
+    Ustala, którą firmę wybrał stock_picker, na podstawie raportu decyzji.
+
+    Wybór jest odczytywany z linii "Wybrana firma: <nazwa> (<ticker>)",
+    o którą prosi zadanie pick_best_company - najpierw po tickerze w
+    nawiasie, porównywanym z tickerami kandydatów, a potem po nazwie.
+    Raport bez tej linii jest akceptowany tylko wtedy, gdy wymienia
+    dokładnie jednego kandydata. Niejednoznaczny wybór zwraca None -
+    błędnie rozpoznana firma byłaby na stałe pomijana w kolejnych
+    uruchomieniach (last_picked).
+    """
+    line = PICK_LINE.search(decision)
+    text = line.group("pick") if line else decision
+    if line:
+        for match in PICK_TICKER.finditer(text):
+            ticker = normalize_ticker(match.group("ticker"))
+            by_ticker = [c for c in candidates if ticker and normalize_ticker(c.ticker) == ticker]
+            if len(by_ticker) == 1:
+                return by_ticker[0]
+    mentioned = [company for company in candidates if _mentions(text, company)]
+    return mentioned[0] if len(mentioned) == 1 else None
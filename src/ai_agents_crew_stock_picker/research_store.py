@@ -0,0 +1,119 @@
+"""
+Magazyn wyników analiz firm do ponownego użycia między uruchomieniami.
+
+Każde uruchomienie analizowało wszystkie firmy od zera, nawet jeśli świeża
+analiza TrendingCompanyResearch tej samej firmy powstała godzinę wcześniej.
+Ten moduł przechowuje analizy w SQLite z kluczem (ticker, sektor), dzięki
+czemu do financial_researcher trafiają tylko firmy nowe lub z nieaktualną
+analizą, a pozostałe są uzupełniane z magazynu.
+
+Zmienne środowiskowe (opcjonalne):
+    - RESEARCH_STORE_PATH: Ścieżka do bazy (domyślnie: ./memory/research_store.db)
+    - RESEARCH_MAX_AGE_HOURS: Maksymalny wiek analizy do ponownego użycia
+      (domyślnie: 24; 0 wyłącza ponowne użycie)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from .registry import normalize_name, normalize_ticker
+
+DEFAULT_STORE_PATH = "./memory/research_store.db"
+DEFAULT_MAX_AGE_HOURS = 24.0
+
+
+def company_key(name: str, ticker: Optional[str]) -> str:
+    """Klucz firmy: znormalizowany ticker, a gdy go brak - nazwa."""
+    return normalize_ticker(ticker) or f"name:{normalize_name(name)}"
+
+
+class ResearchStore:
+    """
+    Analizy firm w SQLite z kluczem (firma, sektor) i datą wykonania.
+
+    Przechowywany jest słownik analizy (model_dump), więc magazyn nie zależy
+    od klas Pydantic - walidację wykonuje kod, który z niego korzysta.
+
+    Atrybuty:
+        max_age: Maksymalny wiek analizy do ponownego użycia (sekundy)
+        hits: Liczba analiz zwróconych z magazynu
+        misses: Liczba firm bez świeżej analizy
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, max_age_hours: float = DEFAULT_MAX_AGE_HOURS):
+        self.max_age = max_age_hours * 60 * 60
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS research (
+                company_key TEXT NOT NULL,
+                sector TEXT NOT NULL,
+                research TEXT NOT NULL,
+                researched_at REAL NOT NULL,
+                PRIMARY KEY (company_key, sector)
+            )
+            """
+        )
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> "ResearchStore":
+        """Tworzy magazyn na podstawie zmiennych środowiskowych."""
+        return cls(
+            path=os.getenv("RESEARCH_STORE_PATH", DEFAULT_STORE_PATH),
+            max_age_hours=float(os.getenv("RESEARCH_MAX_AGE_HOURS", DEFAULT_MAX_AGE_HOURS)),
+        )
+
+    def close(self) -> None:
+        """Zamyka połączenie z bazą magazynu (instancja nie nadaje się do dalszego użycia)."""
+        with self._lock:
+            self._conn.close()
+
+    def get_fresh(self, name: str, ticker: Optional[str], sector: str) -> Optional[Dict]:
+        """
+        Zwraca analizę firmy, jeśli jest młodsza niż max_age.
+
+        Args:
+            name: Nazwa firmy
+            ticker: Ticker firmy (może być pusty)
+            sector: Sektor uruchomienia (analiza zależy od kontekstu sektora)
+
+        Returns:
+            Słownik analizy lub None, gdy brak świeżej analizy
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT research, researched_at FROM research "
+                "WHERE company_key = ? AND sector = ?",
+                (company_key(name, ticker), sector.strip().lower()),
+            ).fetchone()
+            if row is None or time.time() - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, name: str, ticker: Optional[str], sector: str, research: Dict) -> None:
+        """Zapisuje (lub odświeża) analizę firmy w danym sektorze."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO research "
+                "(company_key, sector, research, researched_at) VALUES (?, ?, ?, ?)",
+                (
+                    company_key(name, ticker),
+                    sector.strip().lower(),
+                    json.dumps(research, ensure_ascii=False),
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
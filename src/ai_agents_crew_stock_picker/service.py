@@ -0,0 +1,404 @@
+"""
+Tryb usługi: jeden "rozgrzany" proces załogi przyjmujący zlecenia przez HTTP.
+
+Każde uruchomienie CLI płaci za import crewai/crewai_tools, wczytanie
+agents.yaml i tasks.yaml, budowę agentów oraz otwarcie baz pamięci
+(SQLite i ChromaDB w ./memory) - to sekundy przed pierwszym wywołaniem LLM.
+Usługa ponosi ten koszt raz przy starcie, a potem wykonuje kolejne
+uruchomienia współbieżnie w jednym procesie.
+
+Izolacja uruchomień:
+- każde zlecenie dostaje nową instancję AiAgentsCrewStockPicker (agenci
+  i zadania przechowują stan wykonania), zamykaną po zakończeniu
+  (close() - zwalnia agentów, zadania i połączenia SQLite); sparsowana
+  konfiguracja YAML jest współdzielona (load_crew_yaml)
+- własny run_id (checkpointy) i katalog wyjściowy <output_root>/<run_id>
+- współdzielone są tylko zasoby bezstanowe lub bezpieczne wątkowo: magazyny
+  pamięci, cache wyszukiwania i LLM, ograniczniki tempa
+
+Utrzymanie pamięci (memory_maintenance.py) jest wykonywane między
+uruchomieniami - gdy żadne nie trwa ani nie czeka - a nowe uruchomienia
+czekają na jego zakończenie.
+
+API (JSON):
+    GET  /health          - stan usługi i liczba aktywnych uruchomień
+    POST /runs            - {"inputs": {...}, "mode": "pipeline", "fanout": false,
+                             "wait": false}; zwraca run_id (202) lub wynik (200)
+    GET  /runs            - lista uruchomień
+    GET  /runs/<run_id>   - stan i wynik uruchomienia (w trybie fan-out także
+                            analizy firm gotowe przed końcem uruchomienia)
+
+Zmienne środowiskowe (opcjonalne):
+    - SERVICE_HOST: Adres nasłuchiwania (domyślnie: 127.0.0.1)
+    - SERVICE_PORT: Port (domyślnie: 8765)
+    - SERVICE_CONCURRENCY: Liczba jednocześnie wykonywanych uruchomień (domyślnie: 4)
+    - SERVICE_OUTPUT_ROOT: Katalog bazowy wyników (domyślnie: output/service)
+"""
+
+import json
+import os
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from ai_agents_crew_stock_picker.checkpoints import new_run_id
+from ai_agents_crew_stock_picker.crew import (
+    EXECUTION_MODES,
+    AiAgentsCrewStockPicker,
+    shared_memory_storages,
+)
+from ai_agents_crew_stock_picker.knowledge import shared_knowledge_index
+from ai_agents_crew_stock_picker.memory_maintenance import maintain_if_due
+from ai_agents_crew_stock_picker.rate_governor import shared_governor
+from ai_agents_crew_stock_picker.tools.cached_search_tool import shared_search_cache
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CONCURRENCY = 4
+DEFAULT_OUTPUT_ROOT = "output/service"
+
+# Liczba zakończonych uruchomień przechowywanych w pamięci usługi
+MAX_KEPT_RUNS = 1000
+
+
+@dataclass
+class ServiceRun:
+    """
+    Uruchomienie zlecone usłudze.
+
+    Atrybuty:
+        run_id: Identyfikator uruchomienia (także checkpointów)
+        inputs: Dane wejściowe załogi
+        mode: Tryb wykonania (None - domyślny tryb załogi)
+        fanout: Czy firmy są analizowane równolegle
+        output_dir: Katalog plików wynikowych tego uruchomienia
+        status: queued, running, completed lub failed
+        queued_seconds: Czas oczekiwania na wolne miejsce
+        duration: Czas wykonania w sekundach
+        raw: Wynik końcowy (decyzja)
+        research: Analizy firm w kolejności powstania (tryb fan-out - dostępne
+            w trakcie uruchomienia)
+        first_result_seconds: Czas od startu do pierwszej analizy firmy
+        error: Opis błędu
+        submitted_at: Czas przyjęcia zlecenia (epoch)
+    """
+
+    run_id: str
+    inputs: Dict[str, Any]
+    mode: Optional[str]
+    fanout: bool
+    output_dir: str
+    status: str = "queued"
+    queued_seconds: float = 0.0
+    duration: float = 0.0
+    raw: Optional[str] = None
+    research: List[Dict[str, Any]] = field(default_factory=list)
+    first_result_seconds: Optional[float] = None
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+
+
+class CrewService:
+    """
+    Wykonawca uruchomień w długo działającym procesie.
+
+    Atrybuty:
+        concurrency: Liczba jednocześnie wykonywanych uruchomień
+        output_root: Katalog bazowy wyników uruchomień
+        startup_seconds: Czas rozgrzewania (warm_up)
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        output_root: str = DEFAULT_OUTPUT_ROOT,
+    ):
+        if concurrency < 1:
+            raise ValueError("Limit równoległości musi być większy od zera")
+        self.concurrency = concurrency
+        self.output_root = output_root
+        self.startup_seconds = 0.0
+        self._started_at = time.time()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="crew-run")
+        self._runs: "OrderedDict[str, ServiceRun]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._maintaining = False
+        self._maintenance_done = threading.Condition(self._lock)
+
+    def warm_up(self) -> float:
+        """
+        Ponosi jednorazowe koszty startu przed przyjęciem pierwszego zlecenia.
+
+        Buduje próbną załogę (konfiguracja YAML, agenci, LLM), otwiera
+        współdzielone magazyny pamięci, cache i ograniczniki tempa oraz
+        ładuje indeks wiedzy.
+
+        Returns:
+            Czas rozgrzewania w sekundach
+        """
+        start = time.perf_counter()
+        shared_memory_storages()
+        if shared_knowledge_index().available:
+            shared_knowledge_index().load()  # Aktualizacja indeksu wiedzy przed zleceniami
+        shared_search_cache()
+        shared_governor("llm")
+        shared_governor("search")
+        crew_instance = AiAgentsCrewStockPicker()
+        crew_instance.crew()
+        crew_instance.close()
+        self.startup_seconds = time.perf_counter() - start
+        return self.startup_seconds
+
+    # ------------------------------------------------------------------------
+    # Zlecenia
+    # ------------------------------------------------------------------------
+
+    def submit(
+        self,
+        inputs: Dict[str, Any],
+        mode: Optional[str] = None,
+        fanout: bool = False,
+    ) -> ServiceRun:
+        """
+        Przyjmuje uruchomienie do wykonania i natychmiast wraca.
+
+        Raises:
+            ValueError: Jeśli dane wejściowe lub tryb są nieprawidłowe
+        """
+        if not isinstance(inputs, dict):
+            raise ValueError("Pole inputs musi być obiektem JSON")
+        if mode is not None and mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"Nieznany tryb wykonania: {mode} (dostępne: {', '.join(EXECUTION_MODES)})"
+            )
+        run_id = new_run_id()
+        run = ServiceRun(
+            run_id=run_id,
+            inputs=inputs,
+            mode=mode,
+            fanout=fanout,
+            output_dir=str(Path(self.output_root) / run_id),
+        )
+        with self._lock:
+            self._runs[run_id] = run
+            self._forget_old_runs()
+            self._futures[run_id] = self._executor.submit(self._execute, run)
+        return run
+
+    def wait(self, run_id: str, timeout: Optional[float] = None) -> ServiceRun:
+        """Czeka na zakończenie uruchomienia i zwraca jego stan."""
+        with self._lock:
+            future = self._futures.get(run_id)
+        if future is not None:
+            future.result(timeout=timeout)
+        return self.get(run_id)
+
+    def get(self, run_id: str) -> ServiceRun:
+        """
+        Zwraca uruchomienie o podanym identyfikatorze.
+
+        Raises:
+            KeyError: Jeśli uruchomienie nie istnieje
+        """
+        with self._lock:
+            return self._runs[run_id]
+
+    def runs(self) -> List[ServiceRun]:
+        with self._lock:
+            return list(self._runs.values())
+
+    def health(self) -> Dict[str, Any]:
+        """Stan usługi, obciążenie i bieżące limity dostawców."""
+        with self._lock:
+            statuses = [run.status for run in self._runs.values()]
+        return {
+            "status": "ok",
+            "uptime": round(time.time() - self._started_at, 3),
+            "startup_seconds": round(self.startup_seconds, 3),
+            "concurrency": self.concurrency,
+            "running": statuses.count("running"),
+            "queued": statuses.count("queued"),
+            "limits": {name: shared_governor(name).metrics() for name in ("llm", "search")},
+        }
+
+    def close(self) -> None:
+        """Kończy przyjmowanie zleceń i czeka na trwające uruchomienia."""
+        self._executor.shutdown(wait=True)
+
+    def _forget_old_runs(self) -> None:
+        """Usuwa najstarsze zakończone uruchomienia ponad limit MAX_KEPT_RUNS."""
+        for run_id in list(self._runs):
+            if len(self._runs) <= MAX_KEPT_RUNS:
+                return
+            if self._runs[run_id].status in ("completed", "failed"):
+                del self._runs[run_id]
+                self._futures.pop(run_id, None)
+
+    def _execute(self, run: ServiceRun) -> None:
+        """Wykonuje uruchomienie w nowej instancji załogi (wątek puli)."""
+        with self._lock:
+            while self._maintaining:
+                self._maintenance_done.wait()
+        start = time.perf_counter()
+        run.queued_seconds = round(time.time() - run.submitted_at, 6)
+        run.status = "running"
+        crew_instance = None
+        try:
+            crew_instance = AiAgentsCrewStockPicker()
+            crew_instance.run_id = run.run_id
+            crew_instance.output_dir = run.output_dir
+            if run.mode:
+                crew_instance.execution_mode = run.mode
+            if run.fanout:
+
+                def on_research(entry) -> None:
+                    if run.first_result_seconds is None:
+                        run.first_result_seconds = round(time.perf_counter() - start, 6)
+                    run.research.append(entry.model_dump())
+
+                result = crew_instance.kickoff_fanout(run.inputs, on_research=on_research)
+            else:
+                result = crew_instance.crew().kickoff(inputs=run.inputs)
+            run.raw = result.raw
+            run.status = "completed"
+        except Exception as e:  # Błąd jednego uruchomienia nie zatrzymuje usługi
+            run.error = str(e)
+            run.status = "failed"
+        finally:
+            run.duration = round(time.perf_counter() - start, 6)
+            if crew_instance is not None:
+                crew_instance.close()  # Agenci, zadania i połączenia tego uruchomienia
+        self._maintain_memory_if_idle()
+
+    def _maintain_memory_if_idle(self) -> None:
+        """Uruchamia utrzymanie pamięci, jeśli jest należne i żadne uruchomienie nie trwa."""
+        with self._lock:
+            if self._maintaining or any(
+                run.status in ("queued", "running") for run in self._runs.values()
+            ):
+                return
+            self._maintaining = True
+        try:
+            maintain_if_due()
+        except Exception as e:  # Błąd utrzymania nie zatrzymuje usługi
+            print(f"Utrzymanie pamięci nie powiodło się: {e}")
+        finally:
+            with self._lock:
+                self._maintaining = False
+                self._maintenance_done.notify_all()
+
+
+# ============================================================================
+# SERWER HTTP
+# ============================================================================
+
+
+def _handler(service: CrewService) -> Type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Połączenia keep-alive - mniejszy narzut żądań
+
+        def do_GET(self) -> None:  # noqa: N802 - nazwa wymagana przez http.server
+            if self.path == "/health":
+                self._reply(200, service.health())
+            elif self.path == "/runs":
+                self._reply(200, {"runs": [asdict(run) for run in service.runs()]})
+            elif self.path.startswith("/runs/"):
+                try:
+                    self._reply(200, asdict(service.get(self.path[len("/runs/"):])))
+                except KeyError:
+                    self._reply(404, {"error": "Nie znaleziono uruchomienia"})
+            else:
+                self._reply(404, {"error": "Nieznany adres"})
+
+        def do_POST(self) -> None:  # noqa: N802 - nazwa wymagana przez http.server
+            if self.path != "/runs":
+                self._reply(404, {"error": "Nieznany adres"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                run = service.submit(
+                    body.get("inputs", {}), mode=body.get("mode"), fanout=bool(body.get("fanout"))
+                )
+            except (ValueError, AttributeError) as e:
+                self._reply(400, {"error": str(e)})
+                return
+            if body.get("wait"):
+                self._reply(200, asdict(service.wait(run.run_id)))
+            else:
+                self._reply(202, asdict(run))
+
+        def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def address_string(self) -> str:
+            # Gniazdo uniksowe nie ma adresu klienta (client_address == "")
+            return self.client_address[0] if self.client_address else "unix"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            print(f"[service] {self.address_string()} {format % args}")
+
+    return Handler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serwer HTTP na gnieździe uniksowym (każde połączenie w osobnym wątku)."""
+
+    daemon_threads = True
+
+
+def create_server(
+    service: CrewService,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None,
+) -> Tuple[socketserver.BaseServer, str]:
+    """
+    Tworzy serwer HTTP usługi na porcie TCP lub gnieździe uniksowym.
+
+    Returns:
+        (serwer, adres do wyświetlenia)
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # Gniazdo po poprzednim (przerwanym) procesie
+        return ThreadingUnixHTTPServer(socket_path, _handler(service)), f"unix:{socket_path}"
+    server = ThreadingHTTPServer((host, port), _handler(service))
+    server.daemon_threads = True
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}"
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    output_root: str = DEFAULT_OUTPUT_ROOT,
+) -> None:
+    """Rozgrzewa usługę i obsługuje zlecenia do przerwania (Ctrl+C)."""
+    service = CrewService(concurrency=concurrency, output_root=output_root)
+    startup = service.warm_up()
+    server, address = create_server(service, host, port, socket_path)
+    print(f"Usługa gotowa w {startup:.2f} s, nasłuchuje na {address}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
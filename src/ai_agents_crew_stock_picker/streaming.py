@@ -0,0 +1,121 @@
+"""
+Strumieniowy zapis analiz firm do pliku JSONL w miarę ich powstawania.
+
+Plik output_file zadania research_trending_companies (research_report.json)
+powstaje dopiero po przeanalizowaniu wszystkich firm, więc odbiorcy wyników
+(dashboardy, kolejne procesy) czekali na najwolniejszą firmę. Ten moduł
+dopisuje każdą zwalidowaną analizę TrendingCompanyResearch jako osobną
+linię JSON zaraz po jej powstaniu - odbiorca może czytać plik przyrostowo
+(np. tail -f), a zbiorczy research_report.json powstaje jak dotychczas.
+
+Format linii:
+    {"run_id": ..., "index": 0, "emitted_at": 1735725600.0, "status": "ok",
+     "source": "fresh" | "cache", "company": {"name": ..., "ticker": ...},
+     "duration": 12.3, "research": {...}}
+Nieudana analiza firmy ma status "error" i pole error zamiast research.
+
+Zmienne środowiskowe (opcjonalne):
+    - RESEARCH_STREAM_FILE: Nazwa pliku strumienia w katalogu wyników
+      (domyślnie: research_stream.jsonl; pusta wartość wyłącza zapis)
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+DEFAULT_STREAM_FILE = "research_stream.jsonl"
+
+
+def stream_path(output_dir: str) -> Optional[str]:
+    """Ścieżka pliku strumienia w katalogu wyników (None - zapis wyłączony)."""
+    file_name = os.getenv("RESEARCH_STREAM_FILE", DEFAULT_STREAM_FILE)
+    return os.path.join(output_dir, file_name) if file_name else None
+
+
+class JsonlSink:
+    """
+    Plik JSONL zapisywany linia po linii z opróżnieniem bufora po każdej linii.
+
+    Zapis jest chroniony blokadą - wyniki mogą przychodzić z wielu wątków.
+    Bez ścieżki (path=None) obiekt przyjmuje wyniki i nic nie zapisuje.
+
+    Atrybuty:
+        path: Ścieżka pliku (None - zapis wyłączony)
+        run_id: Identyfikator uruchomienia dopisywany do każdej linii
+        count: Liczba zapisanych linii
+    """
+
+    def __init__(self, path: Optional[str], run_id: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self.run_id = run_id
+        self.count = 0
+        self._handle = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "JsonlSink":
+        return self.open()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def open(self) -> "JsonlSink":
+        """Otwiera plik od nowa - strumień dotyczy bieżącego uruchomienia."""
+        if self.path is not None and self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = self.path.open("w", encoding="utf-8")
+        return self
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Dopisuje rekord jako jedną linię i od razu opróżnia bufor."""
+        with self._lock:
+            line = {"run_id": self.run_id, "index": self.count, "emitted_at": time.time(), **record}
+            self.count += 1
+            if self._handle is not None:
+                self._handle.write(json.dumps(line, ensure_ascii=False) + "\n")
+                self._handle.flush()
+
+    def research(
+        self,
+        entry: BaseModel,
+        source: str,
+        duration: Optional[float] = None,
+    ) -> None:
+        """Zapisuje zwalidowaną analizę firmy (source: "fresh" lub "cache")."""
+        self.write(
+            {
+                "status": "ok",
+                "source": source,
+                "company": {"name": entry.name, "ticker": getattr(entry, "ticker", None)},
+                "duration": None if duration is None else round(duration, 3),
+                "research": entry.model_dump(exclude={"from_cache"}),
+            }
+        )
+
+    def error(
+        self,
+        name: str,
+        ticker: Optional[str],
+        error: str,
+        duration: Optional[float] = None,
+    ) -> None:
+        """Zapisuje nieudaną analizę firmy."""
+        self.write(
+            {
+                "status": "error",
+                "source": "fresh",
+                "company": {"name": name, "ticker": ticker},
+                "duration": None if duration is None else round(duration, 3),
+                "error": error,
+            }
+        )
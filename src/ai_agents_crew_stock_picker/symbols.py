@@ -0,0 +1,260 @@
+"""
+Lokalny indeks symboli giełdowych do weryfikacji firm z wyszukiwarki.
+
+trending_company_finder zwraca czasem firmy nienotowane ("AI Factory",
+ticker "N/A") albo pary nazwa/ticker, które do siebie nie pasują. Każda
+taka pozycja kosztuje pełny cykl wyszukiwań i LLM w analizie, choć nie da
+się w nią zainwestować. Ten moduł buduje w pamięci indeks z pliku listingu
+giełdowego i rozwiązuje każdą firmę do symbolu notowanego na giełdzie:
+- dokładnie po tickerze i po znormalizowanej nazwie (słowniki)
+- po prefiksie nazwy ("Taiwan Semiconductor" -> "Taiwan Semiconductor
+  Manufacturing") - wyszukiwanie binarne w posortowanych nazwach
+- rozmyto po trigramach nazwy (literówki, inna kolejność słów)
+
+Firmy są weryfikowane zaraz po find_trending_companies (guardrail zadania),
+a nierozwiązywalne - usuwane przed analizą.
+
+Plik listingu: CSV (separator ",") lub TXT w formacie list NASDAQ
+(separator "|"), z kolumnami symbolu ("Symbol" / "Ticker") i nazwy
+("Name" / "Security Name" / "Company Name"). Bez pliku weryfikacja jest
+pomijana.
+
+Zmienne środowiskowe (opcjonalne):
+    - SYMBOL_LISTING_PATH: Ścieżka do pliku listingu
+      (domyślnie: ./market_data/listings.csv)
+    - SYMBOL_MATCH_THRESHOLD: Minimalne podobieństwo trigramów nazwy
+      przy dopasowaniu rozmytym, 0-1 (domyślnie: 0.5)
+"""
+
+import bisect
+import csv
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from ai_agents_crew_stock_picker.registry import normalize_name, normalize_ticker
+
+DEFAULT_LISTING_PATH = "./market_data/listings.csv"
+DEFAULT_MATCH_THRESHOLD = 0.5
+
+SYMBOL_COLUMNS = ("symbol", "ticker", "act symbol")
+NAME_COLUMNS = ("name", "security name", "company name", "company")
+
+# Opis papieru wartościowego w listingach ("Apple Inc. - Common Stock",
+# "Alphabet Inc. Class A Common Stock") - pomijany w nazwie firmy
+_SECURITY_SUFFIX = re.compile(
+    r"\s+(-\s+.*|(class [a-z]\s+)?(common stock|ordinary shares|american depositary shares).*)$",
+    re.IGNORECASE,
+)
+
+
+def company_name(security_name: str) -> str:
+    """Nazwa firmy z nazwy papieru wartościowego (bez klasy akcji i opisu)."""
+    return _SECURITY_SUFFIX.sub("", security_name.strip()) or security_name.strip()
+
+
+def trigrams(key: str) -> Set[str]:
+    """Trigramy znakowe znormalizowanej nazwy (z dopełnieniem na granicach)."""
+    padded = f"  {key} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class SymbolMatch:
+    """
+    Wynik rozwiązania firmy w indeksie.
+
+    Atrybuty:
+        symbol: Ticker notowanej spółki
+        name: Nazwa spółki z listingu
+        method: Sposób dopasowania (ticker, name, prefix, fuzzy)
+        score: Podobieństwo nazw (1.0 dla dopasowań dokładnych)
+    """
+
+    symbol: str
+    name: str
+    method: str
+    score: float = 1.0
+
+
+class SymbolIndex:
+    """
+    Indeks symboli w pamięci: ticker, nazwa, prefiksy i trigramy nazw.
+
+    Atrybuty:
+        path: Ścieżka do pliku listingu
+        threshold: Minimalne podobieństwo przy dopasowaniu rozmytym
+    """
+
+    def __init__(self, path: str = DEFAULT_LISTING_PATH, threshold: float = DEFAULT_MATCH_THRESHOLD):
+        self.path = Path(path)
+        self.threshold = threshold
+        self._symbols: List[str] = []
+        self._names: List[str] = []
+        self._keys: List[str] = []
+        self._by_ticker: Dict[str, int] = {}
+        self._by_key: Dict[str, int] = {}
+        self._sorted_keys: List[Tuple[str, int]] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._gram_counts: List[int] = []
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SymbolIndex":
+        """Tworzy indeks na podstawie zmiennych środowiskowych."""
+        return cls(
+            path=os.getenv("SYMBOL_LISTING_PATH", DEFAULT_LISTING_PATH),
+            threshold=float(os.getenv("SYMBOL_MATCH_THRESHOLD", DEFAULT_MATCH_THRESHOLD)),
+        )
+
+    @property
+    def available(self) -> bool:
+        """Czy plik listingu istnieje (bez niego weryfikacja jest pomijana)."""
+        return self.path.exists()
+
+    def __len__(self) -> int:
+        return len(self.load()._symbols)
+
+    def load(self) -> "SymbolIndex":
+        """Wczytuje listing i buduje indeksy (raz na instancję)."""
+        if self._loaded:
+            return self
+        with self._lock:
+            if not self._loaded:
+                for symbol, name in self._read_listing():
+                    self._add(symbol, name)
+                self._sorted_keys.sort()
+                self._loaded = True
+        return self
+
+    def _read_listing(self) -> List[Tuple[str, str]]:
+        with self.path.open(newline="", encoding="utf-8") as handle:
+            delimiter = "|" if self.path.suffix == ".txt" else ","
+            reader = csv.reader(handle, delimiter=delimiter)
+            header = [column.strip().lower() for column in next(reader, [])]
+            symbol_column = next((header.index(c) for c in SYMBOL_COLUMNS if c in header), None)
+            name_column = next((header.index(c) for c in NAME_COLUMNS if c in header), None)
+            if symbol_column is None or name_column is None:
+                raise ValueError(
+                    f"Listing {self.path} wymaga kolumn symbolu i nazwy (nagłówek: {header})"
+                )
+            width = max(symbol_column, name_column)
+            # Listy NASDAQ kończą się wierszem "File Creation Time" bez nazwy
+            return [
+                (row[symbol_column], row[name_column])
+                for row in reader
+                if len(row) > width and row[name_column].strip()
+            ]
+
+    def _add(self, symbol: str, security_name: str) -> None:
+        """Dodaje symbol do indeksu (pierwszy wpis danego tickera wygrywa)."""
+        ticker = normalize_ticker(symbol)
+        name = company_name(security_name)
+        key = normalize_name(name)
+        if not ticker or not key or ticker in self._by_ticker:
+            return
+        row = len(self._symbols)
+        self._symbols.append(ticker)
+        self._names.append(name)
+        self._keys.append(key)
+        self._by_ticker[ticker] = row
+        # Kilka klas akcji tej samej firmy ma tę samą nazwę - wygrywa pierwsza
+        self._by_key.setdefault(key, row)
+        self._sorted_keys.append((key, row))
+        grams = trigrams(key)
+        self._gram_counts.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(row)
+
+    # ------------------------------------------------------------------------
+    # Wyszukiwanie
+    # ------------------------------------------------------------------------
+
+    def _match(self, row: int, method: str, score: float = 1.0) -> SymbolMatch:
+        return SymbolMatch(self._symbols[row], self._names[row], method, round(score, 4))
+
+    def _similarity(self, key: str, row: int) -> float:
+        """Podobieństwo Jaccarda trigramów nazwy z zapytania i z listingu."""
+        query, candidate = trigrams(key), trigrams(self._keys[row])
+        return len(query & candidate) / len(query | candidate)
+
+    def by_ticker(self, ticker: Optional[str]) -> Optional[SymbolMatch]:
+        """Dokładne dopasowanie po tickerze (po normalizacji)."""
+        self.load()
+        row = self._by_ticker.get(normalize_ticker(ticker) or "")
+        return None if row is None else self._match(row, "ticker")
+
+    def by_name(self, name: str) -> Optional[SymbolMatch]:
+        """
+        Dopasowanie po nazwie: dokładne, po prefiksie, a na końcu rozmyte.
+
+        Prefiks musi kończyć się na granicy słowa ("Meta" nie pasuje do
+        "Metalpha"); przy kilku pasujących nazwach wygrywa pierwsza alfabetycznie.
+        """
+        self.load()
+        key = normalize_name(name)
+        if not key:
+            return None
+        row = self._by_key.get(key)
+        if row is not None:
+            return self._match(row, "name")
+
+        start = bisect.bisect_left(self._sorted_keys, (key + " ", -1))
+        if start < len(self._sorted_keys) and self._sorted_keys[start][0].startswith(key + " "):
+            row = self._sorted_keys[start][1]
+            return self._match(row, "prefix", self._similarity(key, row))
+
+        query = trigrams(key)
+        shared = Counter(row for gram in query for row in self._postings.get(gram, ()))
+        best, best_score = None, self.threshold
+        for row, common in shared.items():
+            score = common / (len(query) + self._gram_counts[row] - common)
+            if score >= best_score:
+                best, best_score = row, score
+        return None if best is None else self._match(best, "fuzzy", best_score)
+
+    def resolve(self, name: str, ticker: Optional[str]) -> Optional[SymbolMatch]:
+        """
+        Rozwiązuje firmę (nazwa + ticker) do notowanego symbolu.
+
+        Gdy ticker i nazwa wskazują różne spółki, wygrywa nazwa - to ją
+        opisuje powód znalezienia firmy, a ticker bywa pomylony przez LLM.
+        Ticker bez pasującej nazwy jest akceptowany (np. "Google" -> GOOGL).
+
+        Returns:
+            Dopasowanie lub None, jeśli firmy nie ma w listingu
+        """
+        by_ticker = self.by_ticker(ticker)
+        by_name = self.by_name(name)
+        if by_ticker and (by_name is None or by_name.symbol == by_ticker.symbol):
+            return by_ticker
+        return by_name or by_ticker
+
+    def validate(self, companies: Sequence) -> Tuple[List, List]:
+        """
+        Weryfikuje firmy (modele pydantic z polami name i ticker).
+
+        Returns:
+            (rozwiązane firmy z tickerem i nazwą z listingu, odrzucone firmy)
+            - w kolejności wejściowej
+        """
+        resolved, dropped = [], []
+        for company in companies:
+            match = self.resolve(company.name, company.ticker)
+            if match is None:
+                dropped.append(company)
+            else:
+                resolved.append(company.model_copy(update={"ticker": match.symbol, "name": match.name}))
+        return resolved, dropped
+
+
+@lru_cache(maxsize=None)
+def shared_symbol_index() -> SymbolIndex:
+    """Zwraca jeden indeks symboli na proces (listing wczytywany raz)."""
+    return SymbolIndex.from_env()
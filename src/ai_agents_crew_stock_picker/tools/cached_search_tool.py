@@ -0,0 +1,306 @@
+"""
+Narzędzie wyszukiwania z trwałym cache wyników Serper.
+
+Agenci trending_company_finder i financial_researcher często wysyłają te same
+zapytania (np. "<firma> stock outlook") - zarówno w obrębie jednego
+uruchomienia, jak i między kolejnymi uruchomieniami. Każde takie zapytanie
+kosztuje czas i kredyty Serper. To narzędzie opakowuje SerperDevTool
+i zapisuje wyniki w bazie SQLite.
+
+Kluczowe cechy:
+- Klucz cache to znormalizowane zapytanie (wielkość liter, białe znaki)
+- Osobny czas życia (TTL) dla każdej klasy zapytań (np. wiadomości starzeją się szybciej)
+- Ograniczony rozmiar z usuwaniem najdawniej używanych wpisów (LRU)
+- Liczniki trafień i chybień
+
+Zmienne środowiskowe (opcjonalne):
+    - SEARCH_CACHE_PATH: Ścieżka do bazy cache (domyślnie: ./memory/search_cache.db)
+    - SEARCH_CACHE_MAX_ENTRIES: Maksymalna liczba wpisów (domyślnie: 5000)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Type
+
+from crewai.tools import BaseTool
+from crewai_tools import SerperDevTool
+from pydantic import BaseModel, ConfigDict, Field
+
+from ai_agents_crew_stock_picker.rate_governor import shared_governor
+
+# ============================================================================
+# KONFIGURACJA CACHE
+# ============================================================================
+# Czas życia wyników (w sekundach) dla poszczególnych klas zapytań.
+# Wiadomości zmieniają się z godziny na godzinę, a ogólne informacje
+# o firmie (profil, model biznesowy) są aktualne przez wiele dni.
+
+DEFAULT_TTLS: Dict[str, float] = {
+    "news": 60 * 60,  # 1 godzina - najnowsze wiadomości
+    "market": 6 * 60 * 60,  # 6 godzin - notowania, perspektywy akcji
+    "general": 3 * 24 * 60 * 60,  # 3 dni - profil firmy, ogólne informacje
+}
+
+# Słowa kluczowe przypisujące zapytanie do klasy (sprawdzane w tej kolejności)
+QUERY_CLASS_KEYWORDS = {
+    "news": ("news", "latest", "today", "trending", "breaking", "wiadomości"),
+    "market": ("stock", "outlook", "price", "earnings", "forecast", "shares"),
+}
+
+DEFAULT_CACHE_PATH = "./memory/search_cache.db"
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizuje zapytanie tak, aby drobne różnice nie psuły trafień w cache.
+
+    Zamienia litery na małe, usuwa znaki interpunkcyjne z końców słów
+    i scala wielokrotne białe znaki.
+    """
+    words = re.findall(r"[\w$.&-]+", query.lower())
+    return " ".join(word.strip(".-") for word in words if word.strip(".-"))
+
+
+def classify_query(query: str, search_type: str = "search") -> str:
+    """
+    Przypisuje zapytanie do klasy decydującej o czasie życia wyniku.
+
+    Args:
+        query: Znormalizowane zapytanie
+        search_type: Typ wyszukiwania Serper ("search" lub "news")
+
+    Returns:
+        Nazwa klasy: "news", "market" lub "general"
+    """
+    if search_type == "news":
+        return "news"
+    words = set(query.split())
+    for query_class, keywords in QUERY_CLASS_KEYWORDS.items():
+        if words.intersection(keywords):
+            return query_class
+    return "general"
+
+
+# ============================================================================
+# MAGAZYN CACHE (SQLite)
+# ============================================================================
+
+
+class SearchCache:
+    """
+    Trwały cache wyników wyszukiwania oparty na SQLite.
+
+    Instancja jest bezpieczna wątkowo - może być współdzielona przez
+    wielu agentów i równoległe uruchomienia załogi w jednym procesie.
+    Między procesami współdzielona jest baza danych na dysku.
+
+    Atrybuty:
+        path: Ścieżka do pliku bazy SQLite
+        max_entries: Maksymalna liczba wpisów przed usuwaniem LRU
+        ttls: Czas życia wyników dla poszczególnych klas zapytań
+        hits: Liczba trafień w tym procesie
+        misses: Liczba chybień w tym procesie
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttls: Optional[Dict[str, float]] = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")  # Równoległe odczyty z wielu procesów
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                query_class TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_search_cache_access "
+            "ON search_cache (last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(query: str, search_type: str = "search") -> str:
+        """Tworzy klucz cache na podstawie znormalizowanego zapytania i typu."""
+        raw = f"{search_type}:{normalize_query(query)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, query: str, search_type: str = "search") -> Optional[str]:
+        """
+        Zwraca zapisany wynik, jeśli istnieje i nie jest przeterminowany.
+
+        Trafienie aktualizuje czas ostatniego dostępu (na potrzeby LRU).
+        """
+        key = self.make_key(query, search_type)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, query_class, created_at FROM search_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None:
+                result, query_class, created_at = row
+                if now - created_at <= self.ttls.get(query_class, DEFAULT_TTLS["general"]):
+                    self._conn.execute(
+                        "UPDATE search_cache SET last_access = ? WHERE key = ?",
+                        (now, key),
+                    )
+                    self._conn.commit()
+                    self.hits += 1
+                    return result
+            self.misses += 1
+            return None
+
+    def put(self, query: str, result: str, search_type: str = "search") -> None:
+        """Zapisuje wynik i w razie potrzeby usuwa najdawniej używane wpisy."""
+        normalized = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache "
+                "(key, query, query_class, result, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self.make_key(query, search_type),
+                    normalized,
+                    classify_query(normalized, search_type),
+                    result,
+                    now,
+                    now,
+                ),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Usuwa nadmiarowe wpisy, zaczynając od najdawniej używanych (LRU)."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM search_cache WHERE key IN ("
+                "SELECT key FROM search_cache ORDER BY last_access ASC LIMIT ?)",
+                (excess,),
+            )
+
+    def close(self) -> None:
+        """Zamyka połączenie z bazą cache (instancja nie nadaje się do dalszego użycia)."""
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Zwraca liczniki trafień/chybień i bieżący rozmiar cache."""
+        with self._lock:
+            (entries,) = self._conn.execute(
+                "SELECT COUNT(*) FROM search_cache"
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+        }
+
+
+@lru_cache(maxsize=None)
+def shared_search_cache() -> SearchCache:
+    """
+    Zwraca jedną instancję cache na proces.
+
+    Dzięki temu wszyscy agenci i wszystkie załogi tworzone w procesie
+    (także w trybie wsadowym) korzystają z tych samych liczników i połączenia.
+    """
+    return SearchCache(
+        path=os.getenv("SEARCH_CACHE_PATH", DEFAULT_CACHE_PATH),
+        max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    )
+
+
+# ============================================================================
+# NARZĘDZIE DLA AGENTÓW
+# ============================================================================
+
+
+class CachedSearchInput(BaseModel):
+    """Schemat danych wejściowych dla wyszukiwania z cache."""
+
+    search_query: str = Field(
+        ..., description="Zapytanie do wyszukania w internecie."
+    )
+
+
+class CachedSerperDevTool(BaseTool):
+    """
+    Wyszukiwarka Serper z trwałym cache wyników.
+
+    Zachowuje się jak SerperDevTool, ale przed wysłaniem zapytania sprawdza
+    cache. Chybienia są przekazywane do SerperDevTool, a wynik jest zapisywany.
+
+    Atrybuty:
+        search_type: Typ wyszukiwania Serper ("search" lub "news")
+        cache: Magazyn cache (domyślnie współdzielony w procesie)
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str = "Search the internet with Serper"
+    description: str = (
+        "Narzędzie do wyszukiwania informacji w internecie. "
+        "Zwraca wyniki wyszukiwania dla podanego zapytania."
+    )
+    args_schema: Type[BaseModel] = CachedSearchInput
+    search_type: str = "search"
+    cache: SearchCache = Field(default_factory=shared_search_cache)
+    serper: Optional[SerperDevTool] = None
+
+    def _run(self, search_query: str, **kwargs: Any) -> str:
+        """
+        Zwraca wynik z cache lub wykonuje wyszukiwanie przez Serper.
+
+        Args:
+            search_query: Zapytanie do wyszukania
+
+        Returns:
+            Wyniki wyszukiwania w formacie JSON
+        """
+        cached = self.cache.get(search_query, self.search_type)
+        if cached is not None:
+            return cached
+
+        # Narzędzie Serper tworzone leniwie - trafienia w cache go nie potrzebują
+        if self.serper is None:
+            self.serper = SerperDevTool(search_type=self.search_type)
+        # Chybienia przechodzą przez wspólny limit zapytań Serper w procesie
+        result = shared_governor("search").call(
+            lambda: self.serper.run(search_query=search_query)
+        )
+        serialized = result if isinstance(result, str) else json.dumps(result, ensure_ascii=False)
+
+        self.cache.put(search_query, serialized, self.search_type)
+        return serialized
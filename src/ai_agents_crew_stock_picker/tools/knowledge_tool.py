@@ -0,0 +1,55 @@
+"""
+Narzędzie wyszukiwania w bazie wiedzy (katalog knowledge/).
+
+Przeszukuje współdzielony indeks fragmentów (knowledge.py) - indeks jest
+ładowany raz na proces, a każda instancja narzędzia ogranicza wyszukiwanie
+do podzbiorów przypisanych agentowi (klucz "knowledge_subsets" w agents.yaml).
+"""
+
+from typing import List, Optional, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, ConfigDict, Field
+
+from ai_agents_crew_stock_picker.knowledge import KnowledgeIndex, shared_knowledge_index
+
+
+class KnowledgeSearchInput(BaseModel):
+    """Schemat danych wejściowych dla wyszukiwania w bazie wiedzy."""
+
+    query: str = Field(..., description="Czego szukasz (np. 'preferencje inwestora')")
+    top_k: int = Field(4, description="Maksymalna liczba zwracanych fragmentów")
+
+
+class KnowledgeSearchTool(BaseTool):
+    """
+    Wyszukiwanie fragmentów plików wiedzy podobnych do zapytania.
+
+    Atrybuty:
+        subsets: Przeszukiwane podzbiory (None - wszystkie)
+        index: Indeks wiedzy (domyślnie współdzielony w procesie)
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str = "Wyszukiwanie w bazie wiedzy"
+    description: str = (
+        "Przeszukuje wewnętrzną bazę wiedzy: profil i preferencje inwestora, "
+        "listy obserwowanych spółek i własne analizy. Użyj, aby dopasować "
+        "wybór firm do preferencji użytkownika."
+    )
+    args_schema: Type[BaseModel] = KnowledgeSearchInput
+    subsets: Optional[List[str]] = None
+    index: KnowledgeIndex = Field(default_factory=shared_knowledge_index)
+
+    def _run(self, query: str, top_k: int = 4) -> str:
+        """
+        Zwraca najbardziej pasujące fragmenty z nazwą pliku źródłowego.
+
+        Returns:
+            Fragmenty oddzielone pustą linią lub informacja o braku wyników
+        """
+        hits = self.index.search(query, subsets=self.subsets, top_k=max(1, top_k))
+        if not hits:
+            return "Brak pasujących informacji w bazie wiedzy."
+        return "\n\n".join(f"[{hit.source}] {hit.text}" for hit in hits)
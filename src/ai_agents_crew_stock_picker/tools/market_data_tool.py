@@ -0,0 +1,367 @@
+"""
+Narzędzie do ilościowego przesiewu spółek na lokalnych danych rynkowych.
+
+Dotąd każda liczba w analizach pochodziła z wyszukiwań Serper - analiza
+była wolna, a wyniki niepowtarzalne. To narzędzie wczytuje lokalną historię
+cen i dane fundamentalne (CSV lub Parquet) raz do tablic NumPy i liczy
+wskaźniki dla dowolnej grupy tickerów jednym wektorowym wywołaniem:
+- momentum (1, 3, 6 i 12 miesięcy)
+- zmienność (roczna, z dziennych stóp zwrotu)
+- maksymalne obsunięcie (drawdown) w ostatnim roku
+- wskaźniki wyceny: P/E, P/B, P/S
+
+Agenci mogą przesiać setki tickerów w milisekundach i wydawać wyszukiwania
+tylko na krótką listę.
+
+Pliki w katalogu danych (MARKET_DATA_DIR):
+    prices.csv / prices.parquet            - kolumny: date, ticker, close
+    fundamentals.csv / fundamentals.parquet - kolumny: ticker, eps,
+                                             book_value_per_share, sales_per_share
+
+Po pierwszym wczytaniu dane są zapisywane jako tablice .npy w <katalog>/.cache
+i kolejne procesy otwierają je przez mapowanie pamięci (np.load, mmap_mode).
+Cache jest odbudowywany po zmianie plików źródłowych.
+
+Zmienne środowiskowe (opcjonalne):
+    - MARKET_DATA_DIR: Katalog z danymi (domyślnie: ./market_data)
+"""
+
+import csv
+import json
+import os
+import threading
+import warnings
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+from crewai.tools import BaseTool
+from pydantic import BaseModel, ConfigDict, Field
+
+from ai_agents_crew_stock_picker.registry import normalize_ticker
+
+DEFAULT_DATA_DIR = "./market_data"
+TRADING_DAYS = 252
+
+# Okna momentum w dniach sesyjnych
+MOMENTUM_WINDOWS: Dict[str, int] = {
+    "momentum_1m": 21,
+    "momentum_3m": 63,
+    "momentum_6m": 126,
+    "momentum_12m": 252,
+}
+VOLATILITY_WINDOW = 63
+DRAWDOWN_WINDOW = 252
+
+FUNDAMENTAL_FIELDS = ("eps", "book_value_per_share", "sales_per_share")
+
+METRICS = ("price", *MOMENTUM_WINDOWS, "volatility", "max_drawdown", "pe", "pb", "ps")
+
+# Wskaźniki, dla których niższa wartość jest lepsza (sortowanie rosnące)
+ASCENDING_METRICS = frozenset({"volatility", "max_drawdown", "pe", "pb", "ps"})
+
+
+# ============================================================================
+# WCZYTYWANIE DANYCH
+# ============================================================================
+
+
+def _find_source(data_dir: Path, name: str) -> Optional[Path]:
+    """Zwraca plik <name>.parquet lub <name>.csv (Parquet ma pierwszeństwo)."""
+    for suffix in (".parquet", ".csv"):
+        path = data_dir / f"{name}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def _read_table(path: Path) -> Dict[str, List[Any]]:
+    """Wczytuje plik CSV lub Parquet jako słownik kolumna -> lista wartości."""
+    if path.suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "Pliki Parquet wymagają pakietu pyarrow (pip install pyarrow)"
+            ) from e
+        return pq.read_table(path).to_pydict()
+    with path.open(newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle)
+        header = next(reader, [])
+        # Transpozycja wierszy na kolumny w C - wielokrotnie szybsza niż DictReader
+        columns = list(zip(*reader)) or [()] * len(header)
+    return {name.strip(): list(values) for name, values in zip(header, columns)}
+
+
+def _to_float(values: Sequence[Any]) -> np.ndarray:
+    """Konwertuje kolumnę na float64 (puste wartości -> NaN)."""
+    column = np.array(["nan" if value in (None, "") else value for value in values], dtype=str)
+    return column.astype(np.float64)
+
+
+def _forward_fill(prices: np.ndarray) -> np.ndarray:
+    """Uzupełnia braki notowań ostatnią znaną ceną (wektorowo, wzdłuż dni)."""
+    days = np.arange(prices.shape[1])
+    last_known = np.where(np.isnan(prices), 0, days)
+    np.maximum.accumulate(last_known, axis=1, out=last_known)
+    return prices[np.arange(prices.shape[0])[:, None], last_known]
+
+
+def _normalize_tickers(values: Sequence[Any]) -> np.ndarray:
+    """Normalizuje tickery (registry.normalize_ticker) - raz dla każdej unikalnej wartości."""
+    unique, inverse = np.unique(np.array(values, dtype=str), return_inverse=True)
+    normalized = np.array([normalize_ticker(value) or "" for value in unique.tolist()], dtype=str)
+    return normalized[inverse.reshape(-1)]
+
+
+def _source_signature(paths: Sequence[Optional[Path]]) -> List[List[Any]]:
+    return [
+        [path.name, path.stat().st_size, path.stat().st_mtime_ns] for path in paths if path
+    ]
+
+
+class MarketDataStore:
+    """
+    Historia cen i dane fundamentalne jako tablice NumPy.
+
+    Atrybuty:
+        data_dir: Katalog z plikami danych
+        tickers: Posortowane tickery (wiersze tablic)
+        dates: Daty sesji (kolumny tablicy cen)
+        prices: Ceny zamknięcia [ticker x dzień] (mapowane z pliku .npy)
+        fundamentals: Dane fundamentalne [ticker x FUNDAMENTAL_FIELDS]
+    """
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR):
+        self.data_dir = Path(data_dir)
+        self.tickers = np.array([], dtype=str)
+        self.dates = np.array([], dtype=str)
+        self.prices = np.empty((0, 0))
+        self.fundamentals = np.empty((0, len(FUNDAMENTAL_FIELDS)))
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "MarketDataStore":
+        return cls(os.getenv("MARKET_DATA_DIR", DEFAULT_DATA_DIR))
+
+    @property
+    def available(self) -> bool:
+        """Czy w katalogu danych jest plik cen."""
+        return _find_source(self.data_dir, "prices") is not None
+
+    def load(self) -> "MarketDataStore":
+        """Wczytuje dane (raz) - z cache .npy lub, gdy jest nieaktualny, z plików źródłowych."""
+        with self._lock:
+            if self._loaded:
+                return self
+            prices_path = _find_source(self.data_dir, "prices")
+            if prices_path is None:
+                raise FileNotFoundError(
+                    f"Brak pliku prices.csv ani prices.parquet w katalogu {self.data_dir}"
+                )
+            sources = [prices_path, _find_source(self.data_dir, "fundamentals")]
+            cache_dir = self.data_dir / ".cache"
+            signature = _source_signature(sources)
+            manifest = cache_dir / "source.json"
+            if not manifest.exists() or json.loads(manifest.read_text()) != signature:
+                self._build_cache(*sources, cache_dir)
+                manifest.write_text(json.dumps(signature))
+            self.tickers = np.load(cache_dir / "tickers.npy")
+            self.dates = np.load(cache_dir / "dates.npy")
+            self.prices = np.load(cache_dir / "prices.npy", mmap_mode="r")
+            self.fundamentals = np.load(cache_dir / "fundamentals.npy", mmap_mode="r")
+            self._loaded = True
+        return self
+
+    def _build_cache(
+        self, prices_path: Path, fundamentals_path: Optional[Path], cache_dir: Path
+    ) -> None:
+        """Zamienia dane w formacie długim (data, ticker, cena) na macierz i zapisuje .npy."""
+        table = _read_table(prices_path)
+        tickers, ticker_rows = np.unique(_normalize_tickers(table["ticker"]), return_inverse=True)
+        # Daty ISO (RRRR-MM-DD) sortują się poprawnie jako tekst
+        dates, date_columns = np.unique(np.array(table["date"], dtype=str), return_inverse=True)
+        prices = np.full((len(tickers), len(dates)), np.nan)
+        prices[ticker_rows, date_columns] = _to_float(table["close"])
+        prices = _forward_fill(prices)
+
+        fundamentals = np.full((len(tickers), len(FUNDAMENTAL_FIELDS)), np.nan)
+        if fundamentals_path is not None:
+            table = _read_table(fundamentals_path)
+            rows, found = self._rows_for(tickers, _normalize_tickers(table["ticker"]))
+            for column, field in enumerate(FUNDAMENTAL_FIELDS):
+                if field in table:
+                    fundamentals[rows, column] = _to_float(table[field])[found]
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        np.save(cache_dir / "tickers.npy", tickers)
+        np.save(cache_dir / "dates.npy", dates)
+        np.save(cache_dir / "prices.npy", prices)
+        np.save(cache_dir / "fundamentals.npy", fundamentals)
+
+    @staticmethod
+    def _rows_for(universe: np.ndarray, tickers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Wyszukuje tickery w posortowanym uniwersum (wyszukiwanie binarne).
+
+        Returns:
+            (indeksy wierszy znalezionych tickerów, maska znalezionych)
+        """
+        if not len(universe):
+            return np.array([], dtype=int), np.zeros(len(tickers), dtype=bool)
+        positions = np.minimum(np.searchsorted(universe, tickers), len(universe) - 1)
+        found = universe[positions] == tickers
+        return positions[found], found
+
+    # ------------------------------------------------------------------------
+    # Wskaźniki
+    # ------------------------------------------------------------------------
+
+    def screen(self, tickers: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """
+        Liczy wszystkie wskaźniki dla grupy tickerów jednym wywołaniem.
+
+        Args:
+            tickers: Tickery do przesiania (None - cały zbiór danych)
+
+        Returns:
+            Słownik z kluczami "tickers" (znalezione), "unknown" (brak danych)
+            i tablicą NumPy dla każdego wskaźnika z METRICS
+        """
+        self.load()
+        if tickers is None:
+            rows = np.arange(len(self.tickers))
+            unknown: List[str] = []
+        else:
+            requested = _normalize_tickers(tickers)
+            rows, found = self._rows_for(self.tickers, requested)
+            unknown = [str(ticker) for ticker in np.asarray(tickers)[~found]]
+
+        prices = np.asarray(self.prices[rows])  # Kopiowane są tylko wybrane wiersze
+        fundamentals = np.asarray(self.fundamentals[rows])
+        days = prices.shape[1]
+        last = prices[:, -1] if days else np.full(len(rows), np.nan)
+        metrics: Dict[str, Any] = {"tickers": self.tickers[rows].tolist(), "unknown": unknown}
+
+        with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+            # Wiersze bez danych (same NaN) dają NaN zamiast ostrzeżeń
+            warnings.simplefilter("ignore", RuntimeWarning)
+            metrics["price"] = last
+            for name, window in MOMENTUM_WINDOWS.items():
+                metrics[name] = (
+                    last / prices[:, -window - 1] - 1 if days > window else np.full(len(rows), np.nan)
+                )
+            returns = np.diff(np.log(prices[:, -VOLATILITY_WINDOW - 1:]), axis=1)
+            metrics["volatility"] = np.nanstd(returns, axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+            window = prices[:, -DRAWDOWN_WINDOW:]
+            peaks = np.fmax.accumulate(window, axis=1)
+            metrics["max_drawdown"] = np.nanmax(1 - window / peaks, axis=1)
+            # Wyceny tylko dla dodatnich wartości w mianowniku (ujemny zysk -> brak P/E)
+            for name, column in (("pe", 0), ("pb", 1), ("ps", 2)):
+                denominator = fundamentals[:, column]
+                metrics[name] = np.where(denominator > 0, last / denominator, np.nan)
+        return metrics
+
+    @property
+    def as_of(self) -> Optional[str]:
+        """Data ostatniej sesji w danych."""
+        return str(self.dates[-1]) if len(self.dates) else None
+
+
+@lru_cache(maxsize=None)
+def shared_market_data() -> MarketDataStore:
+    """Zwraca jeden magazyn danych rynkowych na proces (dane wczytywane raz)."""
+    return MarketDataStore.from_env()
+
+
+def rank(metrics: Dict[str, Any], sort_by: str, top_n: int) -> List[Dict[str, Any]]:
+    """
+    Zwraca top_n wierszy posortowanych według wskaźnika (braki danych na końcu).
+
+    Raises:
+        ValueError: Jeśli wskaźnik nie istnieje
+    """
+    if sort_by not in METRICS:
+        raise ValueError(f"Nieznany wskaźnik: {sort_by} (dostępne: {', '.join(METRICS)})")
+    values = metrics[sort_by]
+    missing = np.inf if sort_by in ASCENDING_METRICS else -np.inf
+    keys = np.where(np.isnan(values), missing, values)
+    order = np.argsort(keys if sort_by in ASCENDING_METRICS else -keys, kind="stable")[:top_n]
+    return [
+        {
+            "ticker": metrics["tickers"][row],
+            **{
+                name: None if np.isnan(metrics[name][row]) else round(float(metrics[name][row]), 4)
+                for name in METRICS
+            },
+        }
+        for row in order
+    ]
+
+
+# ============================================================================
+# NARZĘDZIE DLA AGENTÓW
+# ============================================================================
+
+
+class MarketDataInput(BaseModel):
+    """Schemat danych wejściowych dla przesiewu danych rynkowych."""
+
+    tickers: str = Field(
+        "",
+        description=(
+            "Tickery oddzielone przecinkami (np. 'AAPL, MSFT'). "
+            "Puste - przesiew wszystkich spółek w danych."
+        ),
+    )
+    sort_by: str = Field(
+        "momentum_3m",
+        description=f"Wskaźnik sortowania: {', '.join(METRICS)}",
+    )
+    top_n: int = Field(20, description="Liczba zwracanych spółek")
+
+
+class MarketDataTool(BaseTool):
+    """
+    Przesiew spółek na lokalnych danych rynkowych (bez sieci).
+
+    Atrybuty:
+        store: Magazyn danych (domyślnie współdzielony w procesie)
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str = "Przesiew danych rynkowych"
+    description: str = (
+        "Liczy momentum (1-12 mies.), zmienność, maksymalne obsunięcie oraz P/E, P/B "
+        "i P/S na lokalnych danych historycznych - dla wielu tickerów naraz, "
+        "w milisekundach. Użyj go przed wyszukiwaniem w internecie, aby wybrać "
+        "spółki warte dokładniejszej analizy. Wyniki są powtarzalne."
+    )
+    args_schema: Type[BaseModel] = MarketDataInput
+    store: MarketDataStore = Field(default_factory=shared_market_data)
+
+    def _run(self, tickers: str = "", sort_by: str = "momentum_3m", top_n: int = 20) -> str:
+        """
+        Zwraca wskaźniki spółek posortowane według wybranego wskaźnika.
+
+        Returns:
+            JSON z datą danych, wynikami i listą tickerów bez danych
+        """
+        requested = [ticker.strip() for ticker in tickers.split(",") if ticker.strip()]
+        try:
+            metrics = self.store.screen(requested or None)
+            results = rank(metrics, sort_by, max(1, top_n))
+        except (FileNotFoundError, ValueError, ImportError) as e:
+            return json.dumps({"error": str(e)}, ensure_ascii=False)
+        return json.dumps(
+            {
+                "as_of": self.store.as_of,
+                "screened": len(metrics["tickers"]),
+                "unknown": metrics["unknown"],
+                "results": results,
+            },
+            ensure_ascii=False,
+        )
@@ -8,15 +8,18 @@ Wymagane zmienne środowiskowe:
     - PUSHOVER_USER: ID użytkownika Pushover
     - PUSHOVER_TOKEN: Token aplikacji Pushover
     - PUSHOVER_URL: URL API Pushover (domyślnie: https://api.pushover.net/1/messages.json)
+
+Wysyłka odbywa się w tle przez NotificationDispatcher (notifications.py).
 """
 
-import os
+import uuid
 from typing import Type
 
-import requests
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from ai_agents_crew_stock_picker.notifications import shared_dispatcher
+
 
 # ============================================================================
 # SCHEMAT WEJŚCIOWY PYDANTIC
@@ -58,6 +61,7 @@ class PushNotificationTool(BaseTool):
         name: Nazwa narzędzia widoczna dla LLM
         description: Opis narzędzia używany przez LLM do decyzji o użyciu
         args_schema: Schemat Pydantic definiujący parametry wejściowe
+        run_id: Identyfikator uruchomienia do łączenia powiadomień w digest
     """
 
     name: str = "Wyślij powiadomienie"
@@ -68,33 +72,29 @@ class PushNotificationTool(BaseTool):
     )
     args_schema: Type[BaseModel] = PushNotification
 
+    # Powiadomienia z tym samym run_id są łączone w jedno podsumowanie.
+    # Każda instancja narzędzia (czyli każda załoga) ma własny identyfikator.
+    run_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+
     def _run(self, message: str) -> str:
         """
-        Wykonuje wysłanie powiadomienia push.
-        
+        Przekazuje powiadomienie do dyspozytora działającego w tle.
+
         Metoda _run() jest wywoływana przez CrewAI, gdy agent zdecyduje
-        się użyć tego narzędzia. Pobiera dane z zmiennych środowiskowych
-        i wysyła żądanie HTTP do API Pushover.
-        
+        się użyć tego narzędzia. Wysyłka HTTP odbywa się w tle (z pulą
+        połączeń, ponowieniami i łączeniem wiadomości w digest), więc agent
+        nie czeka na odpowiedź API Pushover.
+
         Args:
             message: Treść powiadomienia do wysłania
-        
+
         Returns:
-            JSON string z potwierdzeniem wysłania
-        
-        Raises:
-            ValueError: Jeśli brakuje wymaganych zmiennych środowiskowych
+            JSON string z potwierdzeniem przyjęcia powiadomienia do wysyłki
         """
-        # Pobierz dane uwierzytelniające z zmiennych środowiskowych
-        pushover_user = os.getenv("PUSHOVER_USER")
-        pushover_token = os.getenv("PUSHOVER_TOKEN")
-        pushover_url = os.getenv(
-            "PUSHOVER_URL", 
-            "https://api.pushover.net/1/messages.json"  # Domyślny URL
-        )
-
-        # Walidacja wymaganych zmiennych środowiskowych
-        if not pushover_user or not pushover_token:
+        dispatcher = shared_dispatcher()
+
+        # Walidacja danych uwierzytelniających (odczytanych raz przez dyspozytora)
+        if not dispatcher.configured:
             error_msg = (
                 "Brak wymaganych zmiennych środowiskowych: "
                 "PUSHOVER_USER i/lub PUSHOVER_TOKEN"
@@ -105,24 +105,11 @@ class PushNotificationTool(BaseTool):
         # Wyświetl informację o wysyłanym powiadomieniu (dla debugowania)
         print(f"Push: {message}")
 
-        # Przygotuj dane do wysłania
-        payload = {
-            "user": pushover_user,
-            "token": pushover_token,
-            "message": message,
-        }
-
-        # Wyślij żądanie HTTP POST do API Pushover
-        try:
-            response = requests.post(pushover_url, data=payload, timeout=10)
-            response.raise_for_status()  # Rzuć wyjątek dla kodów błędów HTTP
-            return '{"notification": "ok"}'
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Błąd podczas wysyłania powiadomienia: {str(e)}"
-            print(f"Błąd: {error_msg}")
-            return f'{{"error": "{error_msg}"}}'
+        dispatcher.submit(message, run_id=self.run_id)
+        return '{"notification": "queued"}'
 
 
 if __name__ == "__main__":
     tool = PushNotificationTool()
     tool.run(message="Test message")
+    shared_dispatcher().flush()  # Poczekaj na wysłanie przed zakończeniem
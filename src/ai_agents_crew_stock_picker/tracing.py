@@ -0,0 +1,548 @@
+"""
+Śledzenie (tracing) i metryki uruchomień załogi.
+
+Tryb verbose=True pokazuje przebieg pracy agentów, ale nie mówi, gdzie
+upłynął czas: w managerze, wyszukiwaniach Serper, embeddingach pamięci
+czy wysyłce powiadomienia. Ten moduł nasłuchuje zdarzeń CrewAI (event bus)
+i zapisuje każdy krok jako "span" z czasem trwania:
+
+- agent: wykonanie zadania przez agenta (także managera)
+- task: zadanie od startu do zakończenia
+- tool: wywołanie narzędzia (wyszukiwarka, powiadomienia push)
+- llm: wywołanie modelu językowego
+- memory: zapis i odczyt pamięci
+
+Początek i koniec kroku są łączone po identyfikatorach zadania, agenta
+i źródła zdarzenia oraz po czasie zdarzeń - event bus CrewAI wykonuje
+handlery w puli wątków, więc koniec kroku może zostać obsłużony przed jego
+początkiem. Spany llm mają szacowaną liczbę tokenów promptu i odpowiedzi
+(compaction.count_tokens - zdarzenia LLM CrewAI nie przenoszą zużycia
+raportowanego przez API), a spany task i agent - sumę tych szacunków dla
+swoich wywołań LLM. Faktyczne zużycie całego uruchomienia pochodzi
+z CrewOutput.token_usage (record_usage).
+
+Po uruchomieniu ślad jest eksportowany jako JSON oraz jako plik tekstowy
+w formacie Prometheus/OpenMetrics (np. dla textfile collectora node_exporter).
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import crewai.events as crewai_events
+from crewai.events import crewai_event_bus
+
+from .compaction import count_tokens
+
+DEFAULT_TRACES_DIR = "output/traces"
+DEFAULT_METRICS_FILE = "output/metrics.prom"
+
+
+@dataclass
+class Span:
+    """
+    Pojedynczy krok uruchomienia z czasem trwania.
+
+    Atrybuty:
+        kind: Rodzaj kroku (agent, task, tool, llm, memory)
+        name: Nazwa kroku (np. rola agenta, nazwa narzędzia, model)
+        start: Czas rozpoczęcia (sekundy od startu uruchomienia)
+        duration: Czas trwania w sekundach
+        status: "ok" lub "error"
+        estimated_prompt_tokens: Szacowane tokeny promptu (llm; dla task
+            i agent - suma wywołań LLM)
+        estimated_completion_tokens: Szacowane tokeny odpowiedzi (jak wyżej)
+        attributes: Dodatkowe informacje (np. from_cache dla narzędzi,
+            task_id i agent_id)
+    """
+
+    kind: str
+    name: str
+    start: float
+    duration: float
+    status: str = "ok"
+    estimated_prompt_tokens: int = 0
+    estimated_completion_tokens: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+# ============================================================================
+# MAPOWANIE ZDARZEŃ CREWAI NA SPANY
+# ============================================================================
+# (zdarzenie początku, zdarzenia końca, rodzaj spanu). Zdarzenia są
+# wyszukiwane po nazwie - brakujące w danej wersji CrewAI są pomijane,
+# więc zmiana API zdarzeń nie blokuje uruchomienia załogi.
+
+SPAN_EVENTS: List[Tuple[str, Tuple[str, ...], str]] = [
+    ("TaskStartedEvent", ("TaskCompletedEvent", "TaskFailedEvent"), "task"),
+    (
+        "AgentExecutionStartedEvent",
+        ("AgentExecutionCompletedEvent", "AgentExecutionErrorEvent"),
+        "agent",
+    ),
+    ("ToolUsageStartedEvent", ("ToolUsageFinishedEvent", "ToolUsageErrorEvent"), "tool"),
+    ("LLMCallStartedEvent", ("LLMCallCompletedEvent", "LLMCallFailedEvent"), "llm"),
+    ("MemorySaveStartedEvent", ("MemorySaveCompletedEvent", "MemorySaveFailedEvent"), "memory"),
+    (
+        "MemoryQueryStartedEvent",
+        ("MemoryQueryCompletedEvent", "MemoryQueryFailedEvent"),
+        "memory",
+    ),
+]
+
+
+def _span_name(kind: str, event: Any) -> str:
+    """Wyznacza czytelną nazwę spanu na podstawie pól zdarzenia."""
+    if kind == "task":
+        task = getattr(event, "task", None)
+        return getattr(task, "name", None) or getattr(event, "task_name", None) or "task"
+    if kind == "agent":
+        agent = getattr(event, "agent", None)
+        return str(getattr(agent, "role", "agent")).strip()
+    if kind == "tool":
+        return getattr(event, "tool_name", None) or "tool"
+    if kind == "llm":
+        return getattr(event, "model", None) or "llm"
+    operation = "save" if "Save" in type(event).__name__ else "query"
+    return f"{operation}:{getattr(event, 'source_type', None) or 'memory'}"
+
+
+def _timestamp(event: Any, attribute: str = "timestamp") -> Optional[float]:
+    """Czas zdarzenia z pola datetime (domyślnie timestamp) lub None."""
+    stamp = getattr(event, attribute, None)
+    return stamp.timestamp() if isinstance(stamp, datetime) else None
+
+
+def _ids(event: Any) -> Dict[str, str]:
+    """Identyfikatory zadania i agenta zdarzenia (pola *_id lub obiekty task/agent)."""
+    ids = {}
+    for name in ("task", "agent"):
+        value = getattr(event, f"{name}_id", None) or getattr(getattr(event, name, None), "id", None)
+        if value is not None:
+            ids[f"{name}_id"] = str(value)
+    return ids
+
+
+def _span_key(kind: str, name: str, event: Any) -> Tuple:
+    """Klucz łączący początek i koniec kroku: rodzaj, nazwa, zadanie, agent i źródło."""
+    ids = _ids(event)
+    return (
+        kind,
+        name,
+        ids.get("task_id"),
+        ids.get("agent_id"),
+        getattr(event, "source_fingerprint", None),
+    )
+
+
+def _estimated_llm_tokens(event: Any, is_start: bool) -> Dict[str, int]:
+    """
+    Szacowane tokeny promptu (zdarzenie początku) lub odpowiedzi (zdarzenie
+    końca) wywołania LLM - tiktoken albo 4 znaki na token.
+    """
+    if is_start:
+        messages = getattr(event, "messages", None)
+        if isinstance(messages, list):
+            messages = "\n".join(str(message.get("content") or "") for message in messages)
+        return {"estimated_prompt_tokens": count_tokens(str(messages or ""))}
+    response = getattr(event, "response", None)
+    text = response if isinstance(response, str) else str(response or "")
+    return {"estimated_completion_tokens": count_tokens(text)}
+
+
+def flush_event_bus(timeout: float = 5.0) -> bool:
+    """
+    Czeka, aż pula wątków event bus CrewAI obsłuży zdarzenia wysłane wcześniej.
+
+    Handlery synchroniczne działają w puli wątków, więc zdarzenia końcowe
+    uruchomienia mogą być jeszcze w kolejce w chwili powrotu z kickoff().
+    Do puli trafia tyle zadań-barier, ile ma ona wątków - bariera przepuszcza
+    je dopiero wtedy, gdy wszystkie wątki są wolne, czyli po obsłużeniu
+    wcześniejszych zdarzeń (kolejka puli jest FIFO).
+
+    Returns:
+        False, jeśli pula nie opróżniła się w czasie timeout
+    """
+    executor = getattr(crewai_event_bus, "_sync_executor", None)
+    workers = getattr(executor, "_max_workers", 0)
+    if not workers:
+        return True
+    barrier = threading.Barrier(workers + 1, timeout=timeout)
+
+    def wait_for_others() -> None:
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+
+    try:
+        for _ in range(workers):
+            executor.submit(wait_for_others)
+        barrier.wait()
+    except (threading.BrokenBarrierError, RuntimeError):  # Limit czasu lub zamknięta pula
+        barrier.abort()
+        return False
+    return True
+
+
+class RunTracer:
+    """
+    Ślad pojedynczego uruchomienia załogi.
+
+    Używany jako menedżer kontekstu wokół kickoff(). Zdarzenia CrewAI
+    trafiają do wszystkich aktywnych tracerów - przy równoległych
+    uruchomieniach w jednym procesie ślady mogą się na siebie nakładać.
+
+    Atrybuty:
+        run_id: Identyfikator uruchomienia
+        spans: Zakończone kroki uruchomienia
+        tokens: Zużycie tokenów (uzupełniane przez record_usage)
+        caches: Trafienia/chybienia cache (uzupełniane przez record_cache)
+        limits: Stan ograniczników tempa (uzupełniane przez record_limits)
+        context_tokens: Tokeny kontekstu wyboru przed i po kompaktowaniu
+        duration: Czas całego uruchomienia w sekundach
+        unmatched: Liczba zdarzeń bez pary (np. tracer włączony w trakcie kroku)
+    """
+
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self.spans: List[Span] = []
+        self.tokens: Dict[str, int] = {}
+        self.caches: Dict[str, Dict[str, int]] = {}
+        self.limits: Dict[str, Dict[str, float]] = {}
+        self.context_tokens: Dict[str, int] = {}
+        self.duration = 0.0
+        self.unmatched = 0
+        self._started_at = 0.0
+        # Niesparowane początki i końce kroków: klucz -> [(czas, stan, atrybuty)]
+        self._open: Dict[Tuple, List[Tuple[float, str, Dict[str, Any]]]] = defaultdict(list)
+        self._ended: Dict[Tuple, List[Tuple[float, str, Dict[str, Any]]]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "RunTracer":
+        _register_listeners()
+        self._started_at = time.time()
+        with _ACTIVE_LOCK:
+            _ACTIVE_TRACERS.append(self)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.duration = time.time() - self._started_at
+        # Zdarzenia końcowe mogą jeszcze czekać w puli wątków event bus
+        flush_event_bus()
+        with _ACTIVE_LOCK:
+            _ACTIVE_TRACERS.remove(self)
+        with self._lock:
+            pending = [*self._open.values(), *self._ended.values()]
+            self.unmatched = sum(map(len, pending))
+            self._open.clear()
+            self._ended.clear()
+            self.spans.sort(key=lambda span: span.start)
+            self._roll_up_tokens()
+
+    # ------------------------------------------------------------------------
+    # Zbieranie danych
+    # ------------------------------------------------------------------------
+
+    def on_start(self, kind: str, event: Any) -> None:
+        name = _span_name(kind, event)
+        started = _timestamp(event) or time.time()
+        attributes: Dict[str, Any] = dict(_ids(event))
+        if kind == "llm":
+            attributes.update(_estimated_llm_tokens(event, is_start=True))
+        key = _span_key(kind, name, event)
+        with self._lock:
+            ended = self._ended.get(key)
+            # Koniec obsłużony przed początkiem - najwcześniejszy koniec po tym starcie
+            candidates = [end for end in ended or () if end[0] >= started]
+            if not candidates:
+                self._open[key].append((started, "ok", attributes))
+                return
+            end = min(candidates, key=lambda entry: entry[0])
+            ended.remove(end)
+            self._add_span(kind, name, (started, "ok", attributes), end)
+
+    def on_end(self, kind: str, event: Any, failed: bool) -> None:
+        name = _span_name(kind, event)
+        finished = _timestamp(event) or time.time()
+        attributes: Dict[str, Any] = {}
+        if getattr(event, "from_cache", None) is not None:
+            attributes["from_cache"] = bool(event.from_cache)
+        if kind == "llm" and not failed:
+            attributes.update(_estimated_llm_tokens(event, is_start=False))
+        end = (finished, "error" if failed else "ok", attributes)
+        key = _span_key(kind, name, event)
+        with self._lock:
+            starts = self._open.get(key)
+            # Najpóźniejszy początek przed tym końcem (kolejne wywołania tego
+            # samego kroku, np. LLM w pętli agenta, nie zamieniają się miejscami)
+            candidates = [start for start in starts or () if start[0] <= finished]
+            if not candidates:
+                self._ended[key].append(end)
+                return
+            start = max(candidates, key=lambda entry: entry[0])
+            starts.remove(start)
+            # Narzędzia podają własny czas rozpoczęcia
+            tool_started = _timestamp(event, "started_at")
+            if tool_started is not None:
+                start = (tool_started, *start[1:])
+            self._add_span(kind, name, start, end)
+
+    def _add_span(self, kind: str, name: str, start: Tuple, end: Tuple) -> None:
+        """Dodaje span z pary (czas, stan, atrybuty) początku i końca (pod blokadą)."""
+        attributes = {**start[2], **end[2]}
+        self.spans.append(
+            Span(
+                kind=kind,
+                name=name,
+                start=round(start[0] - self._started_at, 6),
+                duration=round(max(end[0] - start[0], 0.0), 6),
+                status=end[1],
+                estimated_prompt_tokens=attributes.pop("estimated_prompt_tokens", 0),
+                estimated_completion_tokens=attributes.pop("estimated_completion_tokens", 0),
+                attributes=attributes,
+            )
+        )
+
+    def _roll_up_tokens(self) -> None:
+        """
+        Przypisuje spanom task i agent sumę szacowanych tokenów ich wywołań LLM
+        (pod blokadą).
+        """
+        by_task: Dict[Tuple, List[int]] = defaultdict(lambda: [0, 0])
+        for span in self.spans:
+            if span.kind != "llm":
+                continue
+            task_id, agent_id = span.attributes.get("task_id"), span.attributes.get("agent_id")
+            for key in {(task_id, None), (task_id, agent_id)}:
+                by_task[key][0] += span.estimated_prompt_tokens
+                by_task[key][1] += span.estimated_completion_tokens
+        for span in self.spans:
+            task_id = span.attributes.get("task_id")
+            if span.kind == "task" and task_id:
+                tokens = by_task.get((task_id, None), (0, 0))
+                span.estimated_prompt_tokens, span.estimated_completion_tokens = tokens
+            elif span.kind == "agent" and task_id:
+                key = (task_id, span.attributes.get("agent_id"))
+                tokens = by_task.get(key, (0, 0))
+                span.estimated_prompt_tokens, span.estimated_completion_tokens = tokens
+
+    def record_usage(self, usage: Any) -> None:
+        """Zapisuje zużycie tokenów z CrewOutput.token_usage (UsageMetrics)."""
+        for key in ("total_tokens", "prompt_tokens", "completion_tokens", "successful_requests"):
+            self.tokens[key] = int(getattr(usage, key, 0) or 0)
+
+    def record_cache(self, name: str, hits: int, misses: int) -> None:
+        """Zapisuje liczniki trafień i chybień wskazanego cache."""
+        self.caches[name] = {"hits": hits, "misses": misses}
+
+    def record_compaction(self, tokens_before: int, tokens_after: int) -> None:
+        """Zapisuje rozmiar kontekstu wyboru przed i po kompaktowaniu analiz."""
+        self.context_tokens = {"before": tokens_before, "after": tokens_after}
+
+    def record_limits(self, name: str, metrics: Dict[str, float]) -> None:
+        """Zapisuje stan ogranicznika tempa dostawcy (RateGovernor.metrics())."""
+        self.limits[name] = dict(metrics)
+
+    # ------------------------------------------------------------------------
+    # Podsumowania i eksport
+    # ------------------------------------------------------------------------
+
+    def breakdown(self) -> List[Dict[str, Any]]:
+        """
+        Zwraca łączny czas, liczbę wywołań, błędy i szacowane tokeny dla
+        każdego (rodzaj, nazwa).
+        """
+        totals: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for span in self.spans:
+            entry = totals.setdefault(
+                (span.kind, span.name),
+                {
+                    "kind": span.kind,
+                    "name": span.name,
+                    "count": 0,
+                    "total": 0.0,
+                    "errors": 0,
+                    "estimated_prompt_tokens": 0,
+                    "estimated_completion_tokens": 0,
+                },
+            )
+            entry["count"] += 1
+            entry["total"] += span.duration
+            entry["errors"] += span.status == "error"
+            entry["estimated_prompt_tokens"] += span.estimated_prompt_tokens
+            entry["estimated_completion_tokens"] += span.estimated_completion_tokens
+        return sorted(totals.values(), key=lambda entry: entry["total"], reverse=True)
+
+    def breakdown_table(self, limit: int = 15) -> str:
+        """Zwraca tabelę czasu w podziale na kroki do wyświetlenia w konsoli."""
+        header = (
+            f"{'Rodzaj':<8}{'Nazwa':<40}{'Wywołania':>10}{'Czas [s]':>10}{'Udział':>8}"
+            f"{'~Tokeny':>10}"
+        )
+        lines = [header, "-" * len(header)]
+        for entry in self.breakdown()[:limit]:
+            share = entry["total"] / self.duration if self.duration else 0.0
+            tokens = entry["estimated_prompt_tokens"] + entry["estimated_completion_tokens"]
+            lines.append(
+                f"{entry['kind']:<8}{entry['name'][:39]:<40}{entry['count']:>10}"
+                f"{entry['total']:>10.2f}{share:>8.0%}{tokens:>10}"
+            )
+        lines.append(f"Czas całkowity: {self.duration:.2f} s (~Tokeny - szacunek z treści)")
+        if self.tokens:
+            lines.append(
+                f"Tokeny: {self.tokens['total_tokens']} "
+                f"(prompt {self.tokens['prompt_tokens']}, "
+                f"odpowiedzi {self.tokens['completion_tokens']})"
+            )
+        for name, counters in self.caches.items():
+            lines.append(f"Cache {name}: {counters['hits']} trafień, {counters['misses']} chybień")
+        if self.context_tokens:
+            lines.append(
+                f"Kontekst wyboru: {self.context_tokens['before']} -> "
+                f"{self.context_tokens['after']} tokenów po kompaktowaniu"
+            )
+        for name, metrics in self.limits.items():
+            lines.append(
+                f"Limit {name}: współbieżność {metrics['concurrency_limit']:g}, "
+                f"{metrics['requests_per_second']:g} żądań/s, "
+                f"429: {metrics['throttled']}, oczekiwanie {metrics['wait_seconds']:.2f} s"
+            )
+        return "\n".join(lines)
+
+    def save_json(self, traces_dir: str = DEFAULT_TRACES_DIR) -> Path:
+        """Zapisuje pełny ślad uruchomienia jako <traces_dir>/<run_id>.json."""
+        path = Path(traces_dir) / f"{self.run_id}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        trace = {
+            "run_id": self.run_id,
+            "started_at": datetime.fromtimestamp(self._started_at).isoformat(),
+            "duration": self.duration,
+            "tokens": self.tokens,
+            "caches": self.caches,
+            "limits": self.limits,
+            "context_tokens": self.context_tokens,
+            "unmatched_events": self.unmatched,
+            "spans": [asdict(span) for span in self.spans],
+        }
+        path.write_text(json.dumps(trace, indent=2, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def to_openmetrics(self) -> str:
+        """Zwraca podsumowanie uruchomienia w formacie tekstowym OpenMetrics."""
+
+        def label(value: str) -> str:
+            return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+        lines = [
+            "# TYPE stock_picker_run_duration_seconds gauge",
+            f"stock_picker_run_duration_seconds {self.duration:.6f}",
+            "# TYPE stock_picker_step_duration_seconds summary",
+        ]
+        for entry in self.breakdown():
+            labels = f'kind="{entry["kind"]}",name="{label(entry["name"])}"'
+            lines.append(f"stock_picker_step_duration_seconds_sum{{{labels}}} {entry['total']:.6f}")
+            lines.append(f"stock_picker_step_duration_seconds_count{{{labels}}} {entry['count']}")
+        lines.append("# TYPE stock_picker_step_errors counter")
+        for entry in self.breakdown():
+            labels = f'kind="{entry["kind"]}",name="{label(entry["name"])}"'
+            lines.append(f"stock_picker_step_errors_total{{{labels}}} {entry['errors']}")
+        lines.append(
+            "# HELP stock_picker_step_estimated_tokens Szacowane tokeny kroku "
+            "(tiktoken lub 4 znaki na token), nie zużycie raportowane przez API"
+        )
+        lines.append("# TYPE stock_picker_step_estimated_tokens counter")
+        for entry in self.breakdown():
+            labels = f'kind="{entry["kind"]}",name="{label(entry["name"])}"'
+            for token_type in ("prompt", "completion"):
+                value = entry[f"estimated_{token_type}_tokens"]
+                lines.append(
+                    f'stock_picker_step_estimated_tokens_total{{{labels},type="{token_type}"}} '
+                    f"{value}"
+                )
+        lines.append(
+            "# HELP stock_picker_tokens Zużycie tokenów uruchomienia raportowane przez API"
+        )
+        lines.append("# TYPE stock_picker_tokens gauge")
+        for key, value in self.tokens.items():
+            lines.append(f'stock_picker_tokens{{type="{key}"}} {value}')
+        lines.append("# TYPE stock_picker_cache_requests counter")
+        for name, counters in self.caches.items():
+            for result, value in counters.items():
+                lines.append(
+                    f'stock_picker_cache_requests_total{{cache="{name}",result="{result}"}} {value}'
+                )
+        lines.append("# TYPE stock_picker_context_tokens gauge")
+        for state, value in self.context_tokens.items():
+            lines.append(f'stock_picker_context_tokens{{stage="pick",state="{state}"}} {value}')
+        lines.append("# TYPE stock_picker_rate_limit gauge")
+        for name, metrics in self.limits.items():
+            for metric, value in metrics.items():
+                lines.append(
+                    f'stock_picker_rate_limit{{provider="{name}",metric="{metric}"}} {value}'
+                )
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_openmetrics(self, path: str = DEFAULT_METRICS_FILE) -> Path:
+        """
+        Zapisuje metryki do pliku tekstowego.
+
+        Zapis przez plik tymczasowy i zmianę nazwy - collector nigdy
+        nie odczyta w połowie zapisanego pliku.
+        """
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temporary = target.with_suffix(target.suffix + ".tmp")
+        temporary.write_text(self.to_openmetrics(), encoding="utf-8")
+        temporary.replace(target)
+        return target
+
+
+# ============================================================================
+# REJESTRACJA NASŁUCHIWANIA ZDARZEŃ
+# ============================================================================
+# Handlery rejestrujemy w event bus tylko raz na proces; każde zdarzenie
+# jest przekazywane do wszystkich aktywnych tracerów.
+
+_ACTIVE_TRACERS: List[RunTracer] = []
+_ACTIVE_LOCK = threading.Lock()
+_REGISTERED = False
+
+
+def _dispatch(kind: str, is_start: bool, failed: bool = False):
+    def handler(source: Any, event: Any) -> None:
+        with _ACTIVE_LOCK:
+            tracers = list(_ACTIVE_TRACERS)
+        for tracer in tracers:
+            if is_start:
+                tracer.on_start(kind, event)
+            else:
+                tracer.on_end(kind, event, failed)
+
+    return handler
+
+
+def _register_listeners() -> None:
+    global _REGISTERED
+    with _ACTIVE_LOCK:
+        if _REGISTERED:
+            return
+        _REGISTERED = True
+
+    for start_name, end_names, kind in SPAN_EVENTS:
+        start_event = getattr(crewai_events, start_name, None)
+        if start_event is None:
+            continue
+        crewai_event_bus.on(start_event)(_dispatch(kind, is_start=True))
+        for end_name in end_names:
+            end_event = getattr(crewai_events, end_name, None)
+            if end_event is not None:
+                failed = "Failed" in end_name or "Error" in end_name
+                crewai_event_bus.on(end_event)(_dispatch(kind, is_start=False, failed=failed))
@@ -0,0 +1,63 @@
+"""
+Wspólna konfiguracja testów.
+
+Załoga zapisuje pamięć, rejestr firm, magazyny i wyniki w ścieżkach
+względnych (./memory, output/), a Chroma w katalogu CREWAI_STORAGE_DIR -
+testy działają w katalogu tymczasowym, z lokalnym embedderem i bez
+żądań sieciowych (telemetria i tracing CrewAI wyłączone).
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_workdir(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp("stock_picker")
+    previous = os.getcwd()
+    os.environ.update(
+        {
+            "MEMORY_EMBEDDER": "hashing",
+            "OPENAI_API_KEY": "fake-key",
+            "CREWAI_STORAGE_DIR": str(workdir / "crewai_storage"),
+            "CREWAI_DISABLE_TELEMETRY": "true",
+            "CREWAI_TRACING_ENABLED": "false",
+            "CREWAI_TESTING": "true",  # Bez pytania o ślady przy pierwszym uruchomieniu
+            "OTEL_SDK_DISABLED": "true",
+        }
+    )
+    os.chdir(workdir)
+    yield workdir
+    os.chdir(previous)
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Atrapa API OpenAI i wyszukiwarki z benchmarków (benchmarks/fakes.py)."""
+    benchmarks = Path(__file__).resolve().parents[1] / "benchmarks"
+    monkeypatch.syspath_prepend(str(benchmarks))
+    from fakes import FakeLLMServer, FakeSearchTool
+
+    from ai_agents_crew_stock_picker.crew import AiAgentsCrewStockPicker
+
+    search_tool = FakeSearchTool()
+    # Agenci powstają w konstruktorze (CrewBase) - podmiana na klasie
+    monkeypatch.setattr(AiAgentsCrewStockPicker, "_search_tool", lambda self: search_tool)
+    with FakeLLMServer(companies=3) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        monkeypatch.setenv("OPENAI_API_BASE", server.base_url)
+        yield server
+
+
+@pytest.fixture
+def pipeline_crew(fake_llm, tmp_path):
+    """Załoga w trybie potoku z osobnym katalogiem wyników i stanem."""
+    from ai_agents_crew_stock_picker.crew import AiAgentsCrewStockPicker
+
+    crew_instance = AiAgentsCrewStockPicker()
+    crew_instance.execution_mode = "pipeline"  # Atrapa nie obsługuje delegowania managera
+    crew_instance.output_dir = str(tmp_path / "output")
+    crew_instance.use_isolated_state(str(tmp_path / "state"))
+    return crew_instance
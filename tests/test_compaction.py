@@ -0,0 +1,46 @@
+"""Testy kompaktowania kontekstu wyboru firmy."""
+
+import json
+
+from crewai.tasks.task_output import TaskOutput
+
+from ai_agents_crew_stock_picker.compaction import count_tokens
+from ai_agents_crew_stock_picker.crew import AiAgentsCrewStockPicker, TrendingCompanyResearchList
+
+
+def long_text(name: str) -> str:
+    return " ".join(
+        f"{name} zwiększyła przychody o {index} procent w segmencie centrów danych." for index in range(60)
+    )
+
+
+def test_pick_context_is_compacted_from_raw_research(monkeypatch):
+    monkeypatch.setenv("COMPACTION_TOKEN_BUDGET", "400")
+    research = {
+        "research_list": [
+            {
+                "name": name,
+                "ticker": ticker,
+                "market_position": long_text(name),
+                "future_outlook": long_text(name),
+                "investment_potential": long_text(name),
+            }
+            for name, ticker in (("Nvidia", "NVDA"), ("AMD", "AMD"), ("Intel", "INTC"))
+        ]
+    }
+    crew_instance = AiAgentsCrewStockPicker()
+    output = TaskOutput(
+        name="research_trending_companies",
+        description="research",
+        raw=json.dumps(research),
+        agent="test",
+    )
+
+    crew_instance._compact_research(output)
+
+    context = crew_instance.pick_best_company().context[0].output
+    assert isinstance(context.pydantic, TrendingCompanyResearchList)
+    assert [entry.name for entry in context.pydantic.research_list] == ["Nvidia", "AMD", "Intel"]
+    report = crew_instance.compaction_report
+    assert report is not None and report.tokens_after < report.tokens_before
+    assert count_tokens(context.raw) <= 400
@@ -0,0 +1,72 @@
+"""Testy budowy załogi."""
+
+import gc
+import time
+import weakref
+
+from ai_agents_crew_stock_picker.crew import (
+    AiAgentsCrewStockPicker,
+    _parsed_yaml,
+    shared_memory_storages,
+)
+from ai_agents_crew_stock_picker.embeddings import CachedEmbeddingFunction
+
+
+def test_crew_builds_with_cached_memory_embedder():
+    for execution_mode in ("pipeline", "hierarchical"):
+        crew_instance = AiAgentsCrewStockPicker()
+        crew_instance.execution_mode = execution_mode
+        crew = crew_instance.crew()
+
+        assert [task.name for task in crew.tasks] == [
+            "find_trending_companies",
+            "research_trending_companies",
+            "pick_best_company",
+        ]
+        assert crew.short_term_memory is not None
+
+
+def test_memory_storages_embed_through_cache():
+    _, short_term_storage, _ = shared_memory_storages()
+    short_term_storage.save("Nvidia prowadzi w akceleratorach AI", {"task": "test"})
+
+    assert isinstance(short_term_storage.embedder_config, dict)
+    assert issubclass(
+        short_term_storage.embedder_config["config"]["embedding_callable"],
+        CachedEmbeddingFunction,
+    )
+    assert short_term_storage.search("akceleratory AI", limit=1)
+
+
+def _run_and_close(tmp_path) -> weakref.ref:
+    # Osobna funkcja - CrewAI (FlowTrackable) utrwala f_locals wywołujących
+    # ramek, więc lokalna zmienna testu trzymałaby instancję do jego końca
+    crew_instance = AiAgentsCrewStockPicker()
+    crew_instance.execution_mode = "pipeline"
+    crew_instance.output_dir = str(tmp_path / "output")
+    crew_instance.use_isolated_state(str(tmp_path / "state"))
+    crew_instance.crew().kickoff(inputs={"sector": "technology", "region": "Africa"})
+    crew_instance.close()
+    return weakref.ref(crew_instance)
+
+
+def test_close_releases_instance_after_run(fake_llm, tmp_path):
+    released = _run_and_close(tmp_path)
+
+    # Handlery zdarzeń CrewAI (pula wątków) mogą jeszcze chwilę trzymać zadania
+    deadline = time.monotonic() + 10
+    while gc.collect() is not None and released() is not None and time.monotonic() < deadline:
+        time.sleep(0.1)
+
+    assert released() is None
+
+
+def test_instances_reuse_parsed_config():
+    first, second = AiAgentsCrewStockPicker(), AiAgentsCrewStockPicker()
+
+    pick_config = first.tasks_config["pick_best_company"]
+    assert pick_config["description"] == second.tasks_config["pick_best_company"]["description"]
+    assert first.agents_config is not second.agents_config  # CrewBase modyfikuje kopię
+    assert _parsed_yaml.cache_info().hits > 0
+    first.close()
+    second.close()
@@ -0,0 +1,30 @@
+"""Testy cache embeddingów i nazw kolekcji pamięci."""
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_agents_crew_stock_picker.embeddings import (
+    CachedEmbedder,
+    HashingEmbedder,
+    memory_collection_tag,
+)
+
+
+def test_counters_are_consistent_across_threads(tmp_path):
+    cached = CachedEmbedder(HashingEmbedder(), path=str(tmp_path / "embedding_cache.db"))
+    texts = [f"firma {index % 20}" for index in range(50)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda text: cached.embed([text]), texts * 4))
+
+    assert cached.hits + cached.misses == len(texts) * 4
+    assert cached.misses >= 20
+
+
+def test_collection_tag_depends_on_embedder():
+    hashing = memory_collection_tag("hashing")
+    openai = memory_collection_tag("openai")
+
+    assert hashing == "hashing_384"
+    assert openai != hashing
+    assert re.fullmatch(r"[a-zA-Z0-9_]{1,32}", openai)
@@ -0,0 +1,126 @@
+"""Testy guardraili zadań na wynikach bez output.pydantic (jak w CrewAI 1.5)."""
+
+import json
+
+import pytest
+from crewai.tasks.task_output import TaskOutput
+
+from ai_agents_crew_stock_picker.crew import (
+    AiAgentsCrewStockPicker,
+    TrendingCompanyList,
+    TrendingCompanyResearchList,
+)
+
+COMPANIES = [
+    {"name": "Nvidia Corp", "ticker": "NVDA", "reason": "Rekordowe wyniki"},
+    {"name": "Advanced Micro Devices", "ticker": "AMD", "reason": "Nowy procesor"},
+]
+
+
+def raw_output(task_name: str, payload) -> TaskOutput:
+    """Wynik zadania tak, jak przekazuje go CrewAI do guardraila - tylko raw."""
+    raw = payload if isinstance(payload, str) else json.dumps(payload)
+    return TaskOutput(name=task_name, description=task_name, raw=raw, agent="test")
+
+
+@pytest.fixture
+def crew_instance(tmp_path):
+    instance = AiAgentsCrewStockPicker()
+    instance.output_dir = str(tmp_path / "output")
+    instance.use_isolated_state(str(tmp_path / "state"))
+    instance._remember_inputs({"sector": "technology", "region": "Europe"})
+    return instance
+
+
+def test_registry_guardrail_validates_raw_output(crew_instance):
+    output = raw_output("find_trending_companies", f"```json\n{json.dumps({'companies': COMPANIES})}\n```")
+
+    ok, result = crew_instance._registry_guardrail(output)
+
+    assert ok
+    assert isinstance(result, str)  # CrewAI konwertuje tekst na output.pydantic
+    assert [c.ticker for c in TrendingCompanyList.model_validate_json(result).companies] == [
+        "NVDA",
+        "AMD",
+    ]
+    assert sorted(crew_instance._registry().covered_names()) == [
+        "Advanced Micro Devices (AMD)",
+        "Nvidia Corp (NVDA)",
+    ]
+
+
+def test_registry_guardrail_filters_picked_companies(crew_instance):
+    picked = TrendingCompanyList.model_validate({"companies": COMPANIES[:1]}).companies[0]
+    crew_instance._registry().record_pick(picked)
+
+    ok, result = crew_instance._registry_guardrail(
+        raw_output("find_trending_companies", {"companies": COMPANIES})
+    )
+
+    assert ok
+    assert [c.name for c in TrendingCompanyList.model_validate_json(result).companies] == [
+        "Advanced Micro Devices"
+    ]
+
+
+def test_registry_guardrail_rejects_invalid_output(crew_instance):
+    ok, feedback = crew_instance._registry_guardrail(
+        raw_output("find_trending_companies", "Nvidia i AMD są w trendzie")
+    )
+
+    assert not ok
+    assert "schematem" in feedback
+
+
+def test_research_guardrail_merges_raw_output_with_store(crew_instance):
+    crew_instance.find_trending_companies().output = raw_output(
+        "find_trending_companies", {"companies": COMPANIES}
+    )
+    crew_instance._research_store().put(
+        "Advanced Micro Devices",
+        "AMD",
+        "technology",
+        {
+            "name": "Advanced Micro Devices",
+            "ticker": "AMD",
+            "market_position": "Drugi gracz",
+            "future_outlook": "Rosnące udziały",
+            "investment_potential": "Średni",
+        },
+    )
+    fresh = {
+        "research_list": [
+            {
+                "name": "Nvidia Corp",
+                "market_position": "Lider",
+                "future_outlook": "Dobre",
+                "investment_potential": "Wysoki",
+            }
+        ]
+    }
+
+    ok, result = crew_instance._research_guardrail(raw_output("research_trending_companies", fresh))
+
+    assert ok
+    merged = TrendingCompanyResearchList.model_validate_json(result).research_list
+    assert [(entry.name, entry.ticker, entry.from_cache) for entry in merged] == [
+        ("Nvidia Corp", "NVDA", False),
+        ("Advanced Micro Devices", "AMD", True),
+    ]
+    assert crew_instance._research_store().get_fresh("Nvidia Corp", "NVDA", "technology")
+
+
+def test_research_guardrail_rejects_invalid_output(crew_instance):
+    ok, feedback = crew_instance._research_guardrail(
+        raw_output("research_trending_companies", {"research_list": [{"name": "Nvidia"}]})
+    )
+
+    assert not ok
+    assert "market_position" in feedback
+
+
+def test_checkpoint_validates_raw_output(crew_instance):
+    crew_instance._checkpoint_task(raw_output("find_trending_companies", {"companies": COMPANIES}))
+
+    saved = crew_instance._checkpoints().load(crew_instance.run_id)["results"]
+    assert saved["find_trending_companies"]["pydantic"] == {"companies": COMPANIES}
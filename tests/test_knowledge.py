@@ -0,0 +1,75 @@
+"""Testy przyrostowego indeksu wiedzy i wyboru podzbiorów w wyszukiwaniu."""
+
+import pytest
+
+from ai_agents_crew_stock_picker.embeddings import HashingEmbedder
+from ai_agents_crew_stock_picker.knowledge import IndexUpdate, KnowledgeIndex
+
+
+class CountingEmbedder(HashingEmbedder):
+    """Embedder haszujący zapamiętujący embeddowane teksty."""
+
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+
+    def embed(self, texts):
+        self.texts.extend(texts)
+        return super().embed(texts)
+
+
+@pytest.fixture
+def knowledge_dir(tmp_path):
+    directory = tmp_path / "knowledge"
+    (directory / "watchlists").mkdir(parents=True)
+    (directory / "user_preference.txt").write_text("Inwestor preferuje spółki dywidendowe z Europy.")
+    (directory / "watchlists" / "semis.md").write_text("Obserwowane: Nvidia, AMD, ASML - półprzewodniki.")
+    return directory
+
+
+def open_index(knowledge_dir, embedder=None):
+    return KnowledgeIndex(
+        str(knowledge_dir), str(knowledge_dir.parent / "index.db"), embedder or CountingEmbedder()
+    )
+
+
+def update_counts(update: IndexUpdate) -> tuple:
+    return update.added, update.changed, update.removed, update.unchanged
+
+
+def test_unchanged_files_are_not_reembedded(knowledge_dir):
+    assert update_counts(open_index(knowledge_dir).load().last_update) == (2, 0, 0, 0)
+
+    embedder = CountingEmbedder()
+    index = open_index(knowledge_dir, embedder).load()
+
+    assert update_counts(index.last_update) == (0, 0, 0, 2)
+    assert index.last_update.chunks_embedded == 0
+    assert embedder.texts == []
+    assert index.subsets == ["general", "watchlists"]
+
+
+def test_changed_and_removed_files_update_index(knowledge_dir):
+    open_index(knowledge_dir).load()
+    (knowledge_dir / "watchlists" / "semis.md").write_text("Obserwowane: Intel i TSMC - foundry.")
+    (knowledge_dir / "user_preference.txt").unlink()
+
+    embedder = CountingEmbedder()
+    index = open_index(knowledge_dir, embedder).load()
+
+    assert update_counts(index.last_update) == (0, 1, 1, 0)
+    assert embedder.texts == ["Obserwowane: Intel i TSMC - foundry."]
+    assert index.subsets == ["watchlists"]
+    hits = index.search("Intel TSMC foundry")
+    assert [(hit.source, hit.text) for hit in hits] == [
+        ("watchlists/semis.md", "Obserwowane: Intel i TSMC - foundry.")
+    ]
+
+
+def test_search_respects_selected_subsets(knowledge_dir):
+    index = open_index(knowledge_dir)
+
+    assert {hit.subset for hit in index.search("spółki")} == {"general", "watchlists"}
+    assert {hit.subset for hit in index.search("spółki", subsets=["watchlists"])} == {"watchlists"}
+    # Jawnie pusta lista podzbiorów (knowledge_subsets: []) - nic nie jest przeszukiwane
+    assert index.search("spółki", subsets=[]) == []
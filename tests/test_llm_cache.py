@@ -0,0 +1,59 @@
+"""Testy klucza cache odpowiedzi LLM."""
+
+from crewai.llms.base_llm import BaseLLM
+
+from ai_agents_crew_stock_picker.crew import TrendingCompanyList
+from ai_agents_crew_stock_picker.llm_cache import CachingLLM, LLMResponseStore
+
+MESSAGES = [{"role": "user", "content": "Znajdź firmy"}]
+
+
+class CountingLLM(BaseLLM):
+    """LLM zwracający numer wywołania - każda odpowiedź spoza cache jest inna."""
+
+    def __init__(self, **params):
+        super().__init__(model="openai/gpt-4o-mini", temperature=params.pop("temperature", None))
+        for name, value in params.items():
+            setattr(self, name, value)
+        self.calls = 0
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, **kwargs):
+        self.calls += 1
+        self._track_token_usage_internal({"prompt_tokens": 10, "completion_tokens": 5})
+        return f"odpowiedź {self.calls}"
+
+
+def caching(tmp_path, **params) -> CachingLLM:
+    store = LLMResponseStore(path=str(tmp_path / "llm_cache.db"))
+    return CachingLLM(CountingLLM(**params), "auto", store=store)
+
+
+def test_cache_hits_for_identical_request(tmp_path):
+    llm = caching(tmp_path, temperature=0.2)
+
+    assert llm.call(MESSAGES) == llm.call(MESSAGES) == "odpowiedź 1"
+
+
+def test_cache_key_includes_sampling_params(tmp_path):
+    llm = caching(tmp_path, temperature=0.2)
+    llm.call(MESSAGES)
+
+    llm.inner.temperature = 0.9
+    assert llm.call(MESSAGES) == "odpowiedź 2"
+    llm.inner.response_format = TrendingCompanyList
+    assert llm.call(MESSAGES) == "odpowiedź 3"
+    assert llm.call(MESSAGES, response_model=TrendingCompanyList) == "odpowiedź 4"
+    llm.stop = ["Observation:"]
+    assert llm.call(MESSAGES) == "odpowiedź 5"
+
+
+def test_token_usage_counts_only_llm_calls(tmp_path):
+    llm = caching(tmp_path)
+    llm.call(MESSAGES)
+    llm.call(MESSAGES)  # Odpowiedź z magazynu - bez tokenów
+
+    usage = llm.get_token_usage_summary()
+    assert usage.total_tokens == 15
+    assert usage.successful_requests == 1
+    assert llm.store.hits == 1
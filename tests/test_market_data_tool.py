@@ -0,0 +1,91 @@
+"""Testy przesiewu danych rynkowych na małym syntetycznym zbiorze."""
+
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from ai_agents_crew_stock_picker.tools.market_data_tool import (
+    MarketDataStore,
+    MarketDataTool,
+    rank,
+)
+
+DAYS = [(date(2025, 1, 1) + timedelta(days=day)).isoformat() for day in range(30)]
+
+
+def write_prices(data_dir, series):
+    """series: ticker -> lista cen od pierwszego dnia (None - brak notowania)."""
+    rows = [
+        f"{DAYS[day]},{ticker},{'' if price is None else price}"
+        for ticker, prices in series.items()
+        for day, price in enumerate(prices)
+    ]
+    (data_dir / "prices.csv").write_text("date,ticker,close\n" + "\n".join(rows) + "\n")
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    write_prices(tmp_path, {
+        "AAA": [100 + day for day in range(30)],
+        "BBB": [200 - day for day in range(30)],
+        # Notowana tylko w ostatnim dniu - brak momentum
+        "CCC": [None] * 29 + [50],
+    })
+    (tmp_path / "fundamentals.csv").write_text(
+        "ticker,eps,book_value_per_share,sales_per_share\n"
+        "AAA,4.0,20,10\n"
+        "BBB,-2.0,50,40\n"
+    )
+    return tmp_path
+
+
+def test_screen_reports_unknown_tickers(data_dir):
+    metrics = MarketDataStore(str(data_dir)).screen(["aaa", "ZZZ", "BBB"])
+
+    assert metrics["tickers"] == ["AAA", "BBB"]
+    assert metrics["unknown"] == ["ZZZ"]
+    assert metrics["price"].tolist() == [129.0, 171.0]
+    assert metrics["momentum_1m"][0] == pytest.approx(129 / 108 - 1)
+
+
+def test_negative_eps_gives_no_pe(data_dir):
+    results = {row["ticker"]: row for row in rank(MarketDataStore(str(data_dir)).screen(), "pe", 10)}
+
+    assert results["AAA"]["pe"] == pytest.approx(129 / 4, abs=1e-4)
+    assert results["BBB"]["pe"] is None
+    assert results["BBB"]["pb"] == pytest.approx(171 / 50, abs=1e-4)
+    assert results["CCC"]["pe"] is None  # Brak danych fundamentalnych
+
+
+def test_rank_puts_missing_values_last(data_dir):
+    metrics = MarketDataStore(str(data_dir)).screen()
+
+    # Sortowanie malejące (momentum) i rosnące (P/E) - braki zawsze na końcu
+    assert [row["ticker"] for row in rank(metrics, "momentum_1m", 10)] == ["AAA", "BBB", "CCC"]
+    assert [row["ticker"] for row in rank(metrics, "pe", 10)] == ["AAA", "BBB", "CCC"]
+    assert [row["ticker"] for row in rank(metrics, "momentum_1m", 1)] == ["AAA"]
+    with pytest.raises(ValueError):
+        rank(metrics, "dividend", 10)
+
+
+def test_npy_cache_is_rebuilt_after_source_change(data_dir):
+    MarketDataStore(str(data_dir)).load()
+    cached = data_dir / ".cache" / "prices.npy"
+    built_at = cached.stat().st_mtime_ns
+
+    reused = MarketDataStore(str(data_dir)).screen(["AAA"])
+    assert cached.stat().st_mtime_ns == built_at
+    assert reused["price"].tolist() == [129.0]
+
+    write_prices(data_dir, {"AAA": [10 + day for day in range(30)], "DDD": [5] * 30})
+    metrics = MarketDataStore(str(data_dir)).screen()
+
+    assert metrics["tickers"] == ["AAA", "DDD"]
+    assert metrics["price"].tolist() == [39.0, 5.0]
+
+
+def test_tool_returns_json_error_without_data(tmp_path):
+    tool = MarketDataTool(store=MarketDataStore(str(tmp_path)))
+
+    assert "prices.csv" in json.loads(tool._run("AAA"))["error"]
@@ -0,0 +1,25 @@
+from ai_agents_crew_stock_picker.embeddings import memory_collection_tag
+from ai_agents_crew_stock_picker.memory_maintenance import (
+    MaintenancePolicy,
+    chroma_directory,
+    run_maintenance,
+)
+
+
+def test_maintenance_finds_crewai_chroma_store(tmp_path):
+    """Kolekcje RAGStorage leżą w katalogu CrewAI (CREWAI_STORAGE_DIR), nie w ./memory."""
+    from ai_agents_crew_stock_picker.crew import shared_memory_storages
+
+    _, short_term_storage, _ = shared_memory_storages()
+    # Teksty różne tylko wielkością liter i interpunkcją - duplikat po normalizacji
+    short_term_storage.save("Nvidia (NVDA) prowadzi w chipach AI.", {"agent": "test"})
+    short_term_storage.save("NVIDIA NVDA prowadzi w chipach AI", {"agent": "test"})
+    assert (chroma_directory() / "chroma.sqlite3").exists()
+
+    policy = MaintenancePolicy(retention_days=0, max_entries=0, dedup_similarity=1.0)
+    report = run_maintenance(str(tmp_path / "memory"), policy)
+
+    stores = {store.store: store for store in report.stores}
+    short_term = stores[f"chroma:memory_short_term_{memory_collection_tag()}"]
+    assert short_term.skipped is None
+    assert short_term.duplicates >= 1
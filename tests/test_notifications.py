@@ -0,0 +1,137 @@
+"""Testy dyspozytora powiadomień na lokalnym serwerze zamiast API Pushover."""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from ai_agents_crew_stock_picker.notifications import NotificationDispatcher
+
+
+class FakePushover:
+    """Lokalny serwer zapisujący żądania; pierwsze fail_first odpowiedzi to 503."""
+
+    def __init__(self, fail_first: int = 0):
+        self.fail_first = fail_first
+        self.requests = []  # (czas, pola formularza)
+        self.messages = []  # Wiadomości przyjętych żądań
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802 - nazwa wymagana przez http.server
+                body = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+                fields = {key: values[0] for key, values in parse_qs(body).items()}
+                server.requests.append((time.monotonic(), fields))
+                status = 503 if len(server.requests) <= server.fail_first else 200
+                if status == 200:
+                    server.messages.append(fields["message"])
+                self.send_response(status)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/1/messages.json"
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def pushover():
+    server = FakePushover()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def dispatcher_for(monkeypatch):
+    """Tworzy dyspozytora z PUSHOVER_URL wskazującym na atrapę (from_env)."""
+    created = []
+
+    def create(server, coalesce=60.0, min_interval=0.0):
+        monkeypatch.setenv("PUSHOVER_USER", "user")
+        monkeypatch.setenv("PUSHOVER_TOKEN", "token")
+        monkeypatch.setenv("PUSHOVER_URL", server.url)
+        monkeypatch.setenv("PUSHOVER_COALESCE_SECONDS", str(coalesce))
+        monkeypatch.setenv("PUSHOVER_MIN_INTERVAL", str(min_interval))
+        dispatcher = NotificationDispatcher.from_env()
+        created.append(dispatcher)
+        return dispatcher
+
+    yield create
+    for dispatcher in created:
+        dispatcher.close(timeout=5)
+
+
+def test_messages_of_one_run_are_sent_as_one_digest(pushover, dispatcher_for):
+    dispatcher = dispatcher_for(pushover)
+
+    dispatcher.submit("Nvidia", run_id="a")
+    dispatcher.submit("AMD", run_id="a")
+    dispatcher.submit("Intel", run_id="b")
+    assert dispatcher.flush(timeout=5)
+
+    assert sorted(pushover.messages) == ["Intel", "• Nvidia\n• AMD"]
+    assert pushover.requests[0][1]["user"] == "user"
+    assert dispatcher.sent == 2 and dispatcher.failed == 0
+
+
+def test_digest_is_sent_after_coalesce_window(pushover, dispatcher_for):
+    dispatcher = dispatcher_for(pushover, coalesce=0.2)
+
+    dispatcher.submit("Nvidia")
+    dispatcher.submit("AMD")
+    deadline = time.monotonic() + 5
+    while not pushover.messages and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert pushover.messages == ["• Nvidia\n• AMD"]
+
+
+def test_requests_respect_min_interval(pushover, dispatcher_for):
+    dispatcher = dispatcher_for(pushover, min_interval=0.3)
+
+    for run_id in ("a", "b", "c"):
+        dispatcher.submit(f"wybór {run_id}", run_id=run_id)
+    assert dispatcher.flush(timeout=5)
+
+    times = [sent_at for sent_at, _ in pushover.requests]
+    assert len(times) == 3
+    assert all(later - earlier >= 0.29 for earlier, later in zip(times, times[1:]))
+
+
+def test_server_errors_are_retried(dispatcher_for):
+    server = FakePushover(fail_first=2)
+    try:
+        dispatcher = dispatcher_for(server)
+
+        dispatcher.submit("Nvidia")
+        assert dispatcher.flush(timeout=10)
+
+        assert len(server.requests) == 3
+        assert server.messages == ["Nvidia"]
+        assert dispatcher.sent == 1 and dispatcher.failed == 0
+    finally:
+        server.close()
+
+
+def test_close_sends_pending_digest(pushover, dispatcher_for):
+    dispatcher = dispatcher_for(pushover, coalesce=60.0)
+    dispatcher.submit("Nvidia")
+    assert pushover.messages == []
+
+    dispatcher.close(timeout=5)
+
+    assert pushover.messages == ["Nvidia"]
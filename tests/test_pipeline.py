@@ -0,0 +1,103 @@
+"""Testy end-to-end załogi na atrapie LLM (benchmarks/fakes.py)."""
+
+import json
+from pathlib import Path
+
+from ai_agents_crew_stock_picker.crew import TrendingCompanyList, TrendingCompanyResearchList
+
+INPUTS = {"sector": "technology", "region": "Africa"}
+
+
+def test_pipeline_run_produces_typed_outputs(pipeline_crew):
+    result = pipeline_crew.crew().kickoff(inputs=INPUTS)
+
+    assert "Company 0000" in result.raw
+    found = pipeline_crew.find_trending_companies().output.pydantic
+    research = pipeline_crew.research_trending_companies().output.pydantic
+    assert isinstance(found, TrendingCompanyList)
+    assert isinstance(research, TrendingCompanyResearchList)
+    assert len(research.research_list) == len(found.companies) == 3
+    # Kontekst wyboru to skrócone analizy, a nie pełny wynik etapu analizy
+    assert pipeline_crew.compaction_report is not None
+    pick_context = pipeline_crew.pick_best_company().context[0].output
+    assert isinstance(pick_context.pydantic, TrendingCompanyResearchList)
+
+
+def test_fanout_streams_typed_research(pipeline_crew):
+    streamed = []
+
+    result = pipeline_crew.kickoff_fanout(INPUTS, max_workers=2, on_research=streamed.append)
+
+    assert "Company 0000" in result.raw
+    found = pipeline_crew.find_trending_companies().output.pydantic
+    research = pipeline_crew.research_trending_companies().output.pydantic
+    assert isinstance(found, TrendingCompanyList)
+    assert isinstance(research, TrendingCompanyResearchList)
+    assert sorted(entry.name for entry in streamed) == [c.name for c in found.companies]
+
+
+def test_checkpoints_store_validated_models(pipeline_crew):
+    pipeline_crew.crew().kickoff(inputs=INPUTS)
+
+    results = pipeline_crew._checkpoints().load(pipeline_crew.run_id)["results"]
+    assert results["find_trending_companies"]["pydantic"]["companies"]
+    assert results["research_trending_companies"]["pydantic"]["research_list"]
+    assert results["pick_best_company"]["pydantic"] is None  # Raport tekstowy
+
+
+def test_pipeline_run_records_history_and_pick(pipeline_crew):
+    pipeline_crew.crew().kickoff(inputs=INPUTS)
+
+    runs = pipeline_crew._history().runs()
+    assert [run["run_id"] for run in runs] == [pipeline_crew.run_id]
+    assert runs[0]["companies"] == 3
+    assert runs[0]["picked_ticker"] == "C0000"
+    registry = pipeline_crew._registry()
+    assert registry._find("Company 0000", "C0000")[2] is not None  # last_picked
+
+
+def test_pipeline_run_writes_research_stream(pipeline_crew):
+    pipeline_crew.crew().kickoff(inputs=INPUTS)
+
+    lines = (Path(pipeline_crew.output_dir) / "research_stream.jsonl").read_text().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == 3
+    assert {record["status"] for record in records} == {"ok"}
+    assert {record["run_id"] for record in records} == {pipeline_crew.run_id}
+
+
+def test_resume_runs_only_remaining_stages(pipeline_crew, tmp_path):
+    from crewai import Crew, Process
+
+    from ai_agents_crew_stock_picker.crew import AiAgentsCrewStockPicker
+
+    # Uruchomienie przerwane po etapie analizy (bez pick_best_company)
+    pipeline_crew._remember_inputs(INPUTS)
+    stages = [pipeline_crew.find_trending_companies(), pipeline_crew.research_trending_companies()]
+    Crew(
+        agents=[stage.agent for stage in stages], tasks=stages, process=Process.sequential
+    ).kickoff(inputs=INPUTS)
+    run_id = pipeline_crew.run_id
+    checkpoints = pipeline_crew._checkpoints()
+    before = checkpoints.load(run_id)
+    assert before["stages"] == ["find_trending_companies", "research_trending_companies"]
+
+    resumed = AiAgentsCrewStockPicker()
+    resumed.use_isolated_state(str(tmp_path / "state"))
+    result = resumed.resume(run_id)
+
+    assert "Company 0000" in result.raw
+    after = checkpoints.load(run_id)
+    assert after["stages"][-1] == "pick_best_company"
+    # Ukończone etapy odtworzono z checkpointów, a nie wykonano ponownie
+    for stage in before["stages"]:
+        assert after["results"][stage]["completed_at"] == before["results"][stage]["completed_at"]
+    assert resumed._history().runs()[0]["picked_ticker"] == "C0000"
+
+
+def test_pipeline_run_reports_token_usage(pipeline_crew):
+    result = pipeline_crew.crew().kickoff(inputs=INPUTS)
+
+    # Agenci mają LLM opakowane w gubernator tempa - zużycie pochodzi z modelu
+    assert result.token_usage.total_tokens > 0
+    assert result.token_usage.successful_requests >= 3
@@ -0,0 +1,131 @@
+"""Testy kubełka żetonów, AIMD i opakowania LLM gubernatora tempa."""
+
+import pytest
+from crewai.llms.base_llm import BaseLLM
+
+from ai_agents_crew_stock_picker.rate_governor import (
+    DECREASE_FACTOR,
+    GovernedLLM,
+    RateGovernor,
+    TokenBucket,
+)
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class UsageLLM(BaseLLM):
+    """LLM raportujący zużycie tokenów jak natywni dostawcy CrewAI."""
+
+    def __init__(self):
+        super().__init__(model="openai/gpt-4o-mini")
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, **kwargs):
+        self._track_token_usage_internal({"prompt_tokens": 10, "completion_tokens": 5})
+        return "odpowiedź"
+
+
+def governor(**overrides) -> RateGovernor:
+    params = {"requests_per_second": 0, "max_concurrency": 8, "retries": 2}
+    params.update(overrides)
+    return RateGovernor("test", **params)
+
+
+def test_token_bucket_queues_reservations():
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    # Saldo spada poniżej zera - kolejne rezerwacje czekają coraz dłużej
+    assert bucket.acquire() == pytest.approx(0.1, abs=0.01)
+    assert bucket.acquire() == pytest.approx(0.2, abs=0.01)
+
+
+def test_token_bucket_without_limit_never_waits():
+    bucket = TokenBucket(rate=0)
+
+    assert all(bucket.acquire(1000) == 0.0 for _ in range(10))
+
+
+def test_token_bucket_pause_delays_next_acquire():
+    bucket = TokenBucket(rate=10, capacity=10)
+
+    bucket.pause(1.0)
+
+    assert bucket.acquire() == pytest.approx(1.1, abs=0.02)
+
+
+def test_throttling_halves_limits_and_retries():
+    gov = governor(requests_per_second=100)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RateLimited("429 Too Many Requests")
+        return "ok"
+
+    assert gov.call(flaky) == "ok"
+    assert len(attempts) == 2
+    assert gov.throttled == 1
+    # Spadek multiplikatywny, a potem jeden krok wzrostu addytywnego po sukcesie
+    assert gov.concurrency == pytest.approx(8 * DECREASE_FACTOR + 1 / (8 * DECREASE_FACTOR))
+    assert gov.requests.rate < 100
+
+
+def test_throttling_gives_up_after_retries():
+    gov = governor(retries=1)
+
+    def always_throttled():
+        raise RateLimited("rate limit exceeded")
+
+    with pytest.raises(RateLimited):
+        gov.call(always_throttled)
+    assert gov.throttled == 1
+
+
+def test_other_errors_are_not_retried():
+    gov = governor()
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("błąd")
+
+    with pytest.raises(ValueError):
+        gov.call(broken)
+    assert len(attempts) == 1 and gov.throttled == 0
+
+
+def test_success_grows_concurrency_back_to_ceiling():
+    gov = governor(max_concurrency=4)
+    gov.concurrency = 1.0
+
+    for _ in range(20):
+        gov._on_success(0.01)
+
+    assert gov.concurrency == 4.0
+
+
+def test_latency_spike_decreases_concurrency():
+    gov = governor(max_concurrency=4)
+    gov._on_success(0.01)
+
+    gov._on_success(1.0)
+
+    assert gov.latency_spikes == 1
+    assert gov.concurrency == 4 * DECREASE_FACTOR
+
+
+def test_governed_llm_reports_inner_token_usage():
+    llm = GovernedLLM(UsageLLM(), governor=governor())
+
+    llm.call("prompt")
+    llm.call("prompt")
+
+    usage = llm.get_token_usage_summary()
+    assert usage.total_tokens == 30
+    assert usage.successful_requests == 2
+    assert llm._token_usage["prompt_tokens"] == 20
@@ -0,0 +1,41 @@
+"""Testy rozpoznawania firm w rejestrze."""
+
+from types import SimpleNamespace
+
+from ai_agents_crew_stock_picker.registry import detect_pick, normalize_name
+
+CANDIDATES = [
+    SimpleNamespace(name="Agilent Technologies", ticker="A"),
+    SimpleNamespace(name="Nvidia Corp", ticker="NVDA"),
+    SimpleNamespace(name="Advanced Micro Devices", ticker="AMD"),
+]
+
+
+def test_normalize_name_keeps_non_ascii_letters():
+    assert normalize_name("Société Générale") == "societe generale"
+    assert normalize_name("Apple Inc.") == "apple"
+    assert normalize_name("Zakłady Azotowe") == "zakłady azotowe"
+
+
+def test_detect_pick_reads_pick_line():
+    decision = "**Wybrana firma:** Nvidia (NVDA)\n\nAMD i Agilent Technologies odrzucono."
+
+    assert detect_pick(decision, CANDIDATES).ticker == "NVDA"
+
+
+def test_detect_pick_rejects_ambiguous_report():
+    decision = "Nvidia Corp ma lepsze perspektywy niż AMD."
+
+    assert detect_pick(decision, CANDIDATES) is None
+
+
+def test_detect_pick_ignores_lowercase_ticker_words():
+    decision = "To jest a raport - wybieramy Nvidia Corp."
+
+    assert detect_pick(decision, CANDIDATES).ticker == "NVDA"
+
+
+def test_detect_pick_prefers_ticker_on_pick_line():
+    decision = "Wybrana firma: Nvidia (NVDA) - wyprzedza AMD\n\nAgilent Technologies odrzucono."
+
+    assert detect_pick(decision, CANDIDATES).ticker == "NVDA"
@@ -0,0 +1,108 @@
+"""Testy zapytań historii uruchomień na stałych znacznikach czasu."""
+
+import pytest
+
+from ai_agents_crew_stock_picker.crew import TrendingCompany, TrendingCompanyResearch
+from ai_agents_crew_stock_picker.run_history import DAY, RunHistory
+
+NOW = 1_750_000_000.0
+
+
+def company(name, ticker):
+    return TrendingCompany(name=name, ticker=ticker, reason="W wiadomościach")
+
+
+def research(name, ticker, from_cache=False):
+    return TrendingCompanyResearch(
+        name=name,
+        ticker=ticker,
+        market_position="Lider",
+        future_outlook="Dobre",
+        investment_potential="Wysoki",
+        from_cache=from_cache,
+    )
+
+
+NVDA, AMD, INTC = company("Nvidia", "NVDA"), company("AMD", "amd"), company("Intel", "INTC")
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = RunHistory(str(tmp_path / "history.db"))
+    # (run_id, sektor, dni temu, firmy, wybór)
+    for run_id, sector, age, companies, picked in (
+        ("old", "technology", 120, [NVDA, AMD], NVDA),
+        ("tech-1", "technology", 30, [NVDA, AMD, INTC], AMD),
+        ("tech-2", "technology", 2, [NVDA, INTC], NVDA),
+        ("health", "healthcare", 1, [company("Pfizer", "PFE")], None),
+    ):
+        history.record(
+            run_id,
+            {"sector": sector, "region": "US"},
+            "pipeline",
+            companies,
+            research=[research(c.name, c.ticker, from_cache=c is INTC) for c in companies[:2]],
+            picked=picked,
+            duration=10.0,
+            stage_seconds={"find_trending_companies": 2.5},
+            recorded_at=NOW - age * DAY,
+        )
+    yield history
+    history.close()
+
+
+def test_picks_filters_by_sector_days_and_ticker(history):
+    assert [row["run_id"] for row in history.picks(now=NOW)] == ["tech-2", "tech-1", "old"]
+    assert [row["run_id"] for row in history.picks(days=90, now=NOW)] == ["tech-2", "tech-1"]
+    assert history.picks(sector="healthcare", now=NOW) == []
+
+    rows = history.picks(ticker="nvda", now=NOW)
+    assert [(row["run_id"], row["ticker"], row["name"]) for row in rows] == [
+        ("tech-2", "NVDA", "Nvidia"),
+        ("old", "NVDA", "Nvidia"),
+    ]
+    assert [row["run_id"] for row in history.picks(ticker="NVDA", days=90, now=NOW)] == ["tech-2"]
+    assert len(history.picks(limit=1, now=NOW)) == 1
+
+
+def test_picks_by_ticker_uses_index(history):
+    plan = history._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT run_id FROM runs WHERE picked_ticker = ? "
+        "ORDER BY recorded_at DESC",
+        ("NVDA",),
+    ).fetchall()
+
+    assert any("idx_runs_picked" in row["detail"] for row in plan)
+
+
+def test_hit_rates(history):
+    rates = {row["ticker"]: row for row in history.hit_rates(now=NOW)}
+
+    assert rates["NVDA"]["appearances"] == 3 and rates["NVDA"]["picks"] == 2
+    assert rates["NVDA"]["hit_rate"] == pytest.approx(2 / 3, abs=1e-4)
+    assert rates["AMD"]["hit_rate"] == 0.5
+    # Intel analizowany tylko w tech-2 (w tech-1 był trzecią firmą bez analizy)
+    assert (rates["INTC"]["researched"], rates["INTC"]["picks"]) == (1, 0)
+    assert rates["PFE"]["hit_rate"] == 0.0
+
+    recent = history.hit_rates(sector="technology", days=90, min_appearances=2, now=NOW)
+    assert [(row["ticker"], row["hit_rate"]) for row in recent] == [("NVDA", 0.5), ("INTC", 0.0)]
+
+
+def test_runs_and_rerecorded_run(history):
+    runs = history.runs(days=90, now=NOW)
+    assert [row["run_id"] for row in runs] == ["health", "tech-2", "tech-1"]
+    assert runs[0]["picked_ticker"] is None
+    assert runs[1]["stage_seconds"] == {"find_trending_companies": 2.5}
+    assert [row["run_id"] for row in history.runs(sector="technology", limit=2, now=NOW)] == [
+        "tech-2",
+        "tech-1",
+    ]
+
+    # Ponowny zapis (np. po wznowieniu) zastępuje poprzedni
+    history.record("tech-2", {"sector": "technology"}, "pipeline", [AMD], picked=AMD,
+                   recorded_at=NOW)
+    assert history.count() == 4
+    assert [row["run_id"] for row in history.company("NVDA")] == ["tech-1", "old"]
+    assert [row["run_id"] for row in history.picks(ticker="AMD", now=NOW)] == ["tech-2", "tech-1"]
+    assert [row["ticker"] for row in history.picks(ticker="NVDA", now=NOW)] == ["NVDA"]
@@ -0,0 +1,109 @@
+"""Testy lokalnego indeksu symboli i jego użycia w guardrailu wyszukiwania firm."""
+
+import json
+
+import pytest
+from crewai.tasks.task_output import TaskOutput
+
+from ai_agents_crew_stock_picker import crew as crew_module
+from ai_agents_crew_stock_picker.crew import AiAgentsCrewStockPicker, TrendingCompanyList
+from ai_agents_crew_stock_picker.symbols import SymbolIndex
+
+LISTING = [
+    ("MATH", "Metalpha Technology Holding Limited - Ordinary Shares"),
+    ("NVDA", "NVIDIA Corporation - Common Stock"),
+    ("AMD", "Advanced Micro Devices, Inc. - Common Stock"),
+    ("TSM", "Taiwan Semiconductor Manufacturing Company Ltd."),
+    ("GOOGL", "Alphabet Inc. Class A Common Stock"),
+]
+
+
+def write_listing(path, rows):
+    path.write_text(
+        "Symbol,Name\n" + "".join(f'{symbol},"{name}"\n' for symbol, name in rows),
+        encoding="utf-8",
+    )
+    return path
+
+
+@pytest.fixture
+def listing(tmp_path):
+    return write_listing(tmp_path / "listings.csv", LISTING)
+
+
+@pytest.fixture
+def index(listing):
+    return SymbolIndex(str(listing))
+
+
+def test_exact_ticker_and_name(index):
+    assert len(index) == len(LISTING)
+    assert index.by_ticker("nvda").method == "ticker"
+    assert index.by_ticker("INTC") is None
+
+    match = index.by_name("Nvidia Corp")
+    assert (match.symbol, match.name, match.method) == ("NVDA", "NVIDIA Corporation", "name")
+
+
+def test_prefix_match_ends_at_word_boundary(tmp_path, index):
+    match = index.by_name("Taiwan Semiconductor")
+    assert (match.symbol, match.method) == ("TSM", "prefix")
+
+    # "Meta" to prefiks "Metalpha", ale nie na granicy słowa
+    assert index.by_name("Meta") is None
+
+    with_meta = SymbolIndex(str(write_listing(
+        tmp_path / "with_meta.csv",
+        LISTING + [("META", "Meta Platforms, Inc. - Class A Common Stock")],
+    )))
+    match = with_meta.by_name("Meta")
+    assert (match.symbol, match.method) == ("META", "prefix")
+
+
+def test_fuzzy_match_respects_threshold(listing):
+    match = SymbolIndex(str(listing)).by_name("Advanced Micro Device")
+    assert (match.symbol, match.method) == ("AMD", "fuzzy")
+    assert 0.5 <= match.score < 1.0
+
+    assert SymbolIndex(str(listing), threshold=0.95).by_name("Advanced Micro Device") is None
+    assert SymbolIndex(str(listing)).by_name("Completely Unknown Startup") is None
+
+
+def test_name_wins_over_mismatched_ticker(index):
+    assert index.resolve("Nvidia", "AMD").symbol == "NVDA"
+    # Ticker bez pasującej nazwy jest akceptowany
+    assert index.resolve("Google", "GOOGL").symbol == "GOOGL"
+    assert index.resolve("AI Factory", "N/A") is None
+
+
+def raw_companies(companies) -> TaskOutput:
+    return TaskOutput(
+        name="find_trending_companies",
+        description="find_trending_companies",
+        raw=json.dumps({"companies": companies}),
+        agent="test",
+    )
+
+
+def test_registry_guardrail_drops_unlisted_companies(tmp_path, monkeypatch, index):
+    monkeypatch.setattr(crew_module, "shared_symbol_index", lambda: index)
+    instance = AiAgentsCrewStockPicker()
+    instance.use_isolated_state(str(tmp_path / "state"))
+    instance._remember_inputs({"sector": "technology"})
+
+    ok, result = instance._registry_guardrail(raw_companies([
+        {"name": "AI Factory", "ticker": "N/A", "reason": "Startup"},
+        {"name": "Nvidia Corp", "ticker": "AMD", "reason": "Rekordowe wyniki"},
+    ]))
+
+    assert ok
+    companies = TrendingCompanyList.model_validate_json(result).companies
+    assert [(c.name, c.ticker) for c in companies] == [("NVIDIA Corporation", "NVDA")]
+
+    ok, feedback = instance._registry_guardrail(raw_companies([
+        {"name": "AI Factory", "ticker": "N/A", "reason": "Startup"},
+    ]))
+
+    assert not ok
+    assert "AI Factory" in feedback
+    instance.close()
@@ -0,0 +1,73 @@
+"""Testy łączenia zdarzeń CrewAI w spany."""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from ai_agents_crew_stock_picker.tracing import RunTracer
+
+START = datetime(2026, 1, 5, 12, 0, tzinfo=timezone.utc)
+
+
+def llm_event(seconds: float, task_id: str, **fields) -> SimpleNamespace:
+    return SimpleNamespace(
+        timestamp=START + timedelta(seconds=seconds),
+        model="gpt-4o-mini",
+        task_id=task_id,
+        agent_id="agent-1",
+        **fields,
+    )
+
+
+def tracer_at_start() -> RunTracer:
+    tracer = RunTracer(run_id="test")
+    tracer._started_at = START.timestamp()
+    return tracer
+
+
+def test_end_handled_before_start_still_forms_span():
+    tracer = tracer_at_start()
+
+    tracer.on_end("llm", llm_event(2.0, "task-1", response="odpowiedź"), failed=False)
+    tracer.on_start("llm", llm_event(0.5, "task-1", messages=[{"content": "prompt"}]))
+
+    [span] = tracer.spans
+    assert (span.start, span.duration) == (0.5, 1.5)
+    assert span.estimated_prompt_tokens > 0 and span.estimated_completion_tokens > 0
+
+
+def test_interleaved_calls_are_matched_by_task_and_time():
+    tracer = tracer_at_start()
+
+    tracer.on_start("llm", llm_event(0.0, "task-1"))
+    tracer.on_start("llm", llm_event(1.0, "task-2"))
+    tracer.on_end("llm", llm_event(5.0, "task-1", response=""), failed=False)
+    tracer.on_start("llm", llm_event(6.0, "task-1"))
+    tracer.on_end("llm", llm_event(2.0, "task-2", response=""), failed=True)
+    tracer.on_end("llm", llm_event(7.0, "task-1", response=""), failed=False)
+
+    spans = sorted(
+        (span.attributes["task_id"], span.start, span.duration, span.status) for span in tracer.spans
+    )
+    assert spans == [
+        ("task-1", 0.0, 5.0, "ok"),
+        ("task-1", 6.0, 1.0, "ok"),
+        ("task-2", 1.0, 1.0, "error"),
+    ]
+
+
+def test_task_spans_sum_llm_tokens(pipeline_crew):
+    with RunTracer(run_id="pipeline") as tracer:
+        pipeline_crew.crew().kickoff(inputs={"sector": "technology", "region": "Africa"})
+
+    tasks = {span.name: span for span in tracer.spans if span.kind == "task"}
+    assert set(tasks) == {
+        "find_trending_companies",
+        "research_trending_companies",
+        "pick_best_company",
+    }
+    llm_spans = [span for span in tracer.spans if span.kind == "llm"]
+    assert llm_spans and all(span.estimated_prompt_tokens > 0 for span in llm_spans)
+    assert sum(span.estimated_prompt_tokens for span in tasks.values()) > 0
+    metrics = tracer.to_openmetrics()
+    assert "stock_picker_step_estimated_tokens_total" in metrics
+    assert "# HELP stock_picker_step_estimated_tokens Szacowane" in metrics